@@ -58,14 +58,32 @@ game_directory = 'game_directory'
 previous_widgets = 'previous_widgets'  # used when reloading, to re-open any previously opened widgets.
 preferred_dcc_versions = 'preferred_dcc_versions'
 projects = 'projects'
+export_workers = 'export_workers'  # how many DCC processes re-export at once, 0 uses the amount of CPU cores
+store_write_delay = 0.5  # seconds the store waits after a change before writing, so many changes write only once
+store_snapshot_attempts = 5  # times the store tries copying settings that another thread changes while they are copied
 dcc_versions = {maya_name: None,
                 houdini_name: None,
                 unreal_name: None,
                 max_3ds_name: None}
 store_defaults = {preferred_dcc_versions: dcc_versions,
                   projects: {},
+                  export_workers: 0,
                   previous_widgets: []}  # previous widgets are reloaded in piper agnostic file, so storing globally
 
+# Expanded Directories
+expanded_directories_suffix = '_expanded_directories'  # sidecar file next to the app's settings file
+expanded_directories_limit = 500  # most directories each project remembers, least recently expanded are dropped first
+expanded_projects_limit = 20  # most projects remembered, least recently used are dropped first
+
+# File Index
+file_index_directory_name = 'index'  # directory inside piper's settings directory where file indices are stored
+file_index_version = 3  # increase when the index format changes to discard old indices
+
+# Search
+search_regex_prefix = 're:'  # searches starting with this are treated as regular expressions
+search_fuzzy_prefix = '~'  # searches starting with this match names that have all its characters in the same order
+search_glob_characters = ('*', '?', '[')  # searches with any of these are treated as globs, such as "SM_*_Low"
+
 # Projects
 create_project = ' + Create'
 delete_project = ' - Delete'
@@ -123,6 +141,41 @@ project_attribute = 'project'
 export_attributes = [dcc_attribute, relative_attribute, pipernode_attribute, method_attribute, project_attribute]
 mesh_with_attribute_name = 'body_low'  # due to UE metadata limitations, a mesh name will be shared across characters
 export_file_name = 'export.json'
+export_retries = 1  # how many more times entries that failed to re-export are tried again
+export_report_directory_name = 'reports'  # directory inside piper's settings directory where export reports go
+
+# Export Cache
+export_cache_name = 'export_cache'  # file inside piper's settings directory with the hashes of every exported file
+export_cache_version = 3  # increase when what goes into an export's inputs hash changes, to export everything again
+export_cache_limit = 20000  # most exported files remembered, least recently exported are dropped first
+export_cache_chunk_size = 1 << 20  # bytes read at a time when hashing files
+
+# Export Profiling
+export_profile_directory_name = 'profiles'  # directory inside piper's settings directory where export timings go
+export_profile_limit = 100  # most export timing reports kept, oldest are deleted first
+
+# FBX Files
+fbx_clip_workers = 4  # most animation clips trimmed out of the same FBX file at the same time
+fbx_frame_tolerance = 0.001  # fraction of a frame a key's time can be off by and still be part of a clip
+
+# Perforce
+p4_paths_per_command = 500  # paths are split into chunks of this size so that no single P4 command grows too big
+p4_info_cache_seconds = 30  # how long "fstat" results are re-used before asking the server again
+p4_invalidating_commands = ('sync', 'edit', 'add', 'delete', 'revert', 'reopen', 'submit')  # clear cached fstat info
+p4_sync_workers = 4  # how many connections sync at the same time when syncing many paths
+p4_parallel_sync_minimum = 50  # least amount of paths each sync worker should get, fewer paths sync on one connection
+p4_display_limit = 10  # actions on more files than this display how many files instead of every file
+p4_status_latest = 'Latest'
+p4_status_out_of_date = 'Out of Date'
+p4_status_in_changelist = 'Checked Out'
+p4_status_checked_out_by_other = 'Locked'
+p4_status_not_in_depot = 'Not in Depot'
+p4_status_colors = {p4_status_latest: '#507b48',  # green
+                    p4_status_out_of_date: '#fbaf5d',  # orange
+                    p4_status_in_changelist: '#00ffff',  # cyan
+                    p4_status_checked_out_by_other: '#ff5555',  # red
+                    p4_status_not_in_depot: '#808080'}  # grey
+p4_status_refresh_seconds = 60  # how often the Browser refreshes the P4 status of the files in expanded directories
 
 # Menu
 game_not_set = 'Game directory is not set. Please use "Piper>Export>Set Game Directory" to set export directory.'
@@ -140,3 +193,5 @@ before_project_change_event = 'before_project_change'
 after_project_change_event = 'after_project_change'
 before_art_directory_change_event = 'before_art_directory_change'
 after_art_directory_change_event = 'after_art_directory_change'
+events_trace_limit = 100000  # most trace events the dispatcher's profiler keeps
+events_trace_directory_name = 'traces'  # directory inside piper's settings directory where event traces are written
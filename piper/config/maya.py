@@ -46,7 +46,9 @@ browser_skeleton_filter = 'browser_skeleton_filter'
 browser_rig_filter = 'browser_rig_filter'
 browser_animation_filter = 'browser_animation_filter'
 browser_other_filter = 'browser_other_filter'
-browser_expanded_directories = 'browser_expanded_directories'
+browser_expanded_directories = 'browser_expanded_directories'  # legacy, migrated to expanded directories sidecar
+browser_lazy_load = 'browser_lazy_load'  # whether browser directories only create their children when expanded
+browser_p4_status = 'browser_p4_status'  # whether browser shows the P4 status of files in expanded directories
 store_defaults = {current_project: None,
                   use_perforce: False,
                   p4_add_after_save:  False,
@@ -68,7 +70,9 @@ store_defaults = {current_project: None,
                   browser_rig_filter: True,
                   browser_animation_filter: True,
                   browser_other_filter: True,
-                  browser_expanded_directories: {}}
+                  browser_expanded_directories: {},
+                  browser_lazy_load: False,
+                  browser_p4_status: False}
 
 # Units
 hotkey_set_name = 'PiperKeySet'
@@ -148,6 +152,11 @@ delete_node_attribute = 'delete'
 check_anim_health_on_export = True
 export_root_scale_curves = True
 delete_fbx_attributes = True
+use_export_cache = True  # skips exports whose source scene, settings, and piper node did not change since last export
+export_namespace = 'EXPORT'  # each animation's export skeleton is built in this namespace followed by a number
+export_skeleton_copy_attributes = ('jointOrient', 'rotateOrder', 'rotateAxis', 'segmentScaleCompensate')
+export_skeleton_connect_attributes = ('translate', 'rotate', 'scale')  # connected from the skeleton and then baked
+split_animation_clips = True  # clips are trimmed out of one export of all their frames instead of each one exported
 fbx_attributes_to_delete = ['filmboxTypeID', 'lockInfluenceWeights', length_attribute, 'currentUVSet']
 meshes_directory = 'Meshes'
 rig_name = 'Rig'
@@ -236,3 +245,4 @@ bookmark_suffix = '_bookmark'
 bookmark_clip_colors = {'Squat': 'pastel green',
                         'Start': 'pastel yellow',
                         'Pose': 'pastel red'}
+scale_precision = 3  # decimals scale values are rounded to before checking whether scale is uniform
@@ -0,0 +1,482 @@
+#  Copyright (c) Christian Corsica. All Rights Reserved.
+
+import socket
+import select
+import struct
+import asyncio
+import threading
+import traceback
+import __main__
+
+
+# every message is prefixed by its size in bytes as a big-endian unsigned int, so results of any size come back intact
+header = struct.Struct('!I')
+
+
+def pack(text):
+    """
+    Frames the given text so that it can be sent through a socket.
+
+    Args:
+        text (string): Text to frame.
+
+    Returns:
+        (bytes): Size header followed by the UTF-8 encoded text.
+    """
+    data = text.encode()
+    return header.pack(len(data)) + data
+
+
+def receiveExactly(client, size):
+    """
+    Receives exactly the given amount of bytes from the given socket.
+
+    Args:
+        client (socket.socket): Socket to receive bytes from.
+
+        size (int): Amount of bytes to receive.
+
+    Returns:
+        (bytes): Data received.
+    """
+    data = bytearray()
+    while len(data) < size:
+        chunk = client.recv(min(size - len(data), 65536))
+
+        if not chunk:
+            raise ConnectionError('Connection closed before full message was received.')
+
+        data.extend(chunk)
+
+    return bytes(data)
+
+
+def receive(client):
+    """
+    Receives one framed message from the given socket.
+
+    Args:
+        client (socket.socket): Socket to receive message from.
+
+    Returns:
+        (string): Text of message received.
+    """
+    size = header.unpack(receiveExactly(client, header.size))[0]
+    return receiveExactly(client, size).decode()
+
+
+def execute(command, namespace=None):
+    """
+    Runs the given python command. Expressions are evaluated so that their result can be sent back.
+
+    Args:
+        command (string): Python code to run.
+
+        namespace (dictionary): Globals to run command with. If None given, will use __main__'s.
+
+    Returns:
+        (string): Result of expression, "None" if command is not an expression, or traceback if command failed.
+    """
+    namespace = __main__.__dict__ if namespace is None else namespace
+
+    try:
+        try:
+            code = compile(command, '<piper>', 'eval')
+        except SyntaxError:
+            exec(compile(command, '<piper>', 'exec'), namespace)
+            return 'None'
+
+        return str(eval(code, namespace))
+
+    except Exception:
+        return traceback.format_exc()
+
+
+class Client(object):
+    """
+    Persistent connection to a Server. Re-connects if connection was dropped, and can pipeline many commands in one
+    round trip by sending all of them before reading any of the results.
+
+    Example:
+        client = Client(('127.0.0.1', 4439))
+        client.send('1 + 1')  # '2'
+        client.sendMany(['1 + 1', 'print("hi")'])  # ['2', 'None']
+    """
+    def __init__(self, address, timeout=None):
+        """
+        Args:
+            address (tuple): Host and port to connect to.
+
+            timeout (float): Seconds to wait on socket operations before raising. None waits forever.
+        """
+        self.address = tuple(address)
+        self.timeout = timeout
+        self.socket = None
+        self.lock = threading.Lock()
+
+    def connect(self):
+        """
+        Connects to the address if not connected already.
+
+        Returns:
+            (socket.socket): Socket connected to address.
+        """
+        if self.socket:
+            return self.socket
+
+        self.socket = socket.create_connection(self.address, timeout=self.timeout)
+        self.socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        return self.socket
+
+    def close(self):
+        """
+        Closes the connection if there is one.
+        """
+        if not self.socket:
+            return
+
+        try:
+            self.socket.close()
+        finally:
+            self.socket = None
+
+    def isConnected(self):
+        """
+        Gets whether the client has an open connection.
+
+        Returns:
+            (boolean): True if client is connected.
+        """
+        return self.socket is not None
+
+    def isStale(self):
+        """
+        Gets whether the server closed the connection since it was last used. A closed connection reads as ready with
+        no data, while a live one has nothing to read in between commands.
+
+        Returns:
+            (boolean): True if client has a connection that the server closed.
+        """
+        if not self.socket:
+            return False
+
+        try:
+            readable, _, _ = select.select([self.socket], [], [], 0)
+            return bool(readable) and not self.socket.recv(1, socket.MSG_PEEK)
+        except (ValueError, OSError):
+            return True
+
+    def sendMany(self, commands):
+        """
+        Pipelines the given commands, sending all of them in one round trip. Re-connects if the server closed the
+        connection since last use. Commands are only sent again if sending failed before the first of them was sent in
+        full, so that the server never runs a command twice.
+
+        Args:
+            commands (list): Commands to send.
+
+        Returns:
+            (list): Results of each command, in the same order as the commands given.
+        """
+        commands = list(commands)
+        if not commands:
+            return []
+
+        frames = [pack(command) for command in commands]
+        payload = b''.join(frames)
+
+        with self.lock:
+            if self.isStale():
+                self.close()
+
+            was_connected = self.isConnected()
+            sent = 0
+
+            try:
+                client = self.connect()
+                while sent < len(payload):
+                    sent += client.send(payload[sent:])
+
+            except (ConnectionError, OSError):
+                self.close()
+
+                # a fresh connection that fails means the server is not there, and once a command was sent in full
+                # the server may have run it already, so sending again could run it twice
+                if not was_connected or sent >= len(frames[0]):
+                    raise
+
+                try:
+                    client = self.connect()
+                    client.sendall(payload)
+                except (ConnectionError, OSError):
+                    self.close()
+                    raise
+
+            try:
+                return [receive(client) for _ in commands]
+            except (ConnectionError, OSError):
+                self.close()
+                raise
+
+    def send(self, command):
+        """
+        Sends the given command and waits for its result.
+
+        Args:
+            command (string): Command to send.
+
+        Returns:
+            (string): Result of command.
+        """
+        return self.sendMany([command])[0]
+
+
+class AsyncClient(object):
+    """
+    Asyncio version of Client, useful for driving many DCC instances at once.
+
+    Example:
+        clients = [AsyncClient(('127.0.0.1', port)) for port in (4439, 4440)]
+        results = await asyncio.gather(*[client.send('1 + 1') for client in clients])
+    """
+    def __init__(self, address):
+        """
+        Args:
+            address (tuple): Host and port to connect to.
+        """
+        self.address = tuple(address)
+        self.reader = None
+        self.writer = None
+        self.lock = None
+
+    async def connect(self):
+        """
+        Connects to the address if not connected already.
+        """
+        if self.writer:
+            return
+
+        self.reader, self.writer = await asyncio.open_connection(*self.address)
+
+    async def close(self):
+        """
+        Closes the connection if there is one.
+        """
+        if not self.writer:
+            return
+
+        writer = self.writer
+        self.reader = None
+        self.writer = None
+        writer.close()
+        await writer.wait_closed()
+
+    async def _receive(self):
+        """
+        Receives one framed message.
+
+        Returns:
+            (string): Text of message received.
+        """
+        size = header.unpack(await self.reader.readexactly(header.size))[0]
+        return (await self.reader.readexactly(size)).decode()
+
+    async def sendMany(self, commands):
+        """
+        Pipelines the given commands, sending all of them in one round trip.
+
+        Args:
+            commands (list): Commands to send.
+
+        Returns:
+            (list): Results of each command, in the same order as the commands given.
+        """
+        commands = list(commands)
+        if not commands:
+            return []
+
+        # lock is made here so that it belongs to the running event loop
+        if self.lock is None:
+            self.lock = asyncio.Lock()
+
+        async with self.lock:
+            await self.connect()
+
+            try:
+                self.writer.write(b''.join([pack(command) for command in commands]))
+                await self.writer.drain()
+                return [await self._receive() for _ in commands]
+            except (ConnectionError, OSError, asyncio.IncompleteReadError):
+                await self.close()
+                raise
+
+    async def send(self, command):
+        """
+        Sends the given command and waits for its result.
+
+        Args:
+            command (string): Command to send.
+
+        Returns:
+            (string): Result of command.
+        """
+        return (await self.sendMany([command]))[0]
+
+
+async def sendAll(requests):
+    """
+    Sends commands to many addresses at once, each address gets its commands pipelined in one round trip.
+
+    Args:
+        requests (dictionary): Address tuple as key, list of commands to send to that address as value.
+
+    Returns:
+        (dictionary): Address tuple as key, list of results as value.
+    """
+    clients = [AsyncClient(address) for address in requests]
+
+    try:
+        results = await asyncio.gather(*[client.sendMany(requests[client.address]) for client in clients])
+    finally:
+        await asyncio.gather(*[client.close() for client in clients])
+
+    return {client.address: result for client, result in zip(clients, results)}
+
+
+class Server(object):
+    """
+    Listens on the given address for framed commands and sends back framed results. Each connection is served in its
+    own thread, and keeps being served until client disconnects, so clients can re-use their connection.
+    """
+    def __init__(self, address, run=execute):
+        """
+        Args:
+            address (tuple): Host and port to listen on.
+
+            run (method): Function that takes the command text and returns the result text.
+        """
+        self.address = tuple(address)
+        self.run = run
+        self.socket = None
+        self.thread = None
+        self.is_running = False
+
+    def start(self):
+        """
+        Starts listening for connections in a separate thread.
+        """
+        if self.is_running:
+            return
+
+        listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+
+        # on windows SO_REUSEADDR lets a second server listen on a port in use, so ask for the port to be exclusive
+        if hasattr(socket, 'SO_EXCLUSIVEADDRUSE'):
+            listener.setsockopt(socket.SOL_SOCKET, socket.SO_EXCLUSIVEADDRUSE, 1)
+        else:
+            listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+
+        try:
+            listener.bind(self.address)
+            listener.listen()
+        except OSError:
+            listener.close()
+            raise
+
+        self.socket = listener
+        self.is_running = True
+        self.thread = threading.Thread(target=self._accept, name='PiperServer', daemon=True)
+        self.thread.start()
+
+    def close(self):
+        """
+        Stops listening for connections.
+        """
+        if not self.is_running:
+            return
+
+        self.is_running = False
+
+        # shutting down wakes up the thread blocked on accept
+        try:
+            self.socket.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+        self.socket.close()
+        self.thread.join(timeout=1)
+        self.socket = None
+        self.thread = None
+
+    def _accept(self):
+        """
+        Accepts connections until server is closed.
+        """
+        while self.is_running:
+            try:
+                client, _ = self.socket.accept()
+            except OSError:
+                break
+
+            threading.Thread(target=self._serve, args=(client,), daemon=True).start()
+
+    def _serve(self, client):
+        """
+        Runs every command the given client sends, in order, and sends back its result.
+
+        Args:
+            client (socket.socket): Connection to serve.
+        """
+        client.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+        with client:
+            while self.is_running:
+                try:
+                    command = receive(client)
+                except (ConnectionError, OSError):
+                    break
+
+                try:
+                    result = self.run(command)
+                except Exception:
+                    result = traceback.format_exc()
+
+                try:
+                    client.sendall(pack('None' if result is None else str(result)))
+                except OSError:
+                    break
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def getClient(address):
+    """
+    Gets the pooled client for the given address, so that connections are re-used instead of opened for every command.
+
+    Args:
+        address (tuple): Host and port to connect to.
+
+    Returns:
+        (Client): Client connected to the given address.
+    """
+    address = tuple(address)
+
+    with _clients_lock:
+        client = _clients.get(address)
+
+        if not client:
+            client = Client(address)
+            _clients[address] = client
+
+    return client
+
+
+def closeClients():
+    """
+    Closes all the pooled clients' connections.
+    """
+    with _clients_lock:
+        [client.close() for client in _clients.values()]
+        _clients.clear()
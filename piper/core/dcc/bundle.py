@@ -9,6 +9,7 @@ import winreg
 import piper.config as pcfg
 import piper.core.pather as pather
 import piper.core.vendor as vendor
+import piper.core.connection as connection
 
 
 class DCC(object):
@@ -22,6 +23,7 @@ class DCC(object):
         # public variables
         self.name = type(self).__name__
         self.address = None  # override. App dependent. Host and port to connect to.
+        self.is_framed = False  # override. True if DCC listens with piper's connection.Server instead of a raw port.
         self.process_name = None  # override. App dependent
         self.registry_path = None  # override. App dependent
         self.registry_exclude = None  # override as list. App dependent
@@ -323,9 +325,47 @@ class DCC(object):
         command = ['start', path] + list(args)
         return subprocess.run(command, universal_newlines=True, shell=True, check=True, capture_output=True)
 
+    def _sendRaw(self, command):
+        """
+        Sends the given command through a new socket to a DCC port that does not frame its messages.
+        Reads until the DCC sends its null terminator or closes the connection.
+
+        Args:
+            command (string): Command to execute in the DCC.
+
+        Returns:
+            (string): Results of command executed in DCC.
+        """
+        chunks = []
+        with socket.create_connection(self.address) as client:
+            client.sendall(command.encode())
+
+            while True:
+                chunk = client.recv(65536)
+                if not chunk:
+                    break
+
+                chunks.append(chunk)
+                if chunk.endswith(b'\x00'):
+                    break
+
+        return b''.join(chunks).decode()
+
+    @staticmethod
+    def _display(data):
+        """
+        Prints the given results of a command if there is anything worth printing.
+
+        Args:
+            data (string): Results of command executed in DCC.
+        """
+        if data and data not in ('None', 'None\n\x00'):
+            print(data)
+
     def send(self, command, display=True):
         """
-        Sends the given command to the Digital Content Creation's address.
+        Sends the given command to the Digital Content Creation's address. If DCC frames its messages, the pooled
+        connection to the address is re-used and results of any size come back intact.
 
         Args:
             command (string): Command to execute in the DCC.
@@ -335,17 +375,56 @@ class DCC(object):
         Returns:
             (string): Results of command executed in DCC.
         """
-        client = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        client.connect(self.address)
-        client.send(command.encode())
-        data = client.recv(1024).decode()
-        client.close()
+        data = connection.getClient(self.address).send(command) if self.is_framed else self._sendRaw(command)
 
-        if display and data and data != 'None\n\x00':
-            print(data)
+        if display:
+            self._display(data)
 
         return data
 
+    def sendMany(self, commands, display=True):
+        """
+        Sends all the given commands to the Digital Content Creation's address. If DCC frames its messages, commands
+        are pipelined in one round trip, else each command is sent on its own.
+
+        Args:
+            commands (list): Commands to execute in the DCC, in order.
+
+            display (boolean): If True, will print results from commands that were executed in the DCC.
+
+        Returns:
+            (list): Results of each command executed in DCC.
+        """
+        if self.is_framed:
+            data = connection.getClient(self.address).sendMany(commands)
+        else:
+            data = [self._sendRaw(command) for command in commands]
+
+        if display:
+            [self._display(result) for result in data]
+
+        return data
+
+    async def sendAsync(self, commands):
+        """
+        Asyncio version of sendMany, useful for driving many DCC instances at once with asyncio.gather.
+        Only works with DCCs that frame their messages.
+
+        Args:
+            commands (list): Commands to execute in the DCC, in order.
+
+        Returns:
+            (list): Results of each command executed in DCC.
+        """
+        if not self.is_framed:
+            raise ValueError(f'{self.name} does not frame its messages, use sendMany instead.')
+
+        client = connection.AsyncClient(self.address)
+        try:
+            return await client.sendMany(commands)
+        finally:
+            await client.close()
+
     def open(self, path, version=None, display=True):
         """
         Opens the given path in the DCC.
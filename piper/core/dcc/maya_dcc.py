@@ -15,6 +15,7 @@ class Maya(DCC):
         super(Maya, self).__init__()
         self.name = pcfg.maya_name
         self.address = mcfg.address
+        self.is_framed = True
         self.process_name = 'maya.exe'
         self.registry_path = 'SOFTWARE\\Autodesk\\Maya'
         self.registry_exclude = ['Capabilities']
@@ -29,7 +30,8 @@ class Maya(DCC):
         self.export_command = "import pymel.core as pm; import setup; setup.piperTools(is_headless=True); " \
                               "pm.openFile(r'{0}', f=True); pm.select('{1}'); {2} "
         self.export_from_json_command = "import setup; setup.piperTools(is_headless=True); " \
-                                        "import piper.mayapy.pipe.export; piper.mayapy.pipe.export.fromJSON('{0}')"
+                                        "import piper.mayapy.pipe.export; " \
+                                        "piper.mayapy.pipe.export.fromJSON('{0}', report_file={1})"
 
     def runPythonBatch(self, command, version=None, display=True):
         if not version:
@@ -42,6 +44,8 @@ class Maya(DCC):
         if display:
             print('\n', output.stdout)
 
+        return output
+
     def runPythonBatches(self, command, display=True):
         [self.runPythonBatch(version, command, display) for version in self.getVersions()]
 
@@ -49,9 +53,9 @@ class Maya(DCC):
         command = self.export_command.format(source_path, piper_node, source_method)
         self.runPythonBatch(command, version=version)
 
-    def exportFromJSON(self, json_file, version=None):
-        command = self.export_from_json_command.format(json_file)
-        self.runPythonBatch(command, version=version)
+    def exportFromJSON(self, json_file, version=None, report_file=None, display=True):
+        command = self.export_from_json_command.format(json_file, repr(report_file))
+        return self.runPythonBatch(command, version=version, display=display)
 
     def onBeforeInstalling(self):
         os.environ["PYTHONUNBUFFERED"] = "1"
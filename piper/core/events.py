@@ -1,5 +1,190 @@
 #  Copyright (c) Christian Corsica. All Rights Reserved.
 
+import os
+import time
+import inspect
+import weakref
+import threading
+import traceback
+from collections import OrderedDict
+
+import piper.core
+import piper.config as pcfg
+import piper.core.pythoner as python
+
+
+class _Listener(object):
+
+    def __init__(self, method, priority=0, deferred=False, weak=True):
+        """
+        Method that listens to an event. Bound methods are weakly referenced, so that widgets that close are not kept
+        alive by the dispatcher, and stop listening once they are garbage collected.
+
+        Args:
+            method (Callable): Function to call when event is called.
+
+            priority (int): Listeners with higher priority are called first.
+
+            deferred (boolean): If True, method is called once the app is idle instead of during the event call.
+
+            weak (boolean): If True and method is a bound method, will only keep a weak reference to it.
+        """
+        self.priority = priority
+        self.deferred = deferred
+        self.name = getattr(method, '__qualname__', None) or repr(method)
+        self.name = f'{getattr(method, "__module__", None) or ""}.{self.name}'.lstrip('.')
+
+        if weak and inspect.ismethod(method):
+            self._reference = weakref.WeakMethod(method)
+        else:
+            self._reference = lambda: method
+
+    def get(self):
+        """
+        Gets the method this listener calls.
+
+        Returns:
+            (Callable or None): Method to call, None if method's object has been garbage collected.
+        """
+        return self._reference()
+
+    def isDead(self):
+        """
+        Gets whether the method's object has been garbage collected.
+
+        Returns:
+            (boolean): True if listener has nothing to call anymore.
+        """
+        return self._reference() is None
+
+
+class Profiler(object):
+    """
+    Records how long each listener takes every time it is called, as structured data that can be summarized or
+    written as a Chrome trace to view in chrome://tracing or https://ui.perfetto.dev.
+
+    Example:
+        profiler = dispatcher.startProfiling()
+        # change projects, art directories, etc.
+        dispatcher.stopProfiling()
+        profiler.getSlowest(5)  # [{'listener': 'piper.ui.browser.Browser.onAfterProjectChange', 'total': 1.2, ...}]
+        profiler.writeTrace()
+    """
+    def __init__(self, trace_limit=pcfg.events_trace_limit):
+        """
+        Args:
+            trace_limit (int): Most trace events kept, so that long profiling sessions don't use unbounded memory.
+        """
+        self.trace_limit = trace_limit
+        self.listeners = {}  # listener name as key, dictionary of count, total, slowest, and events as value
+        self.trace_events = []
+        self.start_time = time.perf_counter_ns()
+        self.process_id = os.getpid()
+
+    def _addTraceEvent(self, name, category, start, end, args=None):
+        """
+        Adds a complete ("X") Chrome trace event.
+
+        Args:
+            name (string): Name to show on the event.
+
+            category (string): Category of the event, such as "event", "listener", or "deferred".
+
+            start (int): Time the event started at in nanoseconds, from time.perf_counter_ns.
+
+            end (int): Time the event ended at in nanoseconds, from time.perf_counter_ns.
+
+            args (dictionary): Extra data to show with the event.
+        """
+        if len(self.trace_events) >= self.trace_limit:
+            return
+
+        self.trace_events.append({'name': name, 'cat': category, 'ph': 'X', 'pid': self.process_id,
+                                  'tid': threading.get_ident(), 'ts': (start - self.start_time) / 1000,
+                                  'dur': (end - start) / 1000, 'args': args or {}})
+
+    def recordEvent(self, event_name, start, end):
+        """
+        Records the time all the listeners of the given event took to be called.
+
+        Args:
+            event_name (string): Name of event called.
+
+            start (int): Time the call started at in nanoseconds, from time.perf_counter_ns.
+
+            end (int): Time the call ended at in nanoseconds, from time.perf_counter_ns.
+        """
+        self._addTraceEvent(event_name, 'event', start, end)
+
+    def recordListener(self, listener_name, event_name, start, end, deferred=False):
+        """
+        Records the time the given listener took to be called by the given event.
+
+        Args:
+            listener_name (string): Name of the listener's method.
+
+            event_name (string): Name of event that called the listener.
+
+            start (int): Time the listener was called at in nanoseconds, from time.perf_counter_ns.
+
+            end (int): Time the listener returned at in nanoseconds, from time.perf_counter_ns.
+
+            deferred (boolean): Whether listener was called once the app was idle.
+        """
+        seconds = (end - start) / 1e9
+        stats = self.listeners.setdefault(listener_name, {'count': 0, 'total': 0.0, 'slowest': 0.0, 'events': []})
+        stats['count'] += 1
+        stats['total'] += seconds
+        stats['slowest'] = max(stats['slowest'], seconds)
+
+        if event_name not in stats['events']:
+            stats['events'].append(event_name)
+
+        category = 'deferred' if deferred else 'listener'
+        self._addTraceEvent(listener_name, category, start, end, {'event': event_name})
+
+    def getStats(self):
+        """
+        Gets the timing of every listener called while profiling.
+
+        Returns:
+            (list): Dictionaries with listener name, call count, total, average, and slowest time in seconds, and the
+            events that called the listener. Ordered from most to least total time.
+        """
+        stats = [dict(stats, listener=name, average=stats['total'] / stats['count'])
+                 for name, stats in self.listeners.items()]
+        return sorted(stats, key=lambda listener_stats: listener_stats['total'], reverse=True)
+
+    def getSlowest(self, count=10):
+        """
+        Gets the listeners that took the most total time.
+
+        Args:
+            count (int): How many listeners to get.
+
+        Returns:
+            (list): Dictionaries of listener stats. See getStats.
+        """
+        return self.getStats()[:count]
+
+    def writeTrace(self, path=None):
+        """
+        Writes all the recorded events as a Chrome trace .json file.
+
+        Args:
+            path (string): Path to write trace to. If None, will write in piper's settings traces directory.
+
+        Returns:
+            (string): Path the trace was written to.
+        """
+        if not path:
+            directory = os.path.join(piper.core.getPiperDirectory(), 'settings', pcfg.events_trace_directory_name)
+            path = os.path.join(directory, time.strftime('events_%Y%m%d_%H%M%S.json')).replace('\\', '/')
+
+        python.writeJson(path, {'traceEvents': self.trace_events, 'displayTimeUnit': 'ms',
+                                'otherData': {'listeners': self.getStats()}}, indent=None)
+        return path
+
 
 class _Dispatcher(object):
     # used to keep track of Manager in order to make it a singleton.
@@ -7,46 +192,202 @@ class _Dispatcher(object):
 
     def __init__(self, *args, **kwargs):
         """
-        Handles event callbacks throughout piper functions.
+        Handles event callbacks throughout piper functions. Events can carry a payload of args and kwargs, listeners
+        are called in order of priority, and deferred listeners run once the app is idle, with duplicate calls that
+        are still pending coalesced into one.
         """
         super(_Dispatcher, self).__init__(*args, **kwargs)
-        self.events = {}
+        self.events = {}  # event name as key, list of listeners sorted by priority as value
+        self.pending = OrderedDict()  # coalescing key as key, tuple of listener, args, kwargs, and event as value
+        self.scheduler = None  # function that calls the given function once the app is idle, such as a Qt timer
+        self.is_process_scheduled = False
+        self.profiler = None  # when set, records how long each listener takes
+
+    def startProfiling(self, profiler=None):
+        """
+        Starts recording how long each listener takes every time it is called.
+
+        Args:
+            profiler (Profiler): Profiler to record with. If None given, will start a new one.
+
+        Returns:
+            (Profiler): Profiler recording the listeners.
+        """
+        self.profiler = profiler if profiler else Profiler()
+        return self.profiler
 
-    def listen(self, event_name, method):
+    def stopProfiling(self):
+        """
+        Stops recording how long each listener takes.
+
+        Returns:
+            (Profiler or None): Profiler that was recording, if any.
+        """
+        profiler = self.profiler
+        self.profiler = None
+        return profiler
+
+    def _invoke(self, listener, method, event_name, args, kwargs):
+        """
+        Calls the given listener's method with the given payload, timing it if profiling.
+
+        Args:
+            listener (_Listener): Listener being called.
+
+            method (Callable): Method of listener to call.
+
+            event_name (string): Name of event calling the listener.
+
+            args (tuple): Arguments to call method with.
+
+            kwargs (dictionary): Keyword arguments to call method with.
+        """
+        profiler = self.profiler
+        if not profiler:
+            method(*args, **kwargs)
+            return
+
+        start = time.perf_counter_ns()
+        try:
+            method(*args, **kwargs)
+        finally:
+            profiler.recordListener(listener.name, event_name, start, time.perf_counter_ns(), listener.deferred)
+
+    def setScheduler(self, scheduler):
+        """
+        Sets the function used to process deferred listeners once the app is idle. If no scheduler is set, deferred
+        listeners are called right after all the other listeners of the event.
+
+        Args:
+            scheduler (Callable or None): Function that takes a function and calls it later, on the main thread.
+        """
+        self.scheduler = scheduler
+
+    def listen(self, event_name, method, priority=0, deferred=False, weak=True):
         """
         Makes the given method a callback method since it will be called everytime the given event_name is updated.
         As long as the responsible party adds the call method correctly.
 
-        NOTE: Listener must remove/pop listen method on unregister by using manager.unlisten()!
+        NOTE: Bound methods stop listening when their object is garbage collected, but widgets that stay alive when
+        closed should still remove their listen methods on close by using dispatcher.unlisten()!
 
         Args:
             event_name (string): Event name that will be called.
 
             method (Callable): Function that will be called when event_name is called.
+
+            priority (int): Listeners with higher priority are called first. Same priority keeps the listening order.
+
+            deferred (boolean): If True, method is called once the app is idle instead of during the event call.
+            Useful for heavy listeners, such as reloading widgets, so that the action that called the event finishes.
+
+            weak (boolean): If True and method is a bound method, only a weak reference to it is kept.
         """
         listeners = self.events.setdefault(event_name, [])
-        listeners.append(method)
+        listeners.append(_Listener(method, priority=priority, deferred=deferred, weak=weak))
+
+        # sort is stable, so listeners with the same priority keep the order they started listening in
+        listeners.sort(key=lambda listener: -listener.priority)
 
     def unlisten(self, event_name, method):
         """
-        Removes the given method from listening for the given event_name.
+        Removes the given method from listening for the given event_name. Pending deferred calls to it are dropped.
 
         Args:
             event_name (string): Name of event that would call given method.
 
             method (Callable): Function to remove from listening of given event_name.
         """
-        self.events[event_name].remove(method)
+        listeners = self.events.get(event_name, [])
+        removed = [listener for listener in listeners if listener.isDead() or listener.get() == method]
+        self.events[event_name] = [listener for listener in listeners if listener not in removed]
+        self.pending = OrderedDict([(key, value) for key, value in self.pending.items() if value[0] not in removed])
 
-    def call(self, event_name):
+    def call(self, event_name, *args, **kwargs):
         """
-        Calls all the listeners of the given event_name.
+        Calls all the listeners of the given event_name with the given args and kwargs as payload.
+        Deferred listeners are queued to be called once the app is idle instead.
 
         Args:
             event_name (string): Name of event that holds listeners.
         """
         listeners = self.events.setdefault(event_name, [])
-        [callback() for callback in listeners]
+        profiler = self.profiler
+        start = time.perf_counter_ns() if profiler else 0
+
+        # removing listeners of objects that were garbage collected
+        if any([listener.isDead() for listener in listeners]):
+            listeners[:] = [listener for listener in listeners if not listener.isDead()]
+
+        # copying list since listeners may listen or unlisten while being called
+        for listener in list(listeners):
+            if listener.deferred:
+                self.defer(event_name, listener, args, kwargs)
+                continue
+
+            method = listener.get()
+            if method:
+                self._invoke(listener, method, event_name, args, kwargs)
+
+        if profiler:
+            profiler.recordEvent(event_name, start, time.perf_counter_ns())
+
+        if self.pending and not self.is_process_scheduled:
+            self.scheduleProcess()
+
+    def defer(self, event_name, listener, args, kwargs):
+        """
+        Queues the given listener to be called with the given payload. If the same listener is already queued with the
+        same payload, the call is coalesced into the one already queued.
+
+        Args:
+            event_name (string): Name of event that is calling the listener.
+
+            listener (_Listener): Listener to call later.
+
+            args (tuple): Arguments to call listener with.
+
+            kwargs (dictionary): Keyword arguments to call listener with.
+        """
+        try:
+            key = (listener, args, frozenset(kwargs.items()))
+            hash(key)
+        except TypeError:
+            # payloads that can't be hashed can't be compared, so they are never coalesced
+            key = (listener, object())
+
+        self.pending.pop(key, None)
+        self.pending[key] = (listener, args, kwargs, event_name)
+
+    def scheduleProcess(self):
+        """
+        Processes the pending deferred listeners once the app is idle, or right away if there is no scheduler.
+        """
+        if not self.scheduler:
+            self.process()
+            return
+
+        self.is_process_scheduled = True
+        self.scheduler(self.process)
+
+    def process(self):
+        """
+        Calls all the pending deferred listeners, in the order they were last queued. A deferred listener failing does
+        not stop the rest from being called.
+        """
+        self.is_process_scheduled = False
+
+        while self.pending:
+            _, (listener, args, kwargs, event_name) = self.pending.popitem(last=False)
+            method = listener.get()
+
+            if not method:
+                continue
+
+            try:
+                self._invoke(listener, method, event_name, args, kwargs)
+            except Exception:
+                traceback.print_exc()
 
 
 def getDispatcher():
@@ -0,0 +1,324 @@
+#  Copyright (c) Christian Corsica. All Rights Reserved.
+
+import os
+import json
+import hashlib
+import functools
+import contextlib
+
+import piper.core
+import piper.config as pcfg
+import piper.core.pythoner as python
+
+
+def hashFile(path, chunk_size=pcfg.export_cache_chunk_size):
+    """
+    Hashes the bytes of the given file without reading the whole file into memory at once.
+
+    Args:
+        path (string): Path to file to hash.
+
+        chunk_size (int): Amount of bytes to read at a time.
+
+    Returns:
+        (string): Hex digest of the file.
+    """
+    hasher = hashlib.sha1()
+    with open(path, 'rb') as open_file:
+        for chunk in iter(lambda: open_file.read(chunk_size), b''):
+            hasher.update(chunk)
+
+    return hasher.hexdigest()
+
+
+def hashData(*data):
+    """
+    Hashes the given JSON serializable data, such as settings or node names.
+
+    Args:
+        data (Any): Data to hash.
+
+    Returns:
+        (string): Hex digest of the data.
+    """
+    return hashlib.sha1(json.dumps(data, sort_keys=True, default=str).encode()).hexdigest()
+
+
+class ExportCache(object):
+    """
+    Remembers, for every exported file, the hash of everything that went into the export and the hash of what was
+    written, so that exports whose inputs did not change can be skipped, and exports that wrote the same content as
+    before don't need to be checked out. Many processes can export at the same time, each one only writes the entries
+    it changed on top of what is on disk.
+
+    Example:
+        inputs_hash = hashData(source_hash, settings, piper_node_data)
+        if export_cache.isCurrent(export_path, inputs_hash):
+            return export_path  # skip export
+
+        previous_hash = export_cache.getContentHash(export_path)
+        write(export_path)
+        content_hash = hashFile(export_path)
+        export_cache.set(export_path, inputs_hash, content_hash, scene_path)
+        export_cache.save()  # writes to disk now, or once the batch of exports it is in ends
+        changed = content_hash != previous_hash
+    """
+    def __init__(self, path=None, limit=pcfg.export_cache_limit):
+        """
+        Args:
+            path (string): Path to .json file the cache is stored in. If None, uses piper's settings directory.
+
+            limit (int): Most entries kept, least recently exported are dropped first.
+        """
+        self._path = path
+        self.limit = limit
+        self._entries = None  # normalized export path as key, dictionary with hashes, size, mtime, and source as value
+        self._changed = {}  # entries set since last written
+        self._disk_time = None
+        self._batch_depth = 0  # amount of batches running, cache is only written once the outermost one ends
+
+    def getPath(self):
+        """
+        Gets the path to the .json file the cache is stored in.
+
+        Returns:
+            (string): Full path to cache file.
+        """
+        if not self._path:
+            self._path = os.path.join(piper.core.getPiperDirectory(), 'settings',
+                                      pcfg.export_cache_name + '.json').replace('\\', '/')
+
+        return self._path
+
+    @staticmethod
+    def normalize(path):
+        """
+        Normalizes the given path so that the same file always gets the same entry.
+
+        Args:
+            path (string): Path to normalize.
+
+        Returns:
+            (string): Lower case path with forward slashes.
+        """
+        return os.path.normcase(os.path.abspath(path)).replace('\\', '/')
+
+    @staticmethod
+    def getStat(path):
+        """
+        Gets the size and modified time of the given file.
+
+        Args:
+            path (string): Path of file.
+
+        Returns:
+            (tuple or None): Size and modified time in nanoseconds. None if file does not exist.
+        """
+        try:
+            stats = os.stat(path)
+        except OSError:
+            return None
+
+        return stats.st_size, stats.st_mtime_ns
+
+    def _getDiskTime(self):
+        """
+        Gets the modified time of the cache file.
+
+        Returns:
+            (int or None): Modified time in nanoseconds, None if file does not exist.
+        """
+        stats = self.getStat(self.getPath())
+        return stats[1] if stats else None
+
+    def load(self):
+        """
+        Reads the cache file if it has not been read yet. Discards it if it was written by a different cache version.
+
+        Returns:
+            (dictionary): Normalized export path as key, dictionary with hashes, size, mtime, and source as value.
+        """
+        if self._entries is not None:
+            return self._entries
+
+        self._disk_time = self._getDiskTime()
+        self._entries = {}
+
+        if self._disk_time:
+            try:
+                data = python.readJson(self.getPath())
+            except ValueError:
+                data = {}
+
+            if data.get('version') == pcfg.export_cache_version:
+                self._entries = data['entries']
+
+        for key, entry in self._changed.items():
+            self._entries.pop(key, None)
+            self._entries[key] = entry
+
+        return self._entries
+
+    def get(self, export_path):
+        """
+        Gets the entry of the given export path if the file on disk is still the one that was exported.
+
+        Args:
+            export_path (string): Path of exported file.
+
+        Returns:
+            (dictionary or None): Entry with inputs and content hash. None if there is no entry or file changed.
+        """
+        entry = self.load().get(self.normalize(export_path))
+        stats = self.getStat(export_path)
+
+        if not entry or not stats or [entry['size'], entry['mtime']] != list(stats):
+            return None
+
+        return entry
+
+    def isCurrent(self, export_path, inputs_hash):
+        """
+        Gets whether the given export path was exported with the given inputs and has not changed since.
+
+        Args:
+            export_path (string): Path of exported file.
+
+            inputs_hash (string): Hash of everything that goes into the export.
+
+        Returns:
+            (boolean): True if exporting again would write the same file.
+        """
+        entry = self.get(export_path)
+        return bool(entry and inputs_hash and entry['inputs'] == inputs_hash)
+
+    def getContentHash(self, export_path, hasher=hashFile):
+        """
+        Gets the content hash of the given export path, re-using the stored hash if the file has not changed.
+
+        Args:
+            export_path (string): Path of exported file.
+
+            hasher (method): Function that takes a path and returns the hash of its content.
+
+        Returns:
+            (string or None): Content hash of file. None if file does not exist.
+        """
+        if not os.path.exists(export_path):
+            return None
+
+        entry = self.get(export_path)
+        return entry['content'] if entry else hasher(export_path)
+
+    def getExports(self, source_paths):
+        """
+        Gets the files each of the given source files exported last time, so they can be made writable before exporting.
+
+        Args:
+            source_paths (list): Paths of source files, such as scenes.
+
+        Returns:
+            (dictionary): Normalized source path as key, list of normalized paths of files it exported as value.
+        """
+        exports = {self.normalize(source_path): [] for source_path in source_paths}
+        for key, entry in self.load().items():
+            source = entry.get('source')
+
+            if source in exports:
+                exports[source].append(key)
+
+        return exports
+
+    def set(self, export_path, inputs_hash, content_hash, source_path=None):
+        """
+        Stores the hashes of the given export path along with its current size and modified time.
+
+        Args:
+            export_path (string): Path of exported file.
+
+            inputs_hash (string or None): Hash of everything that went into the export. None if not known.
+
+            content_hash (string): Hash of what was written.
+
+            source_path (string): Path of the file exported from, such as the scene. None if not known.
+        """
+        size, mtime = self.getStat(export_path)
+        key = self.normalize(export_path)
+        source = self.normalize(source_path) if source_path else None
+        entry = {'inputs': inputs_hash, 'content': content_hash, 'size': size, 'mtime': mtime, 'source': source}
+        entries = self.load()
+        entries.pop(key, None)
+        entries[key] = entry
+        self._changed[key] = entry
+
+    def write(self):
+        """
+        Writes the entries set since the last write on top of what is on disk, dropping the oldest entries if the
+        cache is over its limit.
+
+        Returns:
+            (boolean): True if cache file was written.
+        """
+        if not self._changed:
+            return False
+
+        # another process may have written its own exports since this one read the file
+        if self._getDiskTime() != self._disk_time:
+            self._entries = None
+
+        entries = self.load()
+        for key in list(entries)[:max(0, len(entries) - self.limit)]:
+            entries.pop(key)
+
+        data = {'version': pcfg.export_cache_version, 'entries': entries}
+        python.writeJson(self.getPath(), data, indent=None, atomic=True)
+        self._disk_time = self._getDiskTime()
+        self._changed = {}
+        return True
+
+    def save(self):
+        """
+        Writes the cache unless a batch is running, in which case the cache is written once the batch ends.
+
+        Returns:
+            (boolean): True if cache file was written.
+        """
+        return False if self._batch_depth else self.write()
+
+    @contextlib.contextmanager
+    def batch(self):
+        """
+        Saves the cache once when the outermost batch ends, even if exporting failed, instead of re-writing the whole
+        file after every export in the batch. Batches can be nested.
+        """
+        self._batch_depth += 1
+
+        try:
+            yield self
+        finally:
+            self._batch_depth -= 1
+
+            # failing to write the cache should not hide why the batch failed, exports are only redone next time
+            if not self._batch_depth:
+                try:
+                    self.write()
+                except OSError as error:
+                    print(f'Could not write export cache! {error}')
+
+
+export_cache = ExportCache()
+
+
+def batched(method):
+    """
+    Decorator that runs the decorated method in a batch of the export cache, so it is written once the method ends.
+
+    Args:
+        method (method): Method that exports many files.
+    """
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        with export_cache.batch():
+            return method(*args, **kwargs)
+
+    return wrapper
@@ -0,0 +1,210 @@
+#  Copyright (c) Christian Corsica. All Rights Reserved.
+
+import os
+import csv
+import time
+import functools
+import contextlib
+
+import piper.core
+import piper.config as pcfg
+import piper.core.pythoner as python
+
+
+class ExportProfiler(object):
+    """
+    Records how long each phase of an export takes, such as baking, writing the file, cleaning it up, copying textures,
+    and staging files in Perforce. Every export session writes a JSON and a CSV report, and prints a summary table,
+    so that exports of the same scene can be compared over time to find what got slower.
+
+    Example:
+        with export_profiler.session('piperNodes'):
+            with export_profiler.phase('bake', 'A_Walk'):
+                cmds.bakeResults(...)
+
+        # prints a table of phases, writes settings/profiles/piperNodes_20240101_120000.json and .csv
+    """
+    def __init__(self, enabled=True, limit=pcfg.export_profile_limit):
+        """
+        Args:
+            enabled (boolean): If False, phases are not recorded and no reports are written.
+
+            limit (int): Most reports kept in the profiles directory, oldest are deleted first.
+        """
+        self.enabled = enabled
+        self.limit = limit
+        self.name = None  # name of the session being recorded, None if no session is recording
+        self.phases = []  # dictionaries with phase path, label, start, and duration in seconds, in the order they ended
+        self.start_time = 0.0
+        self.end_time = 0.0
+        self._stack = []  # names of the phases currently running, outermost first
+
+    def isRecording(self):
+        """
+        Gets whether a session is being recorded.
+
+        Returns:
+            (boolean): True if phases are being recorded.
+        """
+        return self.name is not None
+
+    @contextlib.contextmanager
+    def session(self, name, directory=None):
+        """
+        Records every phase run inside this context. Sessions started inside another session are part of the outer one,
+        so that exporting all piper nodes writes one report instead of one for meshes and one for animations.
+
+        Args:
+            name (string): Name of session, used to name the report.
+
+            directory (string): Directory to write reports in. If None, will write in piper's settings directory.
+        """
+        if not self.enabled or self.isRecording():
+            yield self
+            return
+
+        self.name = name
+        self.phases = []
+        self._stack = []
+        self.start_time = time.perf_counter()
+
+        try:
+            yield self
+        finally:
+            self.end_time = time.perf_counter()
+            print(self.getTable())
+
+            # failing to write timings should never fail the export they timed
+            try:
+                self.writeReport(directory)
+            except OSError as error:
+                print(f'Could not write export profile report! {error}')
+
+            self.name = None
+
+    @contextlib.contextmanager
+    def phase(self, name, label=''):
+        """
+        Records how long it takes to run the code inside this context. Phases can be nested, each phase is recorded with
+        the names of the phases it runs in, such as "animation/bake".
+
+        Args:
+            name (string): Name of phase, such as "bake" or "fbx_write".
+
+            label (string): What the phase ran on, such as the path exported or the piper node's name.
+        """
+        if not self.isRecording():
+            yield
+            return
+
+        self._stack.append(name)
+        path = '/'.join(self._stack)
+        start = time.perf_counter()
+
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            self._stack.pop()
+            self.phases.append({'phase': path, 'label': str(label), 'start': start - self.start_time,
+                                'duration': end - start})
+
+    def getSummary(self):
+        """
+        Gets the timing of every phase recorded, added up by phase.
+
+        Returns:
+            (list): Dictionaries with phase, count, total, average, and slowest time in seconds. Ordered by the time each
+            phase first started.
+        """
+        summary = {}
+        for phase in sorted(self.phases, key=lambda recorded: recorded['start']):
+            stats = summary.setdefault(phase['phase'], {'phase': phase['phase'], 'count': 0, 'total': 0.0,
+                                                        'slowest': 0.0})
+            stats['count'] += 1
+            stats['total'] += phase['duration']
+            stats['slowest'] = max(stats['slowest'], phase['duration'])
+
+        return [dict(stats, average=stats['total'] / stats['count']) for stats in summary.values()]
+
+    def getTable(self):
+        """
+        Gets the summary as a table of text, with nested phases indented under the phases they run in.
+
+        Returns:
+            (string): Summary table.
+        """
+        total = self.end_time - self.start_time
+        width = max([len(stats['phase']) + 2 for stats in self.getSummary()] + [len('Phase')])
+        lines = [f'{self.name} took {round(total, 3)} seconds ' + '=' * 40,
+                 f'{"Phase":<{width}} {"Count":>6} {"Total":>10} {"Average":>10} {"Slowest":>10} {"Percent":>8}']
+
+        for stats in self.getSummary():
+            depth = stats['phase'].count('/')
+            name = '  ' * depth + stats['phase'].rpartition('/')[2]
+            percent = stats['total'] / total * 100 if total else 0.0
+            lines.append(f'{name:<{width}} {stats["count"]:>6} {stats["total"]:>10.3f} {stats["average"]:>10.3f} '
+                         f'{stats["slowest"]:>10.3f} {percent:>7.1f}%')
+
+        return '\n'.join(lines)
+
+    def writeReport(self, directory=None):
+        """
+        Writes the session as a JSON report with the summary and every phase recorded, and as a CSV with a row per
+        phase. Deletes the oldest reports if there are more than the limit.
+
+        Args:
+            directory (string): Directory to write reports in. If None, will write in piper's settings directory.
+
+        Returns:
+            (string): Path to the JSON report written.
+        """
+        if not directory:
+            directory = os.path.join(piper.core.getPiperDirectory(), 'settings', pcfg.export_profile_directory_name)
+
+        directory = directory.replace('\\', '/')
+        name = f'{self.name}_{time.strftime("%Y%m%d_%H%M%S")}'
+        json_path = f'{directory}/{name}.json'
+        csv_path = f'{directory}/{name}.csv'
+
+        python.writeJson(json_path, {'session': self.name,
+                                     'date': time.strftime('%Y-%m-%d %H:%M:%S'),
+                                     'total': self.end_time - self.start_time,
+                                     'summary': self.getSummary(),
+                                     'phases': self.phases})
+
+        with open(csv_path, 'w', newline='') as open_file:
+            writer = csv.DictWriter(open_file, fieldnames=['phase', 'label', 'start', 'duration'])
+            writer.writeheader()
+            writer.writerows(self.phases)
+
+        reports = sorted((os.path.join(directory, report) for report in os.listdir(directory)
+                          if report.endswith('.json')), key=os.path.getmtime)
+        for report in reports[:max(0, len(reports) - self.limit)]:
+            [os.remove(path) for path in (report, report[:-len('.json')] + '.csv') if os.path.exists(path)]
+
+        return json_path
+
+
+export_profiler = ExportProfiler()
+
+
+def profile(name, session=False):
+    """
+    Decorator that records the decorated method as a phase with the given name.
+
+    Args:
+        name (string): Name of phase.
+
+        session (boolean): If True, also records the method as its own session when no session is being recorded.
+    """
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(*args, **kwargs):
+            context = export_profiler.session(name) if session else contextlib.nullcontext()
+            with context, export_profiler.phase(name):
+                return method(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,1298 @@
+#  Copyright (c) Christian Corsica. All Rights Reserved.
+
+import os
+import re
+import sys
+import mmap
+import zlib
+import array
+import bisect
+import shutil
+import struct
+import hashlib
+import concurrent.futures
+from functools import partial
+
+import piper.config as pcfg
+
+
+binary_magic = b'Kaydara FBX Binary  \x00'
+binary_header_size = 27  # magic, two unknown bytes, and version as uint32
+binary_name_separator = '\x00\x01'  # binary files store "Class::Name" as "Name\x00\x01Class"
+ascii_name_separator = '::'
+large_header_version = 7500  # starting with this version, record headers use 64-bit offsets
+ticks_per_second = 46186158000  # FBX stores time as this many ticks per second
+array_compress_size = 128  # arrays written with more bytes than this are zlib compressed
+
+record_headers = {False: struct.Struct('<IIIB'), True: struct.Struct('<QQQB')}  # key is whether version is large
+array_header = struct.Struct('<III')  # length, encoding, compressed length
+length_header = struct.Struct('<I')
+scalar_types = {'Y': struct.Struct('<h'),
+                'C': struct.Struct('<?'),
+                'I': struct.Struct('<i'),
+                'F': struct.Struct('<f'),
+                'D': struct.Struct('<d'),
+                'L': struct.Struct('<q')}
+array_types = {'f': 'f', 'd': 'd', 'l': 'q', 'i': 'i', 'b': 'b'}  # FBX array type as key, array module type as value
+volatile_records = ('FBXHeaderExtension', 'FileId', 'CreationTime', 'Creator')  # change every time a file is saved
+ascii_volatile = re.compile(r'^(?:FBXHeaderExtension:.*?^\}|(?:FileId|CreationTime|Creator):.*?$|;.*?$)',
+                            flags=re.MULTILINE | re.DOTALL)
+ascii_token = re.compile(r'\s*(?:;[^\n]*|(?P<key>[A-Za-z_][\w|]*)\s*:|(?P<string>"[^"]*")|(?P<array>\*\d+)'
+                         r'|(?P<open>\{)|(?P<close>\})|(?P<comma>,)|(?P<value>[^\s,{}";]+))')
+
+
+class LazyArray(object):
+    """
+    Array property whose values are only decompressed and decoded the first time they are used, so that reading the
+    structure of a file does not pay for the vertices, normals, weights, or keys in it.
+    """
+    def __init__(self, length, decoder):
+        """
+        Args:
+            length (int): Amount of values in the array.
+
+            decoder (Callable): Function that returns the values of the array.
+        """
+        self.length = length
+        self._decoder = decoder
+        self._values = None
+
+    def __len__(self):
+        return self.length
+
+    def __iter__(self):
+        return iter(self.decode())
+
+    def __getitem__(self, index):
+        return self.decode()[index]
+
+    def __repr__(self):
+        return f'LazyArray({self.length})'
+
+    def isDecoded(self):
+        """
+        Gets whether the values have been decoded already.
+
+        Returns:
+            (boolean): True if values are decoded.
+        """
+        return self._values is not None
+
+    def decode(self):
+        """
+        Decodes the values of the array if they have not been decoded yet.
+
+        Returns:
+            (array.array or list): Values of the array.
+        """
+        if self._values is None:
+            self._values = self._decoder()
+            self._decoder = None
+
+        return self._values
+
+
+def _decodeBinaryArray(type_code, data, encoding):
+    """
+    Decodes the given binary array data.
+
+    Args:
+        type_code (string): FBX type of array, such as "d" for doubles.
+
+        data (memoryview): Bytes of array, zlib compressed if encoding is 1.
+
+        encoding (int): 0 if data is raw, 1 if data is zlib compressed.
+
+    Returns:
+        (array.array): Values of array.
+    """
+    values = array.array(array_types[type_code])
+    values.frombytes(zlib.decompress(data) if encoding else bytes(data))
+
+    # FBX is little-endian
+    if sys.byteorder == 'big':
+        values.byteswap()
+
+    return values
+
+
+def _decodeAsciiArray(text):
+    """
+    Decodes the comma separated values of an ASCII array.
+
+    Args:
+        text (string): Values separated by commas.
+
+    Returns:
+        (list): Values of array.
+    """
+    return [_convertAsciiValue(value.strip()) for value in text.split(',') if value.strip()]
+
+
+def _convertAsciiValue(value):
+    """
+    Converts the given ASCII value to an int or float if it is a number.
+
+    Args:
+        value (string): Value as written in the file.
+
+    Returns:
+        (int, float, or string): Converted value.
+    """
+    try:
+        return int(value)
+    except ValueError:
+        pass
+
+    try:
+        return float(value)
+    except ValueError:
+        return value
+
+
+def convertName(name):
+    """
+    Converts the binary "Name\x00\x01Class" naming to the "Class::Name" naming that ASCII files use.
+
+    Args:
+        name (string): Name as stored in binary file.
+
+    Returns:
+        (string): Name as "Class::Name" if name had a class, else name as given.
+    """
+    if binary_name_separator not in name:
+        return name
+
+    name, _, class_name = name.partition(binary_name_separator)
+    return class_name + ascii_name_separator + name
+
+
+def splitName(name):
+    """
+    Splits the given "Class::Name" into class and name.
+
+    Args:
+        name (string): Name as "Class::Name".
+
+    Returns:
+        (tuple): Class name as first index, name as second index. Class name is empty if name had no class.
+    """
+    class_name, separator, name = name.partition(ascii_name_separator)
+    return (class_name, name) if separator else ('', class_name)
+
+
+class FBXNode(object):
+
+    __slots__ = ('name', 'properties', 'children', 'start', 'end', 'property_start', 'property_end')
+
+    def __init__(self, name, properties=None, children=None, start=0, end=0, property_start=0, property_end=0):
+        """
+        Record of an FBX file, such as "Objects", "Model", or "P". Offsets are only set for binary files.
+
+        Args:
+            name (string): Name of record.
+
+            properties (list): Values of record. Arrays are LazyArray.
+
+            children (list): Nested records.
+
+            start (int): Offset in file where record starts.
+
+            end (int): Offset in file where record ends.
+
+            property_start (int): Offset in file where record's properties start.
+
+            property_end (int): Offset in file where record's properties end, and its nested records start.
+        """
+        self.name = name
+        self.properties = properties if properties is not None else []
+        self.children = children if children is not None else []
+        self.start = start
+        self.end = end
+        self.property_start = property_start
+        self.property_end = property_end
+
+    def __iter__(self):
+        return iter(self.children)
+
+    def __repr__(self):
+        return f'FBXNode({self.name}, {self.properties[:3]}, {len(self.children)} children)'
+
+    @property
+    def value(self):
+        return self.properties[0] if self.properties else None
+
+    def find(self, name):
+        """
+        Finds the first nested record with the given name.
+
+        Args:
+            name (string): Name of record to find.
+
+        Returns:
+            (FBXNode or None): Record found.
+        """
+        return next((child for child in self.children if child.name == name), None)
+
+    def findAll(self, name):
+        """
+        Finds all the nested records with the given name.
+
+        Args:
+            name (string): Name of records to find.
+
+        Returns:
+            (list): Records found.
+        """
+        return [child for child in self.children if child.name == name]
+
+
+class BinaryParser(object):
+
+    def __init__(self, data, version):
+        """
+        Reads records of a binary FBX file.
+
+        Args:
+            data (memoryview or bytes): Contents of file.
+
+            version (int): FBX version of file, such as 7400.
+        """
+        self.data = data
+        self.version = version
+        self.record_header = record_headers[version >= large_header_version]
+
+    def readProperties(self, position, count):
+        """
+        Reads the given amount of properties starting at the given position.
+
+        Args:
+            position (int): Offset to start reading from.
+
+            count (int): Amount of properties to read.
+
+        Returns:
+            (list): Values read, arrays are LazyArray.
+        """
+        data = self.data
+        properties = []
+
+        for _ in range(count):
+            type_code = chr(data[position])
+            position += 1
+            scalar = scalar_types.get(type_code)
+
+            if scalar:
+                properties.append(scalar.unpack_from(data, position)[0])
+                position += scalar.size
+
+            elif type_code in array_types:
+                length, encoding, compressed_length = array_header.unpack_from(data, position)
+                position += array_header.size
+                array_data = data[position:position + compressed_length]
+                properties.append(LazyArray(length, partial(_decodeBinaryArray, type_code, array_data, encoding)))
+                position += compressed_length
+
+            elif type_code in ('S', 'R'):
+                length = length_header.unpack_from(data, position)[0]
+                position += length_header.size
+                raw = bytes(data[position:position + length])
+                properties.append(convertName(raw.decode('utf-8', errors='replace')) if type_code == 'S' else raw)
+                position += length
+
+            else:
+                raise ValueError(f'Unknown FBX property type "{type_code}" at offset {position - 1}!')
+
+        return properties
+
+    def readHeader(self, position):
+        """
+        Reads the header of the record at the given position.
+
+        Args:
+            position (int): Offset where record starts.
+
+        Returns:
+            (tuple): End offset, property count, property list length, and name. End offset is 0 for null records.
+        """
+        end, count, list_length, name_length = self.record_header.unpack_from(self.data, position)
+        name_start = position + self.record_header.size
+        name = bytes(self.data[name_start:name_start + name_length]).decode('utf-8', errors='replace')
+        return end, count, list_length, name
+
+    def readNode(self, position):
+        """
+        Reads the record at the given position, and all its nested records.
+
+        Args:
+            position (int): Offset where record starts.
+
+        Returns:
+            (tuple): FBXNode read, or None if record is a null record, as first index. Offset after record as second.
+        """
+        end, count, list_length, name = self.readHeader(position)
+
+        if end == 0:
+            return None, position + self.record_header.size
+
+        property_start = position + self.record_header.size + len(name.encode())
+        property_end = property_start + list_length
+        properties = self.readProperties(property_start, count)
+        children = []
+        child_position = property_end
+
+        while child_position < end:
+            child, child_position = self.readNode(child_position)
+
+            if child is None:
+                break
+
+            children.append(child)
+
+        return FBXNode(name, properties, children, position, end, property_start, property_end), end
+
+    def iterTopNodes(self, names=None):
+        """
+        Reads the top level records one at a time. Records whose name is not in the given names are skipped without
+        reading them.
+
+        Args:
+            names (Iterable): Names of top level records to read. If None, will read all of them.
+
+        Returns:
+            (generator): Top level FBXNode records.
+        """
+        position = binary_header_size
+        size = len(self.data)
+
+        while position + self.record_header.size <= size:
+            end, _, _, name = self.readHeader(position)
+
+            if end == 0:
+                return
+
+            if names is None or name in names:
+                yield self.readNode(position)[0]
+
+            position = end
+
+
+class AsciiParser(object):
+
+    def __init__(self, text):
+        """
+        Reads records of an ASCII FBX file.
+
+        Args:
+            text (string): Contents of file.
+        """
+        self.text = text
+
+    def parse(self):
+        """
+        Reads all the records in the file.
+
+        Returns:
+            (list): Top level FBXNode records.
+        """
+        text = self.text
+        root = FBXNode('')
+        stack = [root]
+        current = None
+        position = 0
+        size = len(text)
+
+        while position < size:
+            match = ascii_token.match(text, position)
+
+            if not match or match.end() == position:
+                break
+
+            position = match.end()
+            kind = match.lastgroup
+
+            if kind == 'key':
+                current = FBXNode(match.group('key'))
+                stack[-1].children.append(current)
+
+            elif kind == 'string':
+                current.properties.append(convertName(match.group('string')[1:-1].replace('&quot;', '"')))
+
+            elif kind == 'value':
+                current.properties.append(_convertAsciiValue(match.group('value')))
+
+            elif kind == 'array':
+                # arrays look like "*3 { a: 1,2,3 }", values are only split once they are used
+                length = int(match.group('array')[1:])
+                values_start = text.index(':', text.index('{', position)) + 1
+                values_end = text.index('}', values_start)
+                current.properties.append(LazyArray(length, partial(_decodeAsciiArray, text[values_start:values_end])))
+                position = values_end + 1
+
+            elif kind == 'open':
+                stack.append(current)
+                current = None
+
+            elif kind == 'close':
+                stack.pop()
+                current = None
+
+        return root.children
+
+
+class FBXFile(object):
+    """
+    Reads binary and ASCII FBX files without the FBX SDK, useful on machines without the SDK or in DCCs that don't have
+    it. Binary files are memory mapped instead of read, top level records are only read when asked for, and array
+    properties are only decompressed when their values are used.
+
+    Example:
+        with FBXFile('C:/game/Meshes/SM_Chair.fbx') as fbx_file:
+            fbx_file.getNodeByName('SM_Chair')  # FBXNode(Model, [1234, 'Model::SM_Chair', 'Mesh'], 3 children)
+            fbx_file.getExportAttributes()  # {'SM_Chair': {'relative_source': 'Props/Chair.ma', ...}}
+    """
+    def __init__(self, path):
+        """
+        Args:
+            path (string): Path to FBX file to read.
+        """
+        self.path = path
+        self.version = None
+        self.is_binary = False
+        self.data = None
+        self._file = None
+        self._map = None
+        self._parser = None
+        self._top_nodes = {}  # name as key, list of top level records read as value
+        self._is_fully_read = False
+        self.open()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+    def open(self):
+        """
+        Opens the file, memory mapping it if it is binary.
+        """
+        self._file = open(self.path, 'rb')
+        start = self._file.read(binary_header_size)
+
+        if start[:len(binary_magic)] == binary_magic:
+            self.is_binary = True
+            self.version = length_header.unpack_from(start, len(binary_magic) + 2)[0]
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            self.data = memoryview(self._map)
+            self._parser = BinaryParser(self.data, self.version)
+            return
+
+        self._file.seek(0)
+        self.data = self._file.read().decode('utf-8', errors='replace')
+        self._file.close()
+        self._file = None
+        self._parser = AsciiParser(self.data)
+        version = re.search(r'FBXVersion:\s*(\d+)', self.data)
+        self.version = int(version.group(1)) if version else None
+
+    def close(self):
+        """
+        Closes the file. Arrays that have not been decoded can't be decoded once the file is closed.
+        """
+        self._top_nodes = {}
+        self._is_fully_read = False
+
+        if self._map is not None:
+            try:
+                self.data.release()
+                self._map.close()
+            except BufferError:
+                # undecoded arrays still point to the map, which closes once they are garbage collected
+                pass
+
+            self._map = None
+
+        if self._file:
+            self._file.close()
+            self._file = None
+
+        self.data = None
+
+    def readAll(self):
+        """
+        Reads all the top level records of the file.
+
+        Returns:
+            (dictionary): Name as key, list of top level records with that name as value.
+        """
+        if self._is_fully_read:
+            return self._top_nodes
+
+        nodes = self._parser.iterTopNodes() if self.is_binary else self._parser.parse()
+        self._top_nodes = {}
+        [self._top_nodes.setdefault(node.name, []).append(node) for node in nodes]
+        self._is_fully_read = True
+        return self._top_nodes
+
+    def getTopNode(self, name):
+        """
+        Gets the top level record with the given name, such as "Objects" or "Connections". Binary files only read the
+        record asked for, skipping over all the others.
+
+        Args:
+            name (string): Name of top level record.
+
+        Returns:
+            (FBXNode or None): Top level record found.
+        """
+        if name not in self._top_nodes and not self._is_fully_read:
+
+            if not self.is_binary:
+                self.readAll()
+            else:
+                self._top_nodes[name] = list(self._parser.iterTopNodes([name]))
+
+        nodes = self._top_nodes.get(name)
+        return nodes[0] if nodes else None
+
+    def getObjects(self):
+        """
+        Gets all the objects in the file, such as models, geometry, materials, and deformers.
+
+        Returns:
+            (list): FBXNode objects.
+        """
+        objects = self.getTopNode('Objects')
+        return objects.children if objects else []
+
+    def getObjectsByID(self):
+        """
+        Gets all the objects in the file by their unique ID.
+
+        Returns:
+            (dictionary): ID as key, FBXNode object as value.
+        """
+        return {node.value: node for node in self.getObjects() if node.properties}
+
+    def getConnections(self):
+        """
+        Gets all the connections between objects.
+
+        Returns:
+            (list): Tuples of connection type ("OO" or "OP"), child ID, parent ID, and property name if any.
+        """
+        connections = self.getTopNode('Connections')
+        if not connections:
+            return []
+
+        return [(node.properties[0], node.properties[1], node.properties[2],
+                 node.properties[3] if len(node.properties) > 3 else None) for node in connections.findAll('C')]
+
+    @staticmethod
+    def getName(node):
+        """
+        Gets the name of the given object without its class, such as "SM_Chair" for "Model::SM_Chair".
+
+        Args:
+            node (FBXNode): Object to get name of.
+
+        Returns:
+            (string): Name of object.
+        """
+        return splitName(node.properties[1])[1] if len(node.properties) > 1 else ''
+
+    def getNodesByName(self, name, class_name=None):
+        """
+        Gets all the objects with the given name.
+
+        Args:
+            name (string): Name of object without its class.
+
+            class_name (string): If given, will only get objects of this class, such as "Model" or "Geometry".
+
+        Returns:
+            (list): FBXNode objects found.
+        """
+        return [node for node in self.getObjects() if len(node.properties) > 1 and
+                splitName(node.properties[1]) == (class_name or node.name, name)]
+
+    def getNodeByName(self, name, class_name='Model'):
+        """
+        Gets the first object with the given name.
+
+        Args:
+            name (string): Name of object without its class.
+
+            class_name (string): Class of object, such as "Model" or "Geometry".
+
+        Returns:
+            (FBXNode or None): Object found.
+        """
+        nodes = self.getNodesByName(name, class_name)
+        return nodes[0] if nodes else None
+
+    @staticmethod
+    def getProperties(node):
+        """
+        Gets the properties of the given object stored in its "Properties70" record, such as "Lcl Translation" or
+        user defined attributes.
+
+        Args:
+            node (FBXNode): Object to get properties of.
+
+        Returns:
+            (dictionary): Property name as key, value as value. Properties with many values have a list as value.
+        """
+        properties = node.find('Properties70')
+        if not properties:
+            return {}
+
+        values = {}
+        for record in properties.findAll('P'):
+            value = record.properties[4:]
+            values[record.properties[0]] = value[0] if len(value) == 1 else value
+
+        return values
+
+    def getPropertyValue(self, node, name):
+        """
+        Gets the value of the property with the given name of the given object.
+
+        Args:
+            node (FBXNode): Object to get property value of.
+
+            name (string): Name of property.
+
+        Returns:
+            (Any): Value of property, None if object does not have property.
+        """
+        return self.getProperties(node).get(name)
+
+    def getNodesWithProperty(self, name, value=None):
+        """
+        Gets all the objects that have the property with the given name, and given value if given.
+
+        Args:
+            name (string): Name of property objects must have.
+
+            value (Any): If given, property must have this value.
+
+        Returns:
+            (list): FBXNode objects found.
+        """
+        nodes = []
+        for node in self.getObjects():
+            properties = self.getProperties(node)
+
+            if name in properties and (value is None or properties[name] == value):
+                nodes.append(node)
+
+        return nodes
+
+    def getExportAttributes(self):
+        """
+        Gets the piper export attributes written on the exported nodes, such as the DCC and relative source.
+
+        Returns:
+            (dictionary): Name of object as key, dictionary of export attribute name and value as value.
+        """
+        attributes = {}
+        for node in self.getObjects():
+            properties = self.getProperties(node)
+            node_attributes = {name: properties[name] for name in pcfg.export_attributes if name in properties}
+
+            if node_attributes:
+                attributes[self.getName(node)] = node_attributes
+
+        return attributes
+
+
+def encodeProperty(type_code, value):
+    """
+    Encodes the given value as a binary FBX property. Strings are written as given, so object names must already be in
+    the binary "Name\x00\x01Class" form.
+
+    Args:
+        type_code (string): FBX type of property, such as "L" for a 64-bit int or "f" for an array of floats.
+
+        value (Any): Value to encode.
+
+    Returns:
+        (bytes): Type code followed by the encoded value.
+    """
+    scalar = scalar_types.get(type_code)
+    if scalar:
+        return type_code.encode() + scalar.pack(value)
+
+    if type_code in array_types:
+        values = array.array(array_types[type_code], value)
+
+        if sys.byteorder == 'big':
+            values.byteswap()
+
+        data = values.tobytes()
+        encoding = int(len(data) > array_compress_size)
+        data = zlib.compress(data) if encoding else data
+        return type_code.encode() + array_header.pack(len(values), encoding, len(data)) + data
+
+    raw = value if type_code == 'R' else value.encode('utf-8')
+    return type_code.encode() + length_header.pack(len(raw)) + raw
+
+
+def frameToTime(frame, frame_rate):
+    """
+    Converts the given frame to FBX time.
+
+    Args:
+        frame (float): Frame to convert.
+
+        frame_rate (float): Frames per second.
+
+    Returns:
+        (int): Time in FBX ticks.
+    """
+    return int(round(frame * ticks_per_second / frame_rate))
+
+
+def isBinary(path):
+    """
+    Gets whether the given FBX file is binary.
+
+    Args:
+        path (string): Path to FBX file.
+
+    Returns:
+        (boolean): True if file is a binary FBX file, False if it is ASCII.
+    """
+    with open(path, 'rb') as open_file:
+        return open_file.read(len(binary_magic)) == binary_magic
+
+
+def hashContent(path):
+    """
+    Hashes the contents of the given FBX file, leaving out the records that change every time the same scene is saved,
+    such as the creation time, the file ID, and the footer. Two exports of the same scene with the same settings hash
+    the same.
+
+    Args:
+        path (string): Path to FBX file to hash.
+
+    Returns:
+        (string): Hex digest of the contents of the file.
+    """
+    hasher = hashlib.sha1()
+
+    with FBXFile(path) as fbx_file:
+        hasher.update(str(fbx_file.version).encode())
+
+        if not fbx_file.is_binary:
+            hasher.update(ascii_volatile.sub('', fbx_file.data).encode())
+            return hasher.hexdigest()
+
+        parser = fbx_file._parser
+        position = binary_header_size
+
+        while True:
+            end, _, _, name = parser.readHeader(position)
+            if end == 0:
+                break
+
+            if name not in volatile_records:
+                hasher.update(fbx_file.data[position:end])
+
+            position = end
+
+    return hasher.hexdigest()
+
+
+class FBXRewriter(FBXFile):
+    """
+    Removes properties and nodes, and trims animation, from a binary FBX file without the FBX SDK. Only the records
+    that change are re-written, every other record's properties, including its arrays, are copied byte for byte with
+    only the offsets in their headers moved.
+
+    Example:
+        with FBXRewriter('C:/game/Meshes/SM_Chair.fbx') as fbx_file:
+            fbx_file.removeProperties(['currentUVSet'])
+            fbx_file.deleteNodesWithPropertyValue('delete', True)
+            fbx_file.save()  # returns False and leaves file untouched if nothing was removed
+
+        with FBXRewriter('C:/temp/A_Walk_all.fbx') as fbx_file:
+            fbx_file.trimAnimation(start=10, end=40, frame_rate=30)
+            fbx_file.save('C:/game/Animation/A_Walk_loop.fbx')
+    """
+    def __init__(self, path):
+        """
+        Args:
+            path (string): Path to binary FBX file to re-write.
+        """
+        self._dropped = set()  # offsets of records that will not be written
+        self._replaced = {}  # offset of record as key, tuple of property count and property bytes to write as value
+        self._touched = set()  # offsets of records that have a nested record dropped or replaced
+        self._deleted_ids = set()
+        self._deleted_counts = {}  # object type name as key, amount of objects of that type deleted as value
+        super(FBXRewriter, self).__init__(path)
+
+        if not self.is_binary:
+            self.close()
+            raise ValueError(f'{path} is not a binary FBX file! Only binary FBX files can be re-written.')
+
+    def hasChanges(self):
+        """
+        Gets whether any records will be removed or replaced when saving.
+
+        Returns:
+            (boolean): True if saving will change the file.
+        """
+        return bool(self._dropped or self._replaced)
+
+    def _drop(self, node, *parents):
+        """
+        Marks the given record to be skipped when writing.
+
+        Args:
+            node (FBXNode): Record to drop.
+
+            parents (FBXNode): All the records the given record is nested in.
+        """
+        self._dropped.add(node.start)
+        self._touched.update(parent.start for parent in parents)
+
+    def removeProperties(self, names, class_name='Model'):
+        """
+        Removes the properties with the given names from all the objects of the given class.
+
+        Args:
+            names (Iterable): Names of properties to remove.
+
+            class_name (string): Class of objects to remove properties from. If None, removes them from all objects.
+
+        Returns:
+            (list): Tuples of object name and property name removed.
+        """
+        removed = []
+        objects = self.getTopNode('Objects')
+        if not objects:
+            return removed
+
+        names = set(names)
+        for node in objects.children:
+            if class_name and node.name != class_name:
+                continue
+
+            properties = node.find('Properties70')
+            if not properties:
+                continue
+
+            for record in properties.findAll('P'):
+                if record.properties and record.properties[0] in names:
+                    self._drop(record, objects, node, properties)
+                    removed.append((self.getName(node), record.properties[0]))
+
+        return removed
+
+    def deleteNodesWithPropertyValue(self, name, value, class_name='Model'):
+        """
+        Deletes the objects of the given class whose property with the given name has the given value. Objects only
+        connected to deleted objects, such as their children, geometry, and node attributes, are deleted as well.
+        All the connections to deleted objects are removed and the definition counts updated.
+
+        Args:
+            name (string): Name of property to check.
+
+            value (Any): Value property must have for object to be deleted.
+
+            class_name (string): Class of objects to check, such as "Model".
+
+        Returns:
+            (list): Names of the objects of the given class that were deleted.
+        """
+        objects = self.getTopNode('Objects')
+        if not objects:
+            return []
+
+        by_id = {node.value: node for node in objects.children if node.properties}
+        pending = [node.value for node in objects.children if node.name == class_name and node.properties and
+                   self.getPropertyValue(node, name) == value]
+
+        if not pending:
+            return []
+
+        parents = {}
+        children = {}
+        for _, child, parent, _ in self.getConnections():
+            parents.setdefault(child, set()).add(parent)
+            children.setdefault(parent, set()).add(child)
+
+        # delete every object whose parents have all been deleted
+        previously_deleted = set(self._deleted_ids)
+        deleted = self._deleted_ids
+        while pending:
+            object_id = pending.pop()
+            if object_id in deleted or object_id not in by_id:
+                continue
+
+            deleted.add(object_id)
+            pending.extend(child for child in children.get(object_id, ()) if parents[child] <= deleted)
+
+        newly_deleted = deleted - previously_deleted
+        for object_id in newly_deleted:
+            node = by_id[object_id]
+            self._deleted_counts[node.name] = self._deleted_counts.get(node.name, 0) + 1
+            self._drop(node, objects)
+
+        connections = self.getTopNode('Connections')
+        for record in connections.findAll('C') if connections else []:
+            if record.properties[1] in deleted or record.properties[2] in deleted:
+                self._drop(record, connections)
+
+        self._updateDefinitionCounts()
+        return [self.getName(by_id[object_id]) for object_id in newly_deleted if by_id[object_id].name == class_name]
+
+    def _updateDefinitionCounts(self):
+        """
+        Lowers the amount of objects each object type in the "Definitions" record says the file has by the amount of
+        objects deleted.
+        """
+        removed = self._deleted_counts
+        definitions = self.getTopNode('Definitions')
+        if not definitions:
+            return
+
+        for count in definitions.findAll('Count'):
+            self._replaceCount(count, count.value - sum(removed.values()), definitions)
+
+        for object_type in definitions.findAll('ObjectType'):
+            count = object_type.find('Count')
+            if count and object_type.value in removed:
+                self._replaceCount(count, count.value - removed[object_type.value], definitions, object_type)
+
+    def _replaceCount(self, node, value, *parents):
+        """
+        Replaces the value of the given "Count" record with the given value.
+
+        Args:
+            node (FBXNode): Count record to replace value of.
+
+            value (int): Count to write.
+
+            parents (FBXNode): All the records the given record is nested in.
+        """
+        self._replaceProperties(node, [('I', value)], *parents)
+
+    def _replaceProperties(self, node, properties, *parents):
+        """
+        Replaces the properties of the given record with the given properties.
+
+        Args:
+            node (FBXNode): Record to replace properties of.
+
+            properties (list): Tuples of FBX type code and value of each property to write.
+
+            parents (FBXNode): All the records the given record is nested in.
+        """
+        self._replaced[node.start] = (len(properties), b''.join(encodeProperty(*prop) for prop in properties))
+        self._touched.update(parent.start for parent in parents)
+
+    def _getTypeCode(self, node):
+        """
+        Gets the FBX type code of the first property of the given record.
+
+        Args:
+            node (FBXNode): Record to get type code of.
+
+        Returns:
+            (string): FBX type code, such as "f" for an array of floats.
+        """
+        return chr(self.data[node.property_start])
+
+    def _replaceTimes(self, properties, times, *parents):
+        """
+        Replaces the time values of the given "Properties70" record's properties.
+
+        Args:
+            properties (FBXNode): Properties70 record with the "KTime" properties to replace.
+
+            times (dictionary): Name of property as key, time in FBX ticks as value.
+
+            parents (FBXNode): All the records the given record is nested in.
+        """
+        for record in properties.findAll('P'):
+            name = record.properties[0] if record.properties else None
+            if name in times:
+                values = [('S', value) for value in record.properties[:4]] + [('L', times[name])]
+                self._replaceProperties(record, values, *parents, properties)
+
+    def setTimeSpan(self, start_time, end_time):
+        """
+        Sets the time span of the scene, animation stacks, and takes, which is the range importers read as the length
+        of the animation. Properties the file left out, since they had their default value, are not added.
+
+        Args:
+            start_time (int): First time of animation in FBX ticks.
+
+            end_time (int): Last time of animation in FBX ticks.
+        """
+        settings = self.getTopNode('GlobalSettings')
+        properties = settings.find('Properties70') if settings else None
+        if properties:
+            self._replaceTimes(properties, {'TimeSpanStart': start_time, 'TimeSpanStop': end_time}, settings)
+
+        objects = self.getTopNode('Objects')
+        for stack in objects.findAll('AnimationStack') if objects else []:
+            properties = stack.find('Properties70')
+            if properties:
+                times = {'LocalStart': start_time, 'LocalStop': end_time,
+                         'ReferenceStart': start_time, 'ReferenceStop': end_time}
+                self._replaceTimes(properties, times, objects, stack)
+
+        takes = self.getTopNode('Takes')
+        for take in takes.findAll('Take') if takes else []:
+            for name in ('LocalTime', 'ReferenceTime'):
+                record = take.find(name)
+                if record:
+                    self._replaceProperties(record, [('L', start_time), ('L', end_time)], takes, take)
+
+    def _trimCurve(self, curve, first, last, *parents):
+        """
+        Keeps only the keys of the given animation curve from the first index up to, but not including, the last index.
+
+        Args:
+            curve (FBXNode): AnimationCurve record to trim.
+
+            first (int): Index of first key to keep.
+
+            last (int): Index after the last key to keep.
+
+            parents (FBXNode): All the records the given curve is nested in.
+        """
+        key_count = len(curve.find('KeyTime').value)
+        flags = curve.find('KeyAttrFlags')
+        data = curve.find('KeyAttrDataFloat')
+        counts = curve.find('KeyAttrRefCount')
+
+        # arrays with a value per key, such as times and values, are sliced
+        for record in curve.children:
+            value = record.value
+            if isinstance(value, LazyArray) and len(value) == key_count and record not in (flags, data, counts):
+                self._replaceProperties(record, [(self._getTypeCode(record), value.decode()[first:last])],
+                                        *parents, curve)
+
+        if not (flags and data and counts):
+            return
+
+        # key attributes are shared by consecutive keys, each one is kept with the amount of its keys still in range
+        new_flags, new_data, new_counts = [], [], []
+        key = 0
+        for i, count in enumerate(counts.value):
+            kept = min(key + count, last) - max(key, first)
+            if kept > 0:
+                new_flags.append(flags.value[i])
+                new_data.extend(data.value[i * 4:i * 4 + 4])
+                new_counts.append(kept)
+
+            key += count
+
+        self._replaceProperties(flags, [(self._getTypeCode(flags), new_flags)], *parents, curve)
+        self._replaceProperties(data, [(self._getTypeCode(data), new_data)], *parents, curve)
+        self._replaceProperties(counts, [(self._getTypeCode(counts), new_counts)], *parents, curve)
+
+    def trimAnimation(self, start, end, frame_rate):
+        """
+        Removes the keys outside the given frame range from every animation curve, and sets the time span of the file
+        to the given range. Keys keep their times, the same way exporting with the given range as the playback range
+        would write them.
+
+        Args:
+            start (float): First frame to keep.
+
+            end (float): Last frame to keep.
+
+            frame_rate (float): Frames per second the file was written with.
+
+        Returns:
+            (int): Amount of animation curves that had keys removed.
+        """
+        start_time = frameToTime(start, frame_rate)
+        end_time = frameToTime(end, frame_rate)
+        tolerance = frameToTime(pcfg.fbx_frame_tolerance, frame_rate)
+        objects = self.getTopNode('Objects')
+        trimmed = 0
+
+        for curve in objects.findAll('AnimationCurve') if objects else []:
+            key_time = curve.find('KeyTime')
+            if not key_time:
+                continue
+
+            times = key_time.value.decode()
+            first = bisect.bisect_left(times, start_time - tolerance)
+            last = bisect.bisect_right(times, end_time + tolerance)
+
+            if first > 0 or last < len(times):
+                self._trimCurve(curve, first, last, objects)
+                trimmed += 1
+
+        self.setTimeSpan(start_time, end_time)
+        return trimmed
+
+    def _writeNode(self, position, output):
+        """
+        Writes the record at the given position, and all its nested records that are not dropped.
+
+        Args:
+            position (int): Offset of record in the file being read.
+
+            output (bytearray): Bytes written so far.
+
+        Returns:
+            (int): Offset of the next record in the file being read.
+        """
+        data = self.data
+        header = self._parser.record_header
+        end, count, list_length, name_length = header.unpack_from(data, position)
+
+        # untouched records that have not moved can be copied whole
+        if len(output) == position and position not in self._touched and position not in self._replaced:
+            output += data[position:end]
+            return end
+
+        start = len(output)
+        name_start = position + header.size
+        property_start = name_start + name_length
+        property_end = property_start + list_length
+        output += bytes(header.size)
+        output += data[name_start:property_start]
+
+        if position in self._replaced:
+            count, properties = self._replaced[position]
+            list_length = len(properties)
+            output += properties
+        else:
+            output += data[property_start:property_end]
+
+        if property_end < end:
+            child_position = property_end
+
+            while child_position < end:
+                child_end = header.unpack_from(data, child_position)[0]
+                if child_end == 0:
+                    break
+
+                if child_position in self._dropped:
+                    child_position = child_end
+                else:
+                    child_position = self._writeNode(child_position, output)
+
+            output += bytes(header.size)
+
+        header.pack_into(output, start, len(output), count, list_length, name_length)
+        return end
+
+    def write(self):
+        """
+        Writes the contents of the file with all the dropped and replaced records.
+
+        Returns:
+            (bytearray): Contents of the re-written file.
+        """
+        data = self.data
+        header = self._parser.record_header
+        output = bytearray(data[:binary_header_size])
+        position = binary_header_size
+
+        while True:
+            end = header.unpack_from(data, position)[0]
+            if end == 0:
+                break
+
+            position = end if position in self._dropped else self._writeNode(position, output)
+
+        # null record, footer ID, then padding to a 16 byte boundary before the version, 120 zeroes, and footer magic
+        footer_id_start = position + header.size
+        output += bytes(header.size)
+        output += data[footer_id_start:footer_id_start + 16]
+        output += bytes(4)
+        output += bytes(16 - len(output) % 16)
+        output += data[len(data) - 140:]
+        return output
+
+    def save(self, path=None):
+        """
+        Writes the file with all the removed properties and nodes, and closes it.
+
+        Args:
+            path (string): Path to write to. If None, will overwrite the file read.
+
+        Returns:
+            (boolean): True if file was written, False if nothing was removed so nothing was written.
+        """
+        path = path or self.path
+        if not self.hasChanges():
+            self.close()
+
+            # writing to another path still needs the file there, even if nothing changed
+            if os.path.abspath(path) == os.path.abspath(self.path):
+                return False
+
+            shutil.copyfile(self.path, path)
+            return True
+
+        temp_path = path + '.tmp'
+        output = self.write()
+        self.close()
+
+        with open(temp_path, 'wb') as open_file:
+            open_file.write(output)
+
+        os.replace(temp_path, path)
+        return True
+
+
+def trimClip(source_path, clip_path, start, end, frame_rate):
+    """
+    Writes the animation of the given source FBX file between the given start and end frames to the given clip path.
+
+    Args:
+        source_path (string): Path to binary FBX file with the animation of all the clips.
+
+        clip_path (string): Path to write the clip to.
+
+        start (float): First frame of clip.
+
+        end (float): Last frame of clip.
+
+        frame_rate (float): Frames per second the source file was written with.
+
+    Returns:
+        (string): Path the clip was written to.
+    """
+    with FBXRewriter(source_path) as rewriter:
+        rewriter.trimAnimation(start, end, frame_rate)
+        rewriter.save(clip_path)
+
+    return clip_path
+
+
+def trimClips(source_path, clips, frame_rate, workers=pcfg.fbx_clip_workers):
+    """
+    Writes every given clip out of the given source FBX file at the same time. Threads are used instead of processes
+    since most of the work is zlib (de)compressing the key arrays, which releases the GIL, and because DCCs such as
+    Maya can't start new processes of themselves to run python.
+
+    Args:
+        source_path (string): Path to binary FBX file with the animation of all the clips.
+
+        clips (list): Tuples of path to write clip to, first frame, and last frame of each clip.
+
+        frame_rate (float): Frames per second the source file was written with.
+
+        workers (int): Most clips written at the same time.
+
+    Returns:
+        (list): Paths the clips were written to, in the same order as given clips.
+    """
+    workers = max(1, min(workers, len(clips)))
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(trimClip, source_path, *clip, frame_rate) for clip in clips]
+        return [future.result() for future in futures]
@@ -141,7 +141,11 @@ class PiperFBX(object):
         loadScene(self.sdk_manager, self.scene, filename)
 
         self.root_node = self.scene.GetRootNode()
-        self.scene_nodes = self.getSceneNodes()
+        self.scene_nodes = []
+        self.nodes = {}  # unique ID as key, node as value
+        self.nodes_by_name = {}  # name as key, list of unique IDs of nodes with that name as value
+        self.nodes_by_property = {}  # property name as key, set of unique IDs of nodes with that property as value
+        self.getSceneNodes()
 
     def close(self):
         """
@@ -198,13 +202,85 @@ class PiperFBX(object):
 
     def getSceneNodes(self):
         """
-        Get all nodes in the fbx scene
+        Get all nodes in the fbx scene, and re-builds the name and property indices from them.
+        Only needed if the scene is changed outside this class, all the methods here keep the indices up to date.
         """
         self.scene_nodes = []
         for i in range(self.root_node.GetChildCount()):
             self.__getSceneNodesRecursive(self.root_node.GetChild(i))
+
+        self.nodes = {node.GetUniqueID(): node for node in self.scene_nodes}
+        self.nodes_by_name = {}
+        self.nodes_by_property = {}
+        [self.nodes_by_name.setdefault(node.GetName(), []).append(uid) for uid, node in self.nodes.items()]
         return self.scene_nodes
 
+    def _removeFromIndex(self, node):
+        """
+        Removes the given node from the name and property indices.
+
+        Args:
+            node (fbx.FbxNode): Node to remove from indices.
+        """
+        uid = node.GetUniqueID()
+        self.nodes.pop(uid, None)
+        uids = self.nodes_by_name.get(node.GetName(), [])
+
+        if uid in uids:
+            uids.remove(uid)
+
+        [uids.discard(uid) for uids in self.nodes_by_property.values()]
+
+    def _removeNodes(self, nodes):
+        """
+        Removes the given nodes from the scene and from the indices.
+
+        Args:
+            nodes (list): fbx.FbxNode nodes to remove.
+
+        Returns:
+            (list): Names of nodes removed.
+        """
+        names = []
+        for node in nodes:
+            names.append(node.GetName())
+            self.scene.DisconnectSrcObject(node)
+            self.scene.RemoveNode(node)
+            self._removeFromIndex(node)
+
+        if names:
+            self.scene_nodes = list(self.nodes.values())
+
+        return names
+
+    def getNodesByName(self, name):
+        """
+        Gets all the nodes with the given name.
+
+        Args:
+            name (string): Name of nodes to get.
+
+        Returns:
+            (list): fbx.FbxNode nodes with the given name.
+        """
+        return [self.nodes[uid] for uid in self.nodes_by_name.get(name, [])]
+
+    def getNodesWithProperty(self, property_string):
+        """
+        Gets all the nodes that have the given property. Nodes are only checked the first time a property is asked for.
+
+        Args:
+            property_string (string): Name of property nodes must have.
+
+        Returns:
+            (list): fbx.FbxNode nodes with the given property.
+        """
+        if property_string not in self.nodes_by_property:
+            self.nodes_by_property[property_string] = {uid for uid, node in self.nodes.items()
+                                                       if node.FindProperty(property_string).IsValid()}
+
+        return [node for uid, node in self.nodes.items() if uid in self.nodes_by_property[property_string]]
+
     def getTypeNodes(self, type_node):
         """
         Get nodes from the scene with the given type
@@ -270,39 +346,24 @@ class PiperFBX(object):
         Returns:
             (list): Nodes deleted.
         """
-        deleted = []
-        self.getSceneNodes()
-
-        for node in self.scene_nodes:
-            value = self.getPropertyValue(node, property_string)
+        nodes = [node for node in self.getNodesWithProperty(property_string)
+                 if self.getPropertyValue(node, property_string) == match_value]
 
-            if value is None or value != match_value:
-                continue
-
-            node_name = node.GetName()
-            self.scene.DisconnectSrcObject(node)
-            self.scene.RemoveNode(node)
-            deleted.append(node_name)
-
-        return deleted
+        return self._removeNodes(nodes)
 
     def printNodes(self):
         """
         Prints all nodes in the scene.
         """
-        self.getSceneNodes()
-        [print(node.GetName() for node in self.scene_nodes)]
+        [print(node.GetName()) for node in self.scene_nodes]
 
     def getNodeByName(self, name):
         """
         Get the fbx node by name
         """
-        self.getSceneNodes()
         # right now this is only getting the first one found
-        node = [node for node in self.scene_nodes if node.GetName() == name]
-        if node:
-            return node[0]
-        return None
+        uids = self.nodes_by_name.get(name)
+        return self.nodes[uids[0]] if uids else None
 
     def removeNamespace(self):
         """
@@ -310,13 +371,14 @@ class PiperFBX(object):
 
         This is not an ideal method but
         """
-        self.getSceneNodes()
-        for node in self.scene_nodes:
+        for uid, node in self.nodes.items():
             orig_name = node.GetName()
             split_by_colon = orig_name.split(':')
             if len(split_by_colon) > 1:
                 new_name = split_by_colon[-1:][0]
                 node.SetName(new_name)
+                self.nodes_by_name[orig_name].remove(uid)
+                self.nodes_by_name.setdefault(new_name, []).append(uid)
         return True
 
     def removeNodeProperty(self, node, property_string):
@@ -328,6 +390,7 @@ class PiperFBX(object):
         node_property = self.getProperty(node, property_string)
         if node_property.IsValid():
             node_property.DestroyRecursively()
+            self.nodes_by_property.get(property_string, set()).discard(node.GetUniqueID())
             return True
         return False
 
@@ -341,12 +404,8 @@ class PiperFBX(object):
         if names is None or len(names) == 0:
             return True
 
-        self.getSceneNodes()
-        remove_nodes = [node for node in self.scene_nodes if node.GetName() in names]
-        for node in remove_nodes:
-            self.scene.DisconnectSrcObject(node)
-            self.scene.RemoveNode(node)
-        self.getSceneNodes()
+        remove_nodes = [node for name in set(names) for node in self.getNodesByName(name)]
+        self._removeNodes(remove_nodes)
         return True
 
     def removeTextures(self):
@@ -16,6 +16,16 @@ def clearReadOnlyFlag(path):
     os.chmod(path, stat.S_IWUSR | stat.S_IREAD)
 
 
+def setReadOnlyFlag(path):
+    """
+    Sets the read only flag of the given file path.
+
+    Args:
+        path (string): Name of file to set read only flag of.
+    """
+    os.chmod(path, stat.S_IREAD)
+
+
 def getFileSize(path, accuracy=3, string=True):
     """
     Gets the size of the given file at the path in megabytes.
@@ -0,0 +1,387 @@
+#  Copyright (c) Christian Corsica. All Rights Reserved.
+
+import os
+
+import piper.core
+import piper.config as pcfg
+import piper.core.pythoner as python
+
+
+class FileIndex(object):
+    """
+    Persistent, per project index of all the files with the given extensions found under a root directory.
+    Each directory stores its modification time, so that re-scanning only has to list the directories that changed.
+    Only the names and types of files are indexed, so files edited in place, which don't change the modification time
+    of their directory, don't need to be stat'd again.
+
+    Example:
+        file_index = FileIndex('C:/Art', ('.ma', '.mb'), maya_paths.getFileType, project='MyGame', app='Maya')
+        file_index.scan()  # only lists directories whose modification time changed since last scan
+        file_index.write()
+    """
+    def __init__(self, directory, extensions, get_file_type, project=None, app=None):
+        """
+        Args:
+            directory (string): Root directory to index, usually the art directory.
+
+            extensions (tuple): File extensions to keep track of.
+
+            get_file_type (method): Function that takes a directory and file name and returns its FileType.
+
+            project (string): Name of project the index belongs to. Used to name the index file on disk.
+
+            app (string): Name of DCC the index belongs to. Used to name the index file on disk.
+        """
+        self.directory = directory.replace('\\', '/').rstrip('/')
+        self.extensions = tuple(extensions) if isinstance(extensions, (list, tuple)) else (extensions,)
+        self.get_file_type = get_file_type
+        self.project = project
+        self.app = app
+        self.directories = {}  # relative directory as key, dict with mtime, directories, and files as value
+        self.is_dirty = False
+        self.is_loaded = False
+        self.rescanned_count = 0
+        self._path = None
+        self._file_counts = None
+        self._bottom_up = None
+
+    def getPath(self):
+        """
+        Gets the path to the .json file the index is stored in.
+
+        Returns:
+            (string): Full path to index file.
+        """
+        if self._path:
+            return self._path
+
+        name = '_'.join([name for name in (self.app, self.project) if name]) or 'index'
+        self._path = os.path.join(piper.core.getPiperDirectory(), 'settings', pcfg.file_index_directory_name,
+                                  name + '.json').replace('\\', '/')
+        return self._path
+
+    def getFullPath(self, relative_directory):
+        """
+        Gets the full path of the given relative directory.
+
+        Args:
+            relative_directory (string): Directory relative to the root directory of the index. Root is empty string.
+
+        Returns:
+            (string): Full path to the directory.
+        """
+        return self.directory + '/' + relative_directory if relative_directory else self.directory
+
+    @staticmethod
+    def join(relative_directory, name):
+        """
+        Joins the given name to the given relative directory with forward slashes.
+
+        Args:
+            relative_directory (string): Directory relative to the root directory of the index.
+
+            name (string): Name of child file or directory.
+
+        Returns:
+            (string): Relative path of child.
+        """
+        return relative_directory + '/' + name if relative_directory else name
+
+    def load(self):
+        """
+        Loads the index from disk. Index is discarded if it was made for a different directory, set of extensions,
+        or version of the index format.
+
+        Returns:
+            (boolean): True if index was loaded from disk.
+        """
+        self.directories = {}
+        self._file_counts = None
+        self._bottom_up = None
+        self.is_loaded = True
+        path = self.getPath()
+
+        if not os.path.exists(path):
+            return False
+
+        try:
+            data = python.readJson(path)
+        except ValueError:
+            return False
+
+        if data.get('version') != pcfg.file_index_version or data.get('directory') != self.directory or \
+                tuple(data.get('extensions', ())) != self.extensions:
+            return False
+
+        self.directories = data['directories']
+        self.is_dirty = False
+        return True
+
+    def write(self, force=False):
+        """
+        Writes the index to disk if anything changed since it was last loaded or written.
+
+        Args:
+            force (boolean): If True, will write index even if nothing changed.
+
+        Returns:
+            (boolean): True if index was written.
+        """
+        if not self.is_dirty and not force:
+            return False
+
+        data = {'version': pcfg.file_index_version,
+                'directory': self.directory,
+                'extensions': self.extensions,
+                'directories': self.directories}
+
+        python.writeJson(self.getPath(), data, indent=None)
+        self.is_dirty = False
+        return True
+
+    def _scanDirectory(self, relative_directory, mtime):
+        """
+        Lists the given directory with os.scandir to get its child directories and the files with valid extensions.
+
+        Args:
+            relative_directory (string): Directory relative to the root directory of the index.
+
+            mtime (float): Modification time of the directory.
+
+        Returns:
+            (dictionary): Entry with mtime, list of directory names, and list of [name, type] files.
+        """
+        directories = []
+        files = []
+        full_directory = self.getFullPath(relative_directory)
+
+        with os.scandir(full_directory) as entries:
+            for entry in entries:
+
+                if entry.is_file() and entry.name.endswith(self.extensions):
+                    files.append([entry.name, self.get_file_type(full_directory, entry.name)])
+
+                elif entry.is_dir():
+                    directories.append(entry.name)
+
+        directories.sort()
+        files.sort()
+        return {'mtime': mtime, 'directories': directories, 'files': files}
+
+    def iterScan(self):
+        """
+        Walks the root directory and re-lists only the directories whose modification time changed since the last scan.
+        Directories are yielded as they are visited, parents before children, so callers can stream results.
+        The index is only updated once the walk completes, closing the generator early leaves the index untouched.
+
+        Yields:
+            (tuple): Relative directory, and dictionary entry with mtime, list of directory names, and list of files.
+        """
+        previous = self.directories
+        directories = {}
+        rescanned = 0
+        to_visit = ['']
+
+        while to_visit:
+            relative_directory = to_visit.pop()
+
+            try:
+                mtime = os.stat(self.getFullPath(relative_directory)).st_mtime
+            except OSError:
+                continue
+
+            entry = previous.get(relative_directory)
+            if not entry or entry['mtime'] != mtime:
+                try:
+                    entry = self._scanDirectory(relative_directory, mtime)
+                except OSError:
+                    continue
+
+                rescanned += 1
+
+            directories[relative_directory] = entry
+            yield relative_directory, entry
+
+            # reversed so that directories are visited in sorted order
+            to_visit.extend(reversed([self.join(relative_directory, name) for name in entry['directories']]))
+
+        self.directories = directories
+        self._file_counts = None
+        self._bottom_up = None
+        self.rescanned_count = rescanned
+
+        if rescanned or len(previous) != len(directories):
+            self.is_dirty = True
+
+    def scan(self):
+        """
+        Walks the root directory and re-lists only the directories whose modification time changed since the last scan.
+        Directories that no longer exist are dropped from the index.
+
+        Returns:
+            (int): Number of directories that had to be re-listed.
+        """
+        for _ in self.iterScan():
+            pass
+
+        return self.rescanned_count
+
+    def getDirectories(self, relative_directory=''):
+        """
+        Gets the names of the indexed child directories of the given directory.
+
+        Args:
+            relative_directory (string): Directory relative to the root directory of the index.
+
+        Returns:
+            (list): Names of child directories.
+        """
+        entry = self.directories.get(relative_directory)
+        return entry['directories'] if entry else []
+
+    def getFiles(self, relative_directory=''):
+        """
+        Gets the indexed files of the given directory.
+
+        Args:
+            relative_directory (string): Directory relative to the root directory of the index.
+
+        Returns:
+            (list): Each file as a list of name and file type.
+        """
+        entry = self.directories.get(relative_directory)
+        return entry['files'] if entry else []
+
+    def getBottomUpDirectories(self):
+        """
+        Gets all the indexed directories ordered so that every child directory comes before its parent.
+        Computed once per scan/load.
+
+        Returns:
+            (list): Relative directories, deepest first.
+        """
+        if self._bottom_up is None:
+            # longest paths first guarantees children come before their parents
+            self._bottom_up = sorted(self.directories, key=len, reverse=True)
+
+        return self._bottom_up
+
+    def countFiles(self, is_counted=None):
+        """
+        Counts the files each directory holds, including files in all its child directories, in one bottom-up pass.
+
+        Args:
+            is_counted (method): If given, only files this function returns True for are counted. Function takes the
+            relative directory and the file as a list of name and file type.
+
+        Returns:
+            (dictionary): Relative directory as key, file count as value.
+        """
+        counts = {}
+        for relative_directory in self.getBottomUpDirectories():
+            files = self.getFiles(relative_directory)
+
+            if is_counted:
+                count = len([file_data for file_data in files if is_counted(relative_directory, file_data)])
+            else:
+                count = len(files)
+
+            count += sum([counts.get(self.join(relative_directory, name), 0)
+                          for name in self.getDirectories(relative_directory)])
+            counts[relative_directory] = count
+
+        return counts
+
+    def getFileCounts(self):
+        """
+        Gets how many files each directory holds, including files in all its child directories.
+        Computed once per scan/load.
+
+        Returns:
+            (dictionary): Relative directory as key, file count as value.
+        """
+        if self._file_counts is None:
+            self._file_counts = self.countFiles()
+
+        return self._file_counts
+
+    def iterFiles(self):
+        """
+        Iterates through every indexed file.
+
+        Yields:
+            (tuple): Relative directory the file is in, and file as list of name and file type.
+        """
+        for relative_directory, entry in self.directories.items():
+            for file_data in entry['files']:
+                yield relative_directory, file_data
+
+    def getNames(self):
+        """
+        Gets the name without extension of every indexed file.
+
+        Returns:
+            (list): Names of all the files in the index.
+        """
+        return [os.path.splitext(file_data[0])[0] for _, file_data in self.iterFiles()]
+
+    def getFileCount(self, relative_directory=''):
+        """
+        Gets how many files the given directory holds, including files in all its child directories.
+
+        Args:
+            relative_directory (string): Directory relative to the root directory of the index.
+
+        Returns:
+            (int): Number of files.
+        """
+        return self.getFileCounts().get(relative_directory, 0)
+
+    def walk(self, relative_directory='', skip_empty=True):
+        """
+        Walks the index from the given directory downwards, parents before children, similar to os.walk.
+
+        Args:
+            relative_directory (string): Directory relative to the root directory of the index to start from.
+
+            skip_empty (boolean): If True, will not yield or walk through directories that have no files in them.
+
+        Yields:
+            (tuple): Relative directory, child directory names, and files as [name, file type].
+        """
+        to_visit = [relative_directory]
+
+        while to_visit:
+            directory = to_visit.pop()
+            names = self.getDirectories(directory)
+
+            if skip_empty:
+                names = [name for name in names if self.getFileCount(self.join(directory, name))]
+
+            yield directory, names, self.getFiles(directory)
+            to_visit.extend(reversed([self.join(directory, name) for name in names]))
+
+
+def get(directory, extensions, get_file_type, project=None, app=None):
+    """
+    Convenience method for getting a file index that is loaded from disk and scanned for changes.
+
+    Args:
+        directory (string): Root directory to index, usually the art directory.
+
+        extensions (tuple): File extensions to keep track of.
+
+        get_file_type (method): Function that takes a directory and file name and returns its FileType.
+
+        project (string): Name of project the index belongs to.
+
+        app (string): Name of DCC the index belongs to.
+
+    Returns:
+        (FileIndex): Index that is up-to-date with what is on disk.
+    """
+    file_index = FileIndex(directory, extensions, get_file_type, project=project, app=app)
+    file_index.load()
+    file_index.scan()
+    file_index.write()
+    return file_index
@@ -1,10 +1,215 @@
 #  Copyright (c) Christian Corsica. All Rights Reserved.
 
 import os
-from copy import deepcopy
+import re
+import time
+import shlex
+import threading
+import concurrent.futures
 from collections import OrderedDict
 from P4 import P4, P4Exception
 
+import piper.config as pcfg
+import piper.core.filer as filer
+
+
+class ClientView(object):
+    """
+    Root(s) and view of a client spec, used to find whether a local path is mapped by the client without asking the
+    server. Later view lines override earlier ones, and lines that start with "-" exclude paths, just like in P4.
+
+    Example:
+        view = ClientView('my_client', 'C:/Perforce', ['//depot/Art/... //my_client/Art/...'])
+        view.maps('C:/Perforce/Art/character.ma')  # True
+        view.maps('C:/Perforce/Code/main.cpp')  # False
+    """
+    def __init__(self, name, root, view, alt_roots=None):
+        """
+        Args:
+            name (string): Name of client.
+
+            root (string): Local directory client is rooted in. "null" roots are ignored.
+
+            view (list): Lines of the client's view, each with depot side and client side.
+
+            alt_roots (list): Other local directories client may be rooted in.
+        """
+        self.name = name
+        roots = [root] + list(alt_roots or [])
+        self.roots = [self.normalize(root).rstrip('/') for root in roots if root and root.lower() != 'null']
+        self.lines = [self.parseLine(line) for line in view]
+
+    @staticmethod
+    def normalize(path):
+        """
+        Normalizes the given local path so that it can be compared with client roots.
+
+        Args:
+            path (string): Local path to normalize.
+
+        Returns:
+            (string): Path with forward slashes, lower case on Windows since its paths are case-insensitive.
+        """
+        path = path.replace('\\', '/')
+        return path.lower() if os.name == 'nt' else path
+
+    def parseLine(self, line):
+        """
+        Parses the given view line into whether it excludes paths, and a pattern that matches paths relative to root.
+
+        Args:
+            line (string): View line such as "-//depot/Art/Temp/... //my_client/Art/Temp/...".
+
+        Returns:
+            (tuple): Boolean of whether line excludes paths, and compiled pattern of the client side of the line.
+        """
+        depot_side, client_side = shlex.split(line)
+        is_excluded = depot_side.startswith('-')
+
+        # client side starts with "//client_name/", and the rest is relative to the root
+        relative = self.normalize(client_side.split('/', 3)[-1])
+        pattern = re.escape(relative).replace(re.escape('...'), '.*').replace(re.escape('*'), '[^/]*')
+        pattern = re.sub(r'%%\d', '[^/]*', pattern)
+        return is_excluded, re.compile(pattern)
+
+    def maps(self, path):
+        """
+        Gets whether the given local path is mapped by the client's view.
+
+        Args:
+            path (string): Local path to check. Directories may end with "/...".
+
+        Returns:
+            (boolean): True if client maps the given path.
+        """
+        path = self.normalize(path)
+
+        for root in self.roots:
+            if not path.startswith(root + '/'):
+                continue
+
+            relative = path[len(root) + 1:]
+            is_mapped = False
+
+            for is_excluded, pattern in self.lines:
+                if pattern.fullmatch(relative):
+                    is_mapped = not is_excluded
+
+            if is_mapped:
+                return True
+
+        return False
+
+
+class InfoCache(object):
+    """
+    Time bounded cache of "fstat" results, keyed by normalized path. Shared by all Perforce instances so that scene
+    open/save callbacks and tools asking about the same paths do not ask the server every time.
+    Paths are invalidated when piper syncs, edits, adds, or reverts them. See pcfg.p4_invalidating_commands.
+    """
+    def __init__(self, seconds=pcfg.p4_info_cache_seconds):
+        """
+        Args:
+            seconds (float): How long info is valid for after it is fetched from the server.
+        """
+        self.seconds = seconds
+        self.entries = {}  # normalized path as key, tuple of time info was fetched and list of info as value
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def normalize(path):
+        """
+        Normalizes the given path so that the same path written differently has the same key.
+
+        Args:
+            path (string): Path to normalize.
+
+        Returns:
+            (string): Normalized path.
+        """
+        return os.path.normcase(os.path.normpath(path))
+
+    def get(self, path):
+        """
+        Gets the cached info of the given path if it has not expired.
+
+        Args:
+            path (string): Path to get info of.
+
+        Returns:
+            (list or None): Info of path, None if path is not cached or has expired.
+        """
+        key = self.normalize(path)
+
+        with self.lock:
+            entry = self.entries.get(key)
+
+            if not entry:
+                return None
+
+            if time.monotonic() - entry[0] > self.seconds:
+                del self.entries[key]
+                return None
+
+            return entry[1]
+
+    def update(self, paths, info):
+        """
+        Caches the given info under the given paths it belongs to. Directories, which end with "...", are not cached,
+        since any file could be added to them.
+
+        Args:
+            paths (list): Validated paths that were given to "fstat".
+
+            info (list): Info "fstat" returned for the given paths.
+
+        Returns:
+            (dictionary): Path as key, list of info that belongs to the path as value. Info that did not belong to any
+            of the paths is under the None key.
+        """
+        by_path = {path: [] for path in paths}
+        keys = {self.normalize(path): path for path in paths}
+        directories = [(self.normalize(path[:-3]), path) for path in paths if path.endswith('...')]
+        now = time.monotonic()
+
+        for file_info in info:
+            key = self.normalize(file_info.get('clientFile', ''))
+            path = keys.get(key)
+
+            if path is None:
+                path = next((path for directory, path in directories if key.startswith(directory)), None)
+
+            by_path.setdefault(path, []).append(file_info)
+
+        with self.lock:
+            for path, path_info in by_path.items():
+                if path and path_info and not path.endswith('...'):
+                    self.entries[self.normalize(path)] = (now, path_info)
+
+        return by_path
+
+    def invalidate(self, paths=None):
+        """
+        Removes the given paths from the cache. Directories, which end with "...", remove all the paths in them.
+
+        Args:
+            paths (list): Paths to remove. If None given, will clear the whole cache.
+        """
+        with self.lock:
+            if paths is None:
+                self.entries.clear()
+                return
+
+            for path in paths:
+                if path.endswith('...'):
+                    directory = self.normalize(path[:-3])
+                    [self.entries.pop(key) for key in list(self.entries) if key.startswith(directory)]
+                else:
+                    self.entries.pop(self.normalize(path), None)
+
+
+info_cache = InfoCache()
+
 
 class Perforce(P4):
     """
@@ -16,6 +221,8 @@ class Perforce(P4):
     """
     def __init__(self, *args, **kwlist):
         super(Perforce, self).__init__(*args, **kwlist)
+        self.path_warnings = []  # warnings from all the commands ran by the last runPath
+        self._client_views = None
 
     def getParentWindow(self):
         """
@@ -97,30 +304,58 @@ class Perforce(P4):
         """
         return 'action' in file_info
 
-    def _isCheckedOutByOther(self, file_info):
+    def _isCheckedOutByOther(self, file_info, display=True):
         """
         Gets whether the given file is exclusively checked out by another user.
 
         Args:
             file_info (dictionary): Dictionary from P4 that has all available info about file.
 
+            display (boolean): If True, will display who has the file checked out.
+
         Returns:
             (boolean): True if file is exclusively checked out by another user, False if not.
         """
         # if other people have it open for edit AND file is an exclusive check out type
-        if 'otherOpens' in file_info and '+l' in file_info['headType']:
-            self.display(', '.join(file_info['otherOpen']) + ' has ' + file_info['clientFile'] + ' checked out')
+        if 'otherOpens' in file_info and '+l' in file_info.get('headType', ''):
+
+            if display:
+                self.display(', '.join(file_info['otherOpen']) + ' has ' + file_info['clientFile'] + ' checked out')
+
             return True
 
         return False
 
-    def runChecked(self, *args, **kwargs):
+    def getStatus(self, file_info):
         """
-        Checks whether the user is logged in and has a valid ticket before running p4 command.
-        If user is not logged in, a PySide2 dialog input will show up prompting for password.
+        Gets the status of the given file, such as whether it is on latest revision or checked out by another user.
+        Does not display anything, so it is safe to use on many files and outside the main thread.
+
+        Args:
+            file_info (dictionary): Dictionary from P4 that has all available info about file.
 
         Returns:
-            (Any): Results of command ran.
+            (tuple): Status as one of the pcfg.p4_status names as first index, description of status as second index.
+        """
+        if 'notInClient' in file_info:
+            return pcfg.p4_status_not_in_depot, 'File is not in the depot or not in client view.'
+
+        if self._isCheckedOutByOther(file_info, display=False):
+            return pcfg.p4_status_checked_out_by_other, ', '.join(file_info['otherOpen']) + ' has file checked out.'
+
+        if self._isInChangelist(file_info):
+            return pcfg.p4_status_in_changelist, f'File is open for {file_info["action"]}.'
+
+        if not self._isLatest(file_info):
+            have_revision = file_info.get('haveRev', 0)
+            return pcfg.p4_status_out_of_date, f'Have revision {have_revision} of {file_info.get("headRev")}.'
+
+        return pcfg.p4_status_latest, f'Have latest revision {file_info.get("headRev")}.'
+
+    def checkLogin(self):
+        """
+        Checks whether the user is logged in and has a valid ticket.
+        If user is not logged in, a PySide2 dialog input will show up prompting for password.
         """
         try:
             self.run('login', '-s')
@@ -137,6 +372,15 @@ class Perforce(P4):
                 self.password = answer
                 self.run_login()
 
+    def runChecked(self, *args, **kwargs):
+        """
+        Checks whether the user is logged in and has a valid ticket before running p4 command.
+        If user is not logged in, a PySide2 dialog input will show up prompting for password.
+
+        Returns:
+            (Any): Results of command ran.
+        """
+        self.checkLogin()
         return self.run(*args, **kwargs)
 
     def validatePath(self, path=None):
@@ -161,6 +405,8 @@ class Perforce(P4):
     def runPath(self, command, path=None, flags=None):
         """
         Runs the given command through the given path or current scene, with given flags.
+        Paths are grouped by the client that maps them, and each client runs the command on chunks of paths, so many
+        paths only take a handful of server calls. Warnings of all the calls are stored in self.path_warnings.
 
         Args:
             command (string): Name of P4 command to run on given path.
@@ -187,42 +433,86 @@ class Perforce(P4):
             client_file_paths = clients.setdefault(client, [])
             client_file_paths.append(file_path)
 
-        pre_arguments = flags if flags else []
-        pre_arguments.insert(0, command)
+        # our own actions change the state of the files, so their cached info is no longer valid. Invalidated before and
+        # after running, since an fstat from another thread that runs while the command runs could cache the old state
+        invalidating = command in pcfg.p4_invalidating_commands
+        all_paths = [file_path for paths in clients.values() for file_path in paths]
+        info_cache.invalidate(all_paths) if invalidating else None
+
+        pre_arguments = [command] + (list(flags) if flags else [])
+        chunk_size = pcfg.p4_paths_per_command
+        self.path_warnings = []
         output = []
+        self.checkLogin()
 
-        for client, paths in clients.items():
-            if self.client != client:
-                self.client = client
+        try:
+            for client, paths in clients.items():
+                if self.client != client:
+                    self.client = client
 
-            arguments = pre_arguments + paths
-            output += self.runChecked(*arguments)
+                for i in range(0, len(paths), chunk_size):
+                    output += self.run(*(pre_arguments + paths[i:i + chunk_size]))
+                    self.path_warnings += self.warnings
+        finally:
+            info_cache.invalidate(all_paths) if invalidating else None
 
         return output
 
-    def getInfo(self, path=None):
+    def _getInfo(self, paths):
         """
-        Gets all the information about the given path in the P4 server.
-        Uses the "fstat" command.
+        Gets all the information about the given paths in the P4 server with the "fstat" command, skipping the cache.
 
         Args:
-            path (string or list): Path to get info of. If None given, will use path defined by self.getCurrentScene().
+            paths (list): Validated paths to get info of.
 
         Returns:
-            (list): Each path given contains a dictionary with all the information about each path.
+            (list): Dictionary with all the information about each file.
         """
         # setting exception level to 1 to catch and use warnings
         current_level = self.exception_level
         self.exception_level = 1
 
-        info = self.runPath('fstat', path=path)
-        for warning in self.warnings:
-            info.append({'clientFile': warning.rstrip(' - no such file(s).'), 'notInClient': 1})
+        try:
+            info = self.runPath('fstat', path=paths)
+        finally:
+            # moving exception back to current level
+            self.exception_level = current_level
+
+        # warnings look like "C:/path/file.ma - no such file(s)." or "C:/path/file.ma - file(s) not in client view."
+        for warning in self.path_warnings:
+            info.append({'clientFile': warning.rsplit(' - ', 1)[0], 'notInClient': 1})
 
-        # moving exception back to current level
-        self.exception_level = current_level
         return info
 
+    def getInfo(self, path=None, use_cache=True):
+        """
+        Gets all the information about the given path in the P4 server.
+        Uses the "fstat" command, unless info of path was fetched recently and is still in the info cache.
+
+        Args:
+            path (string or list): Path to get info of. If None given, will use path defined by self.getCurrentScene().
+
+            use_cache (boolean): If False, will always ask the server, and cache what the server returns.
+
+        Returns:
+            (list): Each path given contains a dictionary with all the information about each path.
+        """
+        path = path if path else self.getCurrentScene()
+
+        if not path:
+            raise ValueError('No path given, and no path found from current scene!')
+
+        paths = path if isinstance(path, (list, tuple, set, dict)) else [path]
+        paths = [self.validatePath(path=file_path) for file_path in paths]
+        cached = {file_path: info_cache.get(file_path) for file_path in paths} if use_cache else {}
+        missing = [file_path for file_path in paths if cached.get(file_path) is None]
+
+        if missing:
+            cached.update(info_cache.update(missing, self._getInfo(missing)))
+
+        info = [file_info for file_path in paths for file_info in cached[file_path]]
+        return info + cached.get(None, [])
+
     def getServerInfo(self):
         """
         Gets all the information about the P4 server.
@@ -266,9 +556,41 @@ class Perforce(P4):
         """
         return self.getServerInfo()[0]['clientName']
 
+    def getClientViews(self, user=None):
+        """
+        Gets the views of all the clients the given user has. Client specs are only fetched from the server the first
+        time, after that the cached views are returned. See clearClientViews.
+
+        Args:
+            user (string): Name of user. Usually first letter of first name, and last name, all lowercase.
+
+        Returns:
+            (list): ClientView of each client, in the order clients should be searched in.
+        """
+        if self._client_views is not None:
+            return self._client_views
+
+        views = []
+        clients = self.getUserClientNames(user=user)
+        clients.reverse()
+
+        for client in clients:
+            spec = self.run('client', '-o', client)[0]
+            views.append(ClientView(client, spec.get('Root'), spec.get('View', []), spec.get('AltRoots')))
+
+        self._client_views = views
+        return views
+
+    def clearClientViews(self):
+        """
+        Clears the cached client views, so that the next time they are needed they are fetched from the server.
+        """
+        self._client_views = None
+
     def findClient(self, path=None, validate_path=True):
         """
         Finds the client that the given path could be mapped to. Returns FIRST possible client found.
+        Uses the cached client views to match the path without asking the server.
         Sets the currently connected client.
         Will raise error if no client found!
 
@@ -280,8 +602,27 @@ class Perforce(P4):
         Returns:
             (string): Client that path can map to.
         """
-        client_match = None
         path = self.validatePath(path=path) if validate_path else path
+
+        for view in self.getClientViews():
+            if view.maps(path):
+                self.client = view.name
+                return view.name
+
+        return self._findClientWhere(path)
+
+    def _findClientWhere(self, path):
+        """
+        Finds the client that the given path could be mapped to by asking the server with "where" on every client.
+        Slow, only used when none of the cached client views map the path.
+
+        Args:
+            path (string): Validated path to possible client.
+
+        Returns:
+            (string): Client that path can map to.
+        """
+        client_match = None
         clients = self.getUserClientNames()
         clients.reverse()
 
@@ -386,7 +727,7 @@ class Perforce(P4):
     def getLatest(self, path=None, flags=None, force=False):
         """
         Gets the latest revision of given path.
-        Uses "sync" command.
+        Uses "sync" command, with many connections at once when given many paths. See sync.
 
         Args:
             path (string or list): Path to get latest revision of. Will use self.getCurrentScene() if None given.
@@ -402,7 +743,7 @@ class Perforce(P4):
             flags = flags if flags else []
             flags.append('-f')
 
-        return self.runPath('sync', path=path, flags=flags)
+        return self.sync(path=path, flags=flags)
 
     def isInChangelist(self, path=None, info=None):
         """
@@ -481,39 +822,57 @@ class Perforce(P4):
         """
         return self.runPath('edit', path=path, flags=flags)
 
-    def _runActions(self, command, actions, statement=None):
-        files = actions[command]
-        if files:
+    def sync(self, path=None, flags=None, workers=pcfg.p4_sync_workers):
+        """
+        Gets the latest revision of the given paths, spreading many paths across worker connections that sync at the
+        same time. Workers use the same port, user, and client, but do not prompt for password, so login is checked
+        before they start.
 
-            for file_path in files:
-                self.display(statement + file_path)
+        Args:
+            path (string or list): Path(s) to sync. Will use self.getCurrentScene() if None given.
 
-            return self.runPath(command, path=files)
+            flags (list): Extra flags to pass to sync command.
 
-        return None
+            workers (int): Maximum amount of connections to sync with at once.
 
-    def makeAvailable(self, write_method=None, add=True, *args, **kwargs):
+        Returns:
+            (list): Results of every sync ran.
         """
-        Used to write file(s) to disk while using Perforce to make sure file is writable.
-        Pass the keyword "path", with a string path, or a list of paths. If not, current scene will be used.
+        path = path if path else self.getCurrentScene()
+        paths = list(path) if isinstance(path, (list, tuple, set, dict)) else [path]
+        workers = min(workers, len(paths) // pcfg.p4_parallel_sync_minimum)
+
+        if workers <= 1:
+            return self.runPath('sync', path=paths, flags=flags)
+
+        self.checkLogin()
+        shards = [paths[i::workers] for i in range(workers)]
+
+        def _sync(shard):
+            p4 = Perforce(port=self.port, user=self.user, client=self.client)
+            with p4.connect():
+                return p4.runPath('sync', path=shard, flags=flags)
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+            return [result for results in executor.map(_sync, shards) for result in results]
+
+    def getActions(self, info, add=True):
+        """
+        Gets the P4 actions each of the given files needs before it can be written to.
 
         Args:
-            write_method (method): Function that writes the file. Args and Kwargs will be passed ot this method.
+            info (list): Dictionaries from P4 that have all available info about each file.
 
-            add (boolean): If True, will attempt to add file if not in client.
+            add (boolean): If True, files that are not in client will be added.
 
         Returns:
-            (dictionary): Results of all the actions done for each file.
+            (OrderedDict): Paths that need to be synced, checked out ("edit"), added, and that can't be written to.
         """
-        path = kwargs.get('path')
-        info = self.getInfo(path=path)
-
         actions = OrderedDict()
         actions['sync'] = []
         actions['edit'] = []
         actions['add'] = []
         actions['failed'] = []
-        results = deepcopy(actions)
 
         for file_info in info:
             file_path = file_info['clientFile']
@@ -539,19 +898,213 @@ class Perforce(P4):
                 # file needs to be checked out
                 actions['edit'].append(file_path)
 
+        return actions
+
+    def _runActions(self, command, actions, statement=None):
+        files = actions[command]
+        if files:
+
+            # displaying every file of a big batch takes longer than the command itself
+            if len(files) > pcfg.p4_display_limit:
+                self.display(f'{statement}{len(files)} files')
+            else:
+                [self.display(statement + file_path) for file_path in files]
+
+            if command == 'sync':
+                return self.sync(path=files)
+
+            return self.runPath(command, path=files)
+
+        return None
+
+    def makeAvailable(self, write_method=None, add=True, *args, **kwargs):
+        """
+        Used to write file(s) to disk while using Perforce to make sure file is writable.
+        Pass the keyword "path", with a string path, or a list of paths. If not, current scene will be used.
+        To write many files, see Transaction, which syncs and checks out all of them before any is written.
+
+        Args:
+            write_method (method): Function that writes the file. Args and Kwargs will be passed ot this method.
+
+            add (boolean): If True, will attempt to add file if not in client.
+
+        Returns:
+            (dictionary): Results of all the actions done for each file.
+        """
+        transaction = Transaction(self, add=add)
+        transaction.prepare(path=kwargs.get('path'))
+
+        if write_method:
+            write_method(*args, **kwargs)
+
+        return transaction.commit()
+
+
+class Transaction(object):
+    """
+    Makes many files available at once. Paths known before writing are prepared with one sync and one check out pass,
+    paths only known right before they are written are staged, and all the files not in the depot are added in one pass
+    when the transaction commits. While used as a context manager, it is the active transaction that "stage" uses.
+
+    Example:
+        with Transaction(getConnection()) as transaction:
+            transaction.prepare(paths)  # syncs and checks out all the paths at once
+            [write(path) for path in paths]
+            stage(new_path)  # path that could not be known before, written after this
+            write(new_path)
+        # any file not in the depot is added, and staged files are checked out
+    """
+    def __init__(self, p4, add=True):
+        """
+        Args:
+            p4 (Perforce): Connected Perforce instance to run commands with.
+
+            add (boolean): If True, files that are not in client will be added.
+        """
+        self.p4 = p4
+        self.add = add
+        self.prepared = set()  # normalized paths that have been synced and checked out
+        self.staged = []  # paths made writable before they were checked out
+        self.read_only = set()  # normalized staged paths that were read only before they were staged
+        self.to_add = []
+        self.results = OrderedDict([('sync', []), ('edit', []), ('add', []), ('failed', [])])
+        self.previous = None
+
+    def __enter__(self):
+        global transaction
+        self.previous = transaction
+        transaction = self
+        return self
+
+    def __exit__(self, exception_type, exception, trace):
+        global transaction
+        transaction = self.previous
+        self.previous = None
+
+        # files that were written before an error still need to be checked out or added
+        if not exception_type:
+            self.commit()
+            return
+
+        # failing to commit must not hide the error that stopped the transaction
+        try:
+            self.commit()
+        except Exception as commit_exception:
+            self.p4.display(f'Failed to commit transaction after {exception_type.__name__}: {commit_exception}')
+
+    def prepare(self, path=None):
+        """
+        Syncs and checks out all the given paths with one command each, so they can be written to.
+
+        Args:
+            path (string or list): Path(s) about to be written. Will use p4.getCurrentScene() if None given.
+
+        Returns:
+            (OrderedDict): Paths that were synced, checked out, and that will be added when committing.
+        """
+        actions = self.p4.getActions(self.p4.getInfo(path=path), add=self.add)
+
         # raise any files that are not writeable
         if actions['failed']:
             raise EnvironmentError('Cannot write the following files: ' + ', '.join(actions['failed']))
 
-        # sync, edit, write files, then add
-        results['sync'].append(self._runActions('sync', actions, 'File is not latest! Getting latest on: '))
-        results['edit'].append(self._runActions('edit', actions, 'Checking out: '))
+        self.results['sync'].append(self.p4._runActions('sync', actions, 'File is not latest! Getting latest on: '))
+        self.results['edit'].append(self.p4._runActions('edit', actions, 'Checking out: '))
+        self.to_add += actions['add']
+        self.prepared.update([InfoCache.normalize(file_path) for action in actions.values() for file_path in action])
+        return actions
 
-        if write_method:
-            write_method(*args, **kwargs)
+    def stage(self, path):
+        """
+        Makes the given path writable so it can be written to right away. Refuses paths checked out by others, and
+        gets the latest revision of paths that are out of date before they are written. Uses the info cache, so paths
+        whose info was fetched recently, such as by the browser's status, don't ask the server again.
+        Staged paths are checked out or added when the transaction commits.
+
+        Args:
+            path (string): Path about to be written that was not prepared.
+        """
+        if InfoCache.normalize(path) in self.prepared:
+            return
+
+        actions = self.p4.getActions(self.p4.getInfo(path=path), add=self.add)
+
+        if actions['failed']:
+            raise EnvironmentError('Cannot write the following files: ' + ', '.join(actions['failed']))
+
+        if actions['sync']:
+            self.results['sync'].append(self.p4._runActions('sync', actions, 'File is not latest! Getting latest on: '))
+
+        if os.path.exists(path):
+            if not os.access(path, os.W_OK):
+                self.read_only.add(InfoCache.normalize(path))
+
+            filer.clearReadOnlyFlag(path)
+
+        self.prepared.add(InfoCache.normalize(path))
+        self.staged.append(path)
+
+    def unstage(self, path):
+        """
+        Removes the given path from the staged paths, so it is not checked out or added when the transaction commits.
+        Useful when the file written turned out to be the same as before. Paths that were read only are made read
+        only again.
+
+        Args:
+            path (string): Path that was staged.
+
+        Returns:
+            (boolean): True if path was unstaged, False if it was not staged.
+        """
+        normalized = InfoCache.normalize(path)
+        staged = [staged_path for staged_path in self.staged if InfoCache.normalize(staged_path) == normalized]
+
+        if not staged:
+            return False
+
+        [self.staged.remove(staged_path) for staged_path in staged]
+        self.prepared.discard(normalized)
+
+        if normalized in self.read_only and os.path.exists(path):
+            filer.setReadOnlyFlag(path)
+
+        self.read_only.discard(normalized)
+        return True
+
+    def commit(self):
+        """
+        Checks out the staged files that are in the depot, and adds all the files that are not, one command each.
+
+        Returns:
+            (dictionary): Results of all the actions done for each file.
+        """
+        failed = []
+
+        if self.staged:
+            actions = self.p4.getActions(self.p4.getInfo(path=self.staged, use_cache=False), add=self.add)
+            failed = actions['failed']
+
+            # staged files are already written, so syncing would overwrite them
+            if actions['sync']:
+                self.p4.display('Wrote over old revision, resolve before submitting: ' + ', '.join(actions['sync']))
+
+            self.results['edit'].append(self.p4._runActions('edit', actions, 'Checking out: '))
+            self.to_add += actions['add']
+            self.staged = []
+            self.read_only = set()
+
+        self.results['add'].append(self.p4._runActions('add', {'add': self.to_add}, 'Adding: '))
+        self.to_add = []
 
-        results['add'].append(self._runActions('add', actions, 'Adding: '))
-        return results
+        if failed:
+            self.results['failed'] += failed
+            raise EnvironmentError('Wrote files checked out by others, could not check out: ' + ', '.join(failed))
+
+        return self.results
+
+
+connections = {}  # perforce class and thread id as key, long-lived Perforce instance as value
+transaction = None  # Transaction currently used as a context manager, if any
 
 
 def getDepots():
@@ -580,8 +1133,71 @@ def makeAvailable(write_method=None, path=None, *args, **kwargs):
     Returns:
         (dictionary): Results of all the actions done for each file.
     """
-    p4 = Perforce()
-    with p4.connect():
-        results = p4.makeAvailable(write_method=write_method, path=path, *args, **kwargs)
+    p4 = getConnection()
+    return p4.makeAvailable(write_method=write_method, path=path, *args, **kwargs)
+
+
+def stage(path):
+    """
+    Stages the given path in the active transaction, if there is one, so that it is checked out or added when the
+    transaction commits. Useful for writers that do not know about Perforce, such as exporters.
+
+    Args:
+        path (string): Path about to be written.
+
+    Returns:
+        (boolean): True if path was staged.
+    """
+    if not transaction:
+        return False
+
+    transaction.stage(path)
+    return True
+
+
+def unstage(path):
+    """
+    Unstages the given path from the active transaction, if there is one, so that it is not checked out or added.
+
+    Args:
+        path (string): Path that was staged.
 
-    return results
+    Returns:
+        (boolean): True if path was unstaged.
+    """
+    if not transaction:
+        return False
+
+    return transaction.unstage(path)
+
+
+def getConnection(perforce_class=Perforce):
+    """
+    Gets a long-lived, connected Perforce instance of the given class for the current thread, so that the connection
+    and its cached client views are re-used instead of connecting every time. Re-connects if connection was dropped.
+
+    Args:
+        perforce_class (type): Perforce class to get instance of, such as a DCC's Perforce class.
+
+    Returns:
+        (Perforce): Connected instance.
+    """
+    key = (perforce_class, threading.get_ident())
+    p4 = connections.get(key)
+
+    if not p4:
+        p4 = perforce_class()
+        connections[key] = p4
+
+    if not p4.connected():
+        p4.connect()
+
+    return p4
+
+
+def disconnectAll():
+    """
+    Disconnects all the long-lived connections made with getConnection.
+    """
+    [p4.disconnect() for p4 in connections.values() if p4.connected()]
+    connections.clear()
@@ -103,7 +103,7 @@ def measureTime(method):
     return wrapper
 
 
-def writeJson(file_name, data):
+def writeJson(file_name, data, indent=4, atomic=False):
     """
     Writes given dict data to given file_name as json.
 
@@ -112,6 +112,11 @@ def writeJson(file_name, data):
 
         data (dict): dict to write to given file_name.
 
+        indent (int or None): Indentation level to write with. None writes the most compact representation.
+
+        atomic (boolean): If True, writes to a temporary file first and then renames it to file_name, so that readers
+        never see a half written file.
+
     Returns:
         (string): full path where json file is.
     """
@@ -121,8 +126,12 @@ def writeJson(file_name, data):
     if not os.path.exists(directory):
         os.makedirs(directory)
 
-    with open(file_name, 'w') as open_file:
-        json.dump(data, open_file, indent=4)
+    write_path = f'{file_name}.{os.getpid()}.tmp' if atomic else file_name
+    with open(write_path, 'w') as open_file:
+        json.dump(data, open_file, indent=indent)
+
+    if atomic:
+        os.replace(write_path, file_name)
 
     return file_name
 
@@ -0,0 +1,231 @@
+#  Copyright (c) Christian Corsica. All Rights Reserved.
+
+import os
+import time
+import concurrent.futures
+
+import piper.core
+import piper.config as pcfg
+import piper.core.dcc as dcc
+import piper.core.pythoner as python
+from piper.core.store import piper_store
+
+
+def getWorkerCount(count=None):
+    """
+    Gets how many DCC processes should export at the same time.
+
+    Args:
+        count (int): If given, will use this count instead of the one stored in the piper store.
+
+    Returns:
+        (int): Amount of workers, at least 1. Stored count of 0 uses the amount of CPU cores.
+    """
+    if count is None:
+        count = piper_store.get(pcfg.export_workers)
+
+    if not count:
+        count = os.cpu_count() or 1
+
+    return max(1, count)
+
+
+def groupBySource(entries):
+    """
+    Groups the given export entries by their project and source path, so that each source file is only opened once.
+
+    Args:
+        entries (list): Dictionaries with project, relative source, piper node, and export method.
+
+    Returns:
+        (dictionary): Tuple of project and source path as key, list of entries that share that source as value.
+    """
+    groups = {}
+    for entry in entries:
+        key = (entry[pcfg.project_attribute], entry[pcfg.relative_attribute])
+        groups.setdefault(key, []).append(entry)
+
+    return groups
+
+
+def shard(entries, count):
+    """
+    Splits the given export entries into at most the given count of lists. Entries that share a source file always
+    end up in the same list, and the biggest groups are placed first in the list with the least entries.
+
+    Args:
+        entries (list): Dictionaries with project, relative source, piper node, and export method.
+
+        count (int): Maximum amount of lists to split entries into.
+
+    Returns:
+        (list): Lists of entries, one for each worker.
+    """
+    groups = sorted(groupBySource(entries).values(), key=len, reverse=True)
+    shards = [[] for _ in range(min(count, len(groups)))]
+
+    for group in groups:
+        min(shards, key=len).extend(group)
+
+    return shards
+
+
+def getEntryName(entry):
+    """
+    Gets the name used to identify the given export entry in reports.
+
+    Args:
+        entry (dictionary): Dictionary with project, relative source, piper node, and export method.
+
+    Returns:
+        (string): Package name if the entry has one, else source path and piper node.
+    """
+    return entry.get('package_name') or f'{entry[pcfg.relative_attribute]}|{entry[pcfg.pipernode_attribute]}'
+
+
+def _runShard(dcc_name, version, entries, directory, name):
+    """
+    Exports the given entries in one headless DCC process and reads the report it writes.
+
+    Args:
+        dcc_name (string): Name of DCC to export entries with.
+
+        version (string): Version of DCC to use. If None, will use the latest.
+
+        entries (list): Dictionaries with project, relative source, piper node, and export method.
+
+        directory (string): Directory to write the JSON work list and the process' report in.
+
+        name (string): Unique name of this shard, used to name its files.
+
+    Returns:
+        (dictionary): Worker data with entry results, open and export time of each file, return code, time, and log.
+    """
+    app = dcc.mapping[dcc_name]()
+    json_file = f'{directory}/{name}.json'
+    report_file = f'{directory}/{name}_report.json'
+    python.writeJson(json_file, {dcc_name: entries})
+    start_time = time.perf_counter()
+    worker = {'name': name, 'dcc': dcc_name, 'entries': len(entries), 'results': [], 'files': [], 'returncode': None,
+              'log': ''}
+
+    try:
+        output = app.exportFromJSON(json_file, version=version, report_file=report_file, display=False)
+        worker['returncode'] = output.returncode
+        worker['log'] = (output.stdout or '') + (output.stderr or '')
+
+        if os.path.exists(report_file):
+            report = python.readJson(report_file)
+            worker['results'] = report['results']
+            worker['files'] = report.get('files', [])
+
+    except Exception as error:
+        worker['log'] += f'\n{name} failed to run: {error}'
+
+    finally:
+        [os.remove(path) for path in (json_file, report_file) if os.path.exists(path)]
+
+    worker['time'] = time.perf_counter() - start_time
+    return worker
+
+
+def run(dcc_entries, versions=None, workers=None, retries=pcfg.export_retries):
+    """
+    Exports all the given entries by sharding them across many headless DCC processes running at the same time.
+    Entries that fail, or that a worker never got to, are sharded again and re-tried up to the given retries.
+
+    Args:
+        dcc_entries (dictionary): DCC name as key, list of entry dictionaries to export as value.
+
+        versions (dictionary): DCC name as key, version of DCC to use as value.
+
+        workers (int): Amount of DCC processes to run at once. If None, will use stored count. See getWorkerCount.
+
+        retries (int): How many more times to try exporting entries that failed.
+
+    Returns:
+        (dictionary): Report with results of every entry and every worker, merged together.
+    """
+    versions = versions or {}
+    worker_count = getWorkerCount(workers)
+    directory = piper.core.getTempDirectory()
+    start_time = time.perf_counter()
+    results = {}
+    worker_reports = []
+
+    for dcc_name, entries in dcc_entries.items():
+        pending = entries
+
+        for attempt in range(retries + 1):
+            shards = shard(pending, worker_count)
+
+            # executors need at least one worker, and a DCC with no entries has nothing to export
+            if not shards:
+                break
+
+            names = [f'{dcc_name}_{attempt}_{i}'.replace(' ', '_') for i in range(len(shards))]
+
+            with concurrent.futures.ThreadPoolExecutor(max_workers=len(shards)) as executor:
+                futures = [executor.submit(_runShard, dcc_name, versions.get(dcc_name), entries_shard, directory, name)
+                           for entries_shard, name in zip(shards, names)]
+                attempt_reports = [future.result() for future in futures]
+
+            for worker_report, entries_shard in zip(attempt_reports, shards):
+                worker_report['attempt'] = attempt
+                worker_reports.append(worker_report)
+                reported = {result['name']: result for result in worker_report['results']}
+
+                for entry in entries_shard:
+                    name = getEntryName(entry)
+                    result = reported.get(name, {'name': name, 'success': False,
+                                                 'error': f'{worker_report["name"]} exited before exporting.'})
+                    result['dcc'] = dcc_name
+                    result['attempts'] = attempt + 1
+                    results[name] = result
+
+            pending = [entry for entry in pending if not results[getEntryName(entry)]['success']]
+            if not pending:
+                break
+
+    piper.core.deleteTempDirectory()
+    failed = [name for name, result in results.items() if not result['success']]
+
+    return {'time': time.perf_counter() - start_time,
+            'workers': worker_count,
+            'succeeded': len(results) - len(failed),
+            'failed': failed,
+            'results': results,
+            'worker_reports': worker_reports}
+
+
+def writeReport(report, name='reexport'):
+    """
+    Writes the given report as JSON, and all the worker logs merged into one log file next to it.
+
+    Args:
+        report (dictionary): Report returned by run.
+
+        name (string): Name of the report and log files.
+
+    Returns:
+        (string): Full path to the report file written.
+    """
+    directory = os.path.join(piper.core.getPiperDirectory(), 'settings', pcfg.export_report_directory_name)
+    directory = directory.replace('\\', '/')
+    report_path = f'{directory}/{name}.json'
+    log_path = f'{directory}/{name}.log'
+
+    logs = []
+    worker_reports = []
+    for worker_report in report['worker_reports']:
+        worker_report = dict(worker_report)
+        header = f'{worker_report["name"]} | attempt {worker_report["attempt"] + 1} | ' \
+                 f'return code {worker_report["returncode"]} | {round(worker_report["time"], 3)} seconds'
+        logs.append(f'{"=" * 50}\n{header}\n{"=" * 50}\n{worker_report.pop("log")}')
+        worker_reports.append(worker_report)
+
+    python.writeJson(report_path, dict(report, worker_reports=worker_reports, log=log_path))
+    with open(log_path, 'w') as open_file:
+        open_file.write('\n'.join(logs))
+
+    return report_path
@@ -0,0 +1,186 @@
+#  Copyright (c) Christian Corsica. All Rights Reserved.
+
+import re
+import fnmatch
+
+import piper.config as pcfg
+
+
+class SearchIndex(object):
+    """
+    Case-insensitive index of names that uses trigrams to find substrings without scanning every name.
+    Also supports glob, regular expression, and fuzzy queries based on the prefixes defined in piper.config.
+
+    Example:
+        search_index = SearchIndex([('SM_Chair', 'Props/Meshes'), ('SM_Table', 'Props/Meshes')])
+        search_index.find('chair')  # {'sm_chair'}
+        search_index.find('SM_*')  # {'sm_chair', 'sm_table'}
+        search_index.find('re:^sm_t')  # {'sm_table'}
+        search_index.find('~smchr')  # {'sm_chair'}
+    """
+    def __init__(self, entries=None):
+        """
+        Args:
+            entries (Iterable): Names, or tuples of name and location, to add to the index.
+        """
+        self.names = []  # unique lower case names, index in list is the name's id
+        self.ids = {}  # lower case name as key, id as value
+        self.locations = {}  # lower case name as key, list of locations given for each time name was added
+        self.trigrams = {}  # three characters as key, set of name ids as value
+
+        for entry in entries or ():
+            self.add(*entry) if isinstance(entry, tuple) else self.add(entry)
+
+    def __len__(self):
+        return len(self.names)
+
+    def add(self, name, location=None):
+        """
+        Adds the given name to the index.
+
+        Args:
+            name (string): Name to add, will be searched without case sensitivity.
+
+            location (Any): If given, will be stored with the name. Useful to know where names with matches are.
+        """
+        name = name.lower()
+
+        if location is not None:
+            self.locations.setdefault(name, []).append(location)
+
+        if name in self.ids:
+            return
+
+        name_id = len(self.names)
+        self.names.append(name)
+        self.ids[name] = name_id
+
+        for i in range(len(name) - 2):
+            self.trigrams.setdefault(name[i:i + 3], set()).add(name_id)
+
+    def getLocations(self, name):
+        """
+        Gets the locations stored with the given name.
+
+        Args:
+            name (string): Lower case name to get locations of.
+
+        Returns:
+            (list): Locations given each time the name was added.
+        """
+        return self.locations.get(name, [])
+
+    def findSubstring(self, text):
+        """
+        Finds all the names that have the given text in them. Uses trigrams to narrow down names to check.
+
+        Args:
+            text (string): Text that must be in the name.
+
+        Returns:
+            (set): Lower case names that contain the given text.
+        """
+        text = text.lower()
+
+        # names with less than three characters can't be narrowed down by trigrams
+        if len(text) < 3:
+            return {name for name in self.names if text in name}
+
+        postings = []
+        for i in range(len(text) - 2):
+            posting = self.trigrams.get(text[i:i + 3])
+
+            if not posting:
+                return set()
+
+            postings.append(posting)
+
+        # intersecting smallest sets first keeps the candidates small
+        postings.sort(key=len)
+        candidates = set(postings[0])
+        for posting in postings[1:]:
+            candidates &= posting
+
+            if not candidates:
+                return set()
+
+        return {self.names[name_id] for name_id in candidates if text in self.names[name_id]}
+
+    def findPattern(self, pattern):
+        """
+        Finds all the names that the given compiled regular expression searches successfully.
+
+        Args:
+            pattern (re.Pattern): Compiled regular expression to search names with.
+
+        Returns:
+            (set): Lower case names that match the given pattern.
+        """
+        search = pattern.search
+        return {name for name in self.names if search(name)}
+
+    def findGlob(self, text):
+        """
+        Finds all the names that match the given glob, such as "sm_*_low".
+
+        Args:
+            text (string): Glob to match whole name with.
+
+        Returns:
+            (set): Lower case names that match the given glob.
+        """
+        return self.findPattern(re.compile(fnmatch.translate(text.lower())))
+
+    def findRegex(self, text):
+        """
+        Finds all the names that the given regular expression searches successfully, ignoring case.
+
+        Args:
+            text (string): Regular expression to search names with.
+
+        Returns:
+            (set): Lower case names that match the given regular expression.
+        """
+        return self.findPattern(re.compile(text, re.IGNORECASE))
+
+    def findFuzzy(self, text):
+        """
+        Finds all the names that have all the characters of the given text in the same order, such as "smchr" matching
+        "sm_chair".
+
+        Args:
+            text (string): Characters that must be in the name in order.
+
+        Returns:
+            (set): Lower case names that match the given text.
+        """
+        characters = [character for character in text.lower() if not character.isspace()]
+        if not characters:
+            return set(self.names)
+
+        # "[^b]*b" instead of ".*?b" so that names that do not match fail without backtracking
+        pattern = re.escape(characters[0]) + ''.join([f'[^{re.escape(c)}]*{re.escape(c)}' for c in characters[1:]])
+        return self.findPattern(re.compile(pattern))
+
+    def find(self, query):
+        """
+        Finds all the names that match the given query. Query type is based on its prefix or characters:
+        regex prefix uses regular expressions, fuzzy prefix uses fuzzy search, glob characters use glob matching,
+        anything else looks for names that contain the query.
+
+        Args:
+            query (string): Text to search for.
+
+        Returns:
+            (set): Lower case names that match the given query.
+        """
+        if query.startswith(pcfg.search_regex_prefix):
+            return self.findRegex(query[len(pcfg.search_regex_prefix):])
+
+        if query.startswith(pcfg.search_fuzzy_prefix):
+            return self.findFuzzy(query[len(pcfg.search_fuzzy_prefix):])
+
+        if any([character in query for character in pcfg.search_glob_characters]):
+            return self.findGlob(query)
+
+        return self.findSubstring(query)
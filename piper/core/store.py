@@ -2,6 +2,9 @@
 
 import os
 import copy
+import atexit
+import threading
+from collections import OrderedDict
 
 import piper.core
 import piper.config as pcfg
@@ -10,6 +13,13 @@ import piper.core.pythoner as python
 
 
 class Store(object):
+    """
+    Settings that persist through sessions, stored as a .json file per app.
+    Changes are written behind: setting a variable marks the store dirty, and the settings are written once, after
+    pcfg.store_write_delay seconds, no matter how many variables changed in between. Dirty settings are also written at
+    exit. Writes are atomic, and if another session wrote the file since this store read it, the other session's
+    changes are merged in instead of overwritten.
+    """
     # turning store into a singleton
     instance = None
 
@@ -20,6 +30,13 @@ class Store(object):
         self._path = None
         self._settings = {}
         self._default_settings = copy.deepcopy(defaults)
+        self._written = {}  # settings as they are on disk, used to know which settings this session changed
+        self._disk_time = None  # modified time of file when it was last read or written, in nanoseconds
+        self._is_dirty = False
+        self._timer = None
+        self._lock = threading.RLock()
+        self.write_delay = pcfg.store_write_delay  # 0 writes right away
+        atexit.register(self.flush)
 
     def getVersion(self):
         """
@@ -58,6 +75,18 @@ class Store(object):
         self._path = os.path.join(piper_directory, 'settings', app + '.json')
         return self._path
 
+    def getSidecarPath(self, suffix):
+        """
+        Gets the path to a .json file next to the stored settings file, for data too big to keep in the settings.
+
+        Args:
+            suffix (string): Text to add to the settings file name.
+
+        Returns:
+            (string): Path to the sidecar file.
+        """
+        return os.path.splitext(self.getPath())[0] + suffix + '.json'
+
     def create(self, force=False):
         """
         Writes the defaults settings.
@@ -69,7 +98,7 @@ class Store(object):
             raise ValueError('Settings already exist! Please pass "force" as True to overwrite.')
 
         self._settings = copy.deepcopy(self._default_settings)
-        python.writeJson(self.getPath(), self._settings)
+        self.flush(force=True)
 
     def getSettings(self):
         """
@@ -84,7 +113,8 @@ class Store(object):
 
         settings_path = self.getPath()
         if os.path.exists(settings_path):
-            self._settings = python.readJson(settings_path)
+            self._settings = self._read()
+            self._written = copy.deepcopy(self._settings)
             return self._settings
 
         self.create()
@@ -141,16 +171,18 @@ class Store(object):
 
             value (Any): Value of given variable to store.
 
-            write (boolean): If True, will write settings to file. Useful to turn off when setting multiple variables
-            to avoid calling writing to file multiple times. If False, should call writeSettings after store.set()
+            write (boolean): If True, will write settings to file once the write delay passes. If False, settings are
+            only written by the next write, at exit, or by calling writeSettings after store.set()
         """
         if not self._settings:
             self.getSettings()
 
-        self._settings[variable] = value
+        with self._lock:
+            self._settings[variable] = value
+            self._is_dirty = True
 
         if write:
-            self.writeSettings()
+            self.scheduleWrite()
 
     def update(self, data):
         """
@@ -162,14 +194,221 @@ class Store(object):
         if not self._settings:
             self.getSettings()
 
-        self._settings.update(data)
-        self.writeSettings()
+        with self._lock:
+            self._settings.update(data)
+            self._is_dirty = True
+
+        self.scheduleWrite()
+
+    def _getDiskTime(self):
+        """
+        Gets the modified time of the settings file.
+
+        Returns:
+            (int or None): Modified time in nanoseconds, None if file does not exist.
+        """
+        try:
+            return os.stat(self.getPath()).st_mtime_ns
+        except OSError:
+            return None
+
+    def _read(self):
+        """
+        Reads the settings file, keeping track of when it was modified.
+
+        Returns:
+            (dictionary): Settings on disk.
+        """
+        self._disk_time = self._getDiskTime()
+        return python.readJson(self.getPath())
+
+    def merge(self):
+        """
+        Merges the settings another session wrote to disk since this store last read or wrote them. Settings this
+        session changed keep this session's value, the rest take the value on disk.
+        """
+        with self._lock:
+            disk_settings = self._read()
+            changed = {key for key, value in self._settings.items()
+                       if key not in self._written or self._written[key] != value}
+
+            for key, value in disk_settings.items():
+                if key not in changed:
+                    self._settings[key] = value
+
+    def scheduleWrite(self):
+        """
+        Writes the settings once the write delay passes, unless a write is already scheduled.
+        """
+        if self.write_delay <= 0:
+            self.flush()
+            return
+
+        with self._lock:
+            if self._timer:
+                return
+
+            self._timer = threading.Timer(self.write_delay, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def flush(self, force=False):
+        """
+        Writes the settings to disk if they changed, merging in any changes another session made first.
+
+        Args:
+            force (boolean): If True, will write settings even if store is not dirty, such as when a setting was
+            changed in place.
+        """
+        with self._lock:
+            if self._timer:
+                self._timer.cancel()
+                self._timer = None
+
+            if not self._settings or not (self._is_dirty or force):
+                return
+
+            disk_time = self._getDiskTime()
+            if disk_time is not None and disk_time != self._disk_time:
+                self.merge()
+
+            # flush runs on the timer's thread, so write a copy that the main thread can't change while it is written
+            settings = self._snapshot()
+            python.writeJson(self.getPath(), settings, atomic=True)
+            self._written = settings
+            self._disk_time = self._getDiskTime()
+            self._is_dirty = False
+
+    def _snapshot(self, attempts=pcfg.store_snapshot_attempts):
+        """
+        Deep copies the settings. Settings gotten with get can be changed in place by another thread while they are
+        copied, in which case copying is tried again.
+
+        Args:
+            attempts (int): Most times to try copying the settings.
+
+        Returns:
+            (dictionary): Copy of the settings.
+        """
+        for attempt in range(attempts):
+            try:
+                return copy.deepcopy(self._settings)
+            except RuntimeError:
+                if attempt == attempts - 1:
+                    raise
 
     def writeSettings(self):
         """
-        Convenience method for writing settings to disk file.
+        Convenience method for writing settings to disk file right away.
         """
-        python.writeJson(self.getPath(), self._settings)
+        self.flush(force=True)
+
+
+class ExpandedDirectories(object):
+    """
+    Directories expanded in the Browser of each project, relative to the project's art directory, stored in their own
+    sidecar file so that they don't grow the settings file. Each project keeps its most recently expanded directories,
+    and only the most recently used projects are kept, so the file stays the same size no matter how it is used.
+    """
+    def __init__(self, path, directories_limit=pcfg.expanded_directories_limit,
+                 projects_limit=pcfg.expanded_projects_limit):
+        """
+        Args:
+            path (string): Path to sidecar .json file.
+
+            directories_limit (int): Most directories each project keeps.
+
+            projects_limit (int): Most projects kept.
+        """
+        self.path = path
+        self.directories_limit = directories_limit
+        self.projects_limit = projects_limit
+        self._projects = None  # project as key, relative directories as value, ordered from least recently used
+        self._disk_time = None
+
+    def _getDiskTime(self):
+        """
+        Gets the modified time of the sidecar file.
+
+        Returns:
+            (int or None): Modified time in nanoseconds, None if file does not exist.
+        """
+        try:
+            return os.stat(self.path).st_mtime_ns
+        except OSError:
+            return None
+
+    def load(self):
+        """
+        Reads the sidecar file if it has not been read yet.
+
+        Returns:
+            (OrderedDict): Project as key, relative directories as value.
+        """
+        if self._projects is not None:
+            return self._projects
+
+        self._disk_time = self._getDiskTime()
+        self._projects = OrderedDict(python.readJson(self.path, hook=OrderedDict) if self._disk_time else {})
+        return self._projects
+
+    def has(self, project):
+        """
+        Gets whether the given project has stored directories.
+
+        Args:
+            project (string): Name of project.
+
+        Returns:
+            (boolean): True if project has been stored before.
+        """
+        return project in self.load()
+
+    def get(self, project):
+        """
+        Gets the expanded directories of the given project.
+
+        Args:
+            project (string): Name of project.
+
+        Returns:
+            (list): Directories relative to the art directory, from least to most recently expanded.
+        """
+        return list(self.load().get(project, []))
+
+    def set(self, project, directories):
+        """
+        Stores the given expanded directories of the given project, writing the sidecar file only if they changed.
+
+        Args:
+            project (string): Name of project.
+
+            directories (list): Directories relative to the art directory, from least to most recently expanded.
+
+        Returns:
+            (boolean): True if sidecar file was written.
+        """
+        projects = self.load()
+        directories = list(dict.fromkeys(directories))[-self.directories_limit:]
+        is_last = next(reversed(projects), None) == project
+
+        if is_last and projects[project] == directories:
+            return False
+
+        # another session may have written other projects since this one read the file
+        if self._getDiskTime() != self._disk_time:
+            self._projects = None
+            projects = self.load()
+
+        projects.pop(project, None)
+        projects[project] = directories
+
+        while len(projects) > self.projects_limit:
+            projects.popitem(last=False)
+
+        python.writeJson(self.path, projects, indent=None, atomic=True)
+        self._disk_time = self._getDiskTime()
+        return True
 
 
 def get():
@@ -4,9 +4,14 @@ import os
 import copy
 
 import pymel.core as pm
+import maya.api.OpenMaya as om2
+
+try:
+    import numpy
+except ImportError:
+    numpy = None  # scale is compared in pure python when numpy is not available
 
 import piper.config.maya as mcfg
-import piper.mayapy.rig.xform as xform
 import piper.mayapy.rig.control as control
 import piper.mayapy.selection as selection
 from piper.mayapy.pipe.paths import maya_paths
@@ -73,30 +78,111 @@ def referenceRig(path):
     return references
 
 
-def _validateScale(transform, keyframe, failed, display=pm.warning):
+def sampleScale(transforms, frames):
     """
-    Validates the scale of the given transform on the given key and adds it to a dictionary with "scale" as key, and
-    a set as its value.
+    Gets the scale of all the given transforms on all the given frames. Each frame is evaluated once in its own DG
+    context instead of changing the current time, so the rest of the scene is not evaluated.
 
     Args:
-        transform (pm.nodetypes.Transform): Transform to validate uniform scale.
+        transforms (list): pm.nodetypes.Transform nodes to get scale of.
+
+        frames (list): Frames to get scale on.
+
+    Returns:
+        (numpy.ndarray or list): Scale with (frames, transforms, 3) shape. List of lists if numpy is not available.
+    """
+    selection_list = om2.MSelectionList()
+    [selection_list.add(transform.name()) for transform in transforms]
+    plugs = []
+
+    for i in range(len(transforms)):
+        node = om2.MFnDependencyNode(selection_list.getDependNode(i))
+        plugs.append([node.findPlug(axis, False) for axis in ('scaleX', 'scaleY', 'scaleZ')])
+
+    unit = om2.MTime.uiUnit()
+    samples = []
+
+    for frame in frames:
+        previous = om2.MDGContext(om2.MTime(frame, unit)).makeCurrent()
+
+        try:
+            samples.append([[plug.asDouble() for plug in axes] for axes in plugs])
+        finally:
+            previous.makeCurrent()
 
-        keyframe (float or int): Keyframe to check for uniform scale.
+    return numpy.array(samples, dtype=float) if numpy else samples
 
-        failed (dictionary): Must have a "scale" key with a set as its value to add possible transform to.
 
-        display (method): How to display a transform that is not uniformly scaled.
+def toFrameRanges(frames, failing):
+    """
+    Groups the given frames that failed into ranges of consecutive samples.
+
+    Args:
+        frames (list): Frames that were sampled, in order.
+
+        failing (list): Boolean for each frame, True if frame failed.
 
     Returns:
-        (boolean): True if transform is uniformly scaled.
+        (list): Tuples of first and last frame of each range that failed.
     """
-    if xform.isUniformlyScaled(transform):
-        return True
+    ranges = []
+    previous = None
+
+    for i, (frame, has_failed) in enumerate(zip(frames, failing)):
+        if not has_failed:
+            continue
 
-    failed['scale'].add(transform)
-    text = '{0} has non-uniform scale on frame {1}'
-    display(text.format(transform.name(), str(keyframe)))
-    return False
+        if previous is not None and previous == i - 1:
+            ranges[-1] = (ranges[-1][0], frame)
+        else:
+            ranges.append((frame, frame))
+
+        previous = i
+
+    return ranges
+
+
+def getNonUniformScale(transforms, frames, precision=mcfg.scale_precision):
+    """
+    Gets the frames where each of the given transforms is not uniformly scaled. All the transforms are sampled on all
+    the frames at once, and compared with numpy when it is available.
+
+    Args:
+        transforms (list): pm.nodetypes.Transform nodes to check for uniform scale.
+
+        frames (list): Frames to check, in order.
+
+        precision (int): Decimals scale values are rounded to before comparing them.
+
+    Returns:
+        (dictionary): Transform as key, list of tuples with first and last frame of each failing range as value.
+        Transforms that are uniformly scaled on all frames are not included.
+    """
+    transforms = list(transforms)
+    frames = list(frames)
+
+    if not transforms or not frames:
+        return {}
+
+    samples = sampleScale(transforms, frames)
+
+    if numpy:
+        rounded = numpy.round(samples, precision)
+        failing = (rounded[..., 0] != rounded[..., 1]) | (rounded[..., 1] != rounded[..., 2])
+        failing = failing.T.tolist()  # (transforms, frames)
+    else:
+        failing = [[not (round(x, precision) == round(y, precision) == round(z, precision)) for x, y, z in frame]
+                   for frame in samples]
+        failing = [list(transform_failing) for transform_failing in zip(*failing)]
+
+    ranges = {}
+    for transform, transform_failing in zip(transforms, failing):
+        frame_ranges = toFrameRanges(frames, transform_failing)
+
+        if frame_ranges:
+            ranges[transform] = frame_ranges
+
+    return ranges
 
 
 def isUniformlyScaled(transform, start=None, end=None, resume=True):
@@ -115,24 +201,13 @@ def isUniformlyScaled(transform, start=None, end=None, resume=True):
     Returns:
         (boolean): True if uniformly scaled across all keyframes.
     """
-    pm.refresh(suspend=True)
-    is_uniformly_scaled = True
-    current_time = pm.currentTime()
-
     if start is None:
         start = int(pm.playbackOptions(q=True, min=True))
 
     if end is None:
         end = int(pm.playbackOptions(q=True, max=True))
 
-    for keyframe in range(start, end):
-        pm.currentTime(keyframe)
-
-        if not xform.isUniformlyScaled(transform):
-            is_uniformly_scaled = False
-            break
-
-    pm.currentTime(current_time)
+    is_uniformly_scaled = not getNonUniformScale([transform], range(start, end))
     pm.refresh(suspend=not resume)
     return is_uniformly_scaled
 
@@ -151,20 +226,19 @@ def health(namespaces=None, resume=True, scale_display=pm.warning):
     Returns:
         (dictionary): Error causing nodes.
     """
-    failed_default = {'scale': set()}
+    failed_default = {'scale': set(), 'scale_ranges': {}}
     failed = copy.deepcopy(failed_default)
-    pm.refresh(suspend=True)
 
-    current_time = pm.currentTime()
+    # every control is checked on every frame that any control has a scale key on, and on frame 0
     controls = control.getAll(namespaces)
-    keys = key.getAll(controls, 's')
-    keys[0.0] = controls
+    frames = sorted(set(key.getAll(controls, 's')) | {0.0})
 
-    for keyframe, scaled_controls in keys.items():
-        pm.currentTime(keyframe)
-        [_validateScale(ctrl, keyframe, failed, scale_display) for ctrl in scaled_controls]
+    for ctrl, ranges in getNonUniformScale(controls, frames).items():
+        failed['scale'].add(ctrl)
+        failed['scale_ranges'][ctrl] = ranges
+        text = ', '.join(str(first) if first == last else f'{first}-{last}' for first, last in ranges)
+        scale_display(f'{ctrl.name()} has non-uniform scale on frame(s) {text}')
 
-    pm.currentTime(current_time)
     pm.refresh(suspend=not resume)
 
     errors = {} if failed == failed_default else failed
@@ -1,9 +1,299 @@
 #  Copyright (c) Christian Corsica. All Rights Reserved.
 
+import math
+import bisect
+from array import array
+
 import pymel.core as pm
+import maya.cmds as cmds
+import maya.api.OpenMaya as om2
+import maya.api.OpenMayaAnim as oma
+
 import piper.mayapy.rig.control as control
 
 
+class KeyIndex(object):
+    """
+    Sorted key times of every animated attribute of every control, built the first time a control is asked about and
+    kept up to date by anim curve callbacks, so that health checks, exports, and key tools don't query every control
+    every time they run.
+
+    Example:
+        key_index.getAll(controls, 's')  # {0.0: {ctrl_a}, 12.0: {ctrl_a, ctrl_b}}
+        key_index.getControlsAt(12, controls)  # {ctrl_a, ctrl_b}
+        key_index.getTimes(controls, start=0, end=24)  # [0.0, 12.0, 24.0]
+        key_index.getNonInteger(controls)  # {ctrl_a: {'translateX': [12.5]}}
+    """
+    def __init__(self):
+        self.keys = {}  # control as key, dictionary of attribute as key, tuple of parent attribute and times as value
+        self.controls = {}  # MObjectHandle hash code as key, control as value, used to find controls from callbacks
+        self.dirty = set()  # controls whose curves changed since they were indexed
+        self.names = {}  # attribute name as given as key, long name as value
+        self.callbacks = []  # IDs of the Maya callbacks registered, removed with close
+
+    def clear(self, *_):
+        """
+        Forgets every control indexed, so they are indexed again the next time they are asked about.
+        """
+        self.keys = {}
+        self.controls = {}
+        self.dirty = set()
+
+    def addCallbacks(self):
+        """
+        Adds the callbacks that keep the index up to date, if they have not been added yet. Callbacks are removed when
+        the scene changes, and added again the next time a control is indexed.
+        """
+        if self.callbacks:
+            return
+
+        self.callbacks = [oma.MAnimMessage.addAnimCurveEditedCallback(self.onCurvesEdited),
+                          om2.MDGMessage.addNodeAddedCallback(self.clear, 'animCurve'),
+                          om2.MDGMessage.addNodeRemovedCallback(self.clear, 'animCurve'),
+                          om2.MSceneMessage.addCallback(om2.MSceneMessage.kBeforeOpen, self.close),
+                          om2.MSceneMessage.addCallback(om2.MSceneMessage.kBeforeNew, self.close)]
+
+    def close(self, *_):
+        """
+        Removes the callbacks that keep the index up to date, and clears the index since it can't be trusted anymore.
+        """
+        if self.callbacks:
+            om2.MMessage.removeCallbacks(self.callbacks)
+            self.callbacks = []
+
+        self.clear()
+
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass  # Maya may already be shutting down
+
+    def onCurvesEdited(self, curves, *_):
+        """
+        Called when anim curves are edited. Marks the controls they drive as dirty. Curves that drive other nodes,
+        such as pair blends, could drive any control, so the whole index is cleared.
+
+        Args:
+            curves (om2.MObjectArray): Anim curves edited.
+        """
+        for i in range(len(curves)):
+            output = om2.MFnDependencyNode(curves[i]).findPlug('output', False)
+
+            for destination in output.destinations():
+                ctrl = self.controls.get(om2.MObjectHandle(destination.node()).hashCode())
+
+                if ctrl is not None:
+                    self.dirty.add(ctrl)
+                elif not destination.node().hasFn(om2.MFn.kDagNode):
+                    self.clear()
+                    return
+
+    def update(self, controls):
+        """
+        Indexes the given controls that have not been indexed yet, or whose curves changed since they were indexed.
+        All of them are found with one query.
+
+        Args:
+            controls (Iterable): Controls to index.
+        """
+        self.addCallbacks()
+        missing = [ctrl for ctrl in controls if ctrl not in self.keys or ctrl in self.dirty]
+
+        if not missing:
+            return
+
+        selection_list = om2.MSelectionList()
+        [selection_list.add(ctrl.name()) for ctrl in missing]
+        by_hash = {}
+
+        for i, ctrl in enumerate(missing):
+            hash_code = om2.MObjectHandle(selection_list.getDependNode(i)).hashCode()
+            by_hash[hash_code] = ctrl
+            self.controls[hash_code] = ctrl
+            self.keys[ctrl] = {}
+            self.dirty.discard(ctrl)
+
+        unit = om2.MTime.uiUnit()
+        for plug in oma.MAnimUtil.findAnimatedPlugs(selection_list):
+            ctrl = by_hash.get(om2.MObjectHandle(plug.node()).hashCode())
+            if ctrl is None:
+                continue
+
+            times = []
+            for curve in oma.MAnimUtil.findAnimation(plug):
+                curve = oma.MFnAnimCurve(curve)
+
+                if not curve.isUnitlessInput:
+                    times += [curve.input(i).asUnits(unit) for i in range(curve.numKeys)]
+
+            if times:
+                name = om2.MFnAttribute(plug.attribute()).name
+                parent = om2.MFnAttribute(plug.parent().attribute()).name if plug.isChild else None
+                self.keys[ctrl][name] = (parent, array('d', sorted(set(times))))
+
+    def getLongName(self, ctrl, attr):
+        """
+        Gets the long name of the given attribute, such as "scale" for "s".
+
+        Args:
+            ctrl (pm.nodetypes.Transform): Control that has the given attribute.
+
+            attr (string): Short or long name of attribute.
+
+        Returns:
+            (string): Long name of attribute.
+        """
+        if attr not in self.names:
+            self.names[attr] = ctrl.attr(attr).attrName(longName=True)
+
+        return self.names[attr]
+
+    def getCurves(self, ctrl, attr=None):
+        """
+        Gets the sorted key times of each animated attribute of the given control.
+
+        Args:
+            ctrl (pm.nodetypes.Transform): Control to get key times of.
+
+            attr (string): If given, only gets the given attribute and its children, such as "translateX" for "t".
+
+        Returns:
+            (dictionary): Attribute long name as key, array of sorted key times as value.
+        """
+        self.update([ctrl])
+        curves = self.keys[ctrl]
+
+        if not attr:
+            return {name: times for name, (_, times) in curves.items()}
+
+        attr = self.getLongName(ctrl, attr)
+        return {name: times for name, (parent, times) in curves.items() if attr in (name, parent)}
+
+    def getKeys(self, ctrl, attr=None):
+        """
+        Gets all the key times of the given control.
+
+        Args:
+            ctrl (pm.nodetypes.Transform): Control to get key times of.
+
+            attr (string): If given, only gets the key times of the given attribute and its children.
+
+        Returns:
+            (list): Sorted key times.
+        """
+        return sorted(set().union(*self.getCurves(ctrl, attr).values()))
+
+    def getAll(self, controls=None, attr=None):
+        """
+        Gets all the keys that all the given controls have.
+
+        Args:
+            controls (Iterable): Controls to check for keys. If None given, uses all controls.
+
+            attr (string): If given, gets only the keys where the given attr is keyed.
+
+        Returns:
+            (dictionary): Keyframes as key, set of controls keyed on that frame as value.
+        """
+        controls = controls or control.getAll()
+        self.update(controls)
+        keys = {}
+
+        for ctrl in controls:
+            [keys.setdefault(time, set()).add(ctrl) for time in self.getKeys(ctrl, attr)]
+
+        return keys
+
+    def getControlsAt(self, frame, controls=None, attr=None):
+        """
+        Gets the controls that have a key on the given frame.
+
+        Args:
+            frame (float): Frame to look for keys on.
+
+            controls (Iterable): Controls to check. If None given, uses all controls.
+
+            attr (string): If given, only checks the given attribute and its children.
+
+        Returns:
+            (set): Controls keyed on the given frame.
+        """
+        controls = controls or control.getAll()
+        self.update(controls)
+        keyed = set()
+
+        for ctrl in controls:
+            for times in self.getCurves(ctrl, attr).values():
+                index = bisect.bisect_left(times, frame)
+
+                if index < len(times) and times[index] == frame:
+                    keyed.add(ctrl)
+                    break
+
+        return keyed
+
+    def getTimes(self, controls=None, start=None, end=None, attr=None):
+        """
+        Gets the union of the key times of all the given controls between the given start and end frames.
+
+        Args:
+            controls (Iterable): Controls to get key times of. If None given, uses all controls.
+
+            start (float): First frame to include. If None given, includes all keys before end.
+
+            end (float): Last frame to include. If None given, includes all keys after start.
+
+            attr (string): If given, only gets the key times of the given attribute and its children.
+
+        Returns:
+            (list): Sorted key times.
+        """
+        controls = controls or control.getAll()
+        self.update(controls)
+        times = set()
+
+        for ctrl in controls:
+            for curve_times in self.getCurves(ctrl, attr).values():
+                first = 0 if start is None else bisect.bisect_left(curve_times, start)
+                last = len(curve_times) if end is None else bisect.bisect_right(curve_times, end)
+                times.update(curve_times[first:last])
+
+        return sorted(times)
+
+    def getNonInteger(self, controls=None, attr=None):
+        """
+        Gets the keys that are not on a whole frame.
+
+        Args:
+            controls (Iterable): Controls to check. If None given, uses all controls.
+
+            attr (string): If given, only checks the given attribute and its children.
+
+        Returns:
+            (dictionary): Control as key, dictionary of attribute long name as key and list of key times as value.
+        """
+        controls = controls or control.getAll()
+        self.update(controls)
+        keys = {}
+
+        for ctrl in controls:
+            for name, times in self.getCurves(ctrl, attr).items():
+                decimals = [time for time in times if time % 1]
+
+                if decimals:
+                    keys.setdefault(ctrl, {})[name] = decimals
+
+        return keys
+
+
+# reloading this module runs it again in the same globals, so the index it made before must stop listening first
+if 'key_index' in globals():
+    key_index.close()
+
+key_index = KeyIndex()
+
+
 def getAll(controls=None, attr=None):
     """
     Gets all the keys that all the given controls have.
@@ -16,22 +306,7 @@ def getAll(controls=None, attr=None):
     Returns:
         (dictionary): Keyframes as key, controls as values.
     """
-    keys = {}
-
-    if not controls:
-        controls = control.getAll()
-
-    for ctrl in controls:
-        keys_to_get = ctrl.attr(attr) if attr else ctrl
-        ctrl_keys = set(pm.keyframe(keys_to_get, q=True))
-        for key in ctrl_keys:
-
-            if key not in keys:
-                keys[key] = set()
-
-            keys[key].add(ctrl)
-
-    return keys
+    return key_index.getAll(controls, attr)
 
 
 def toggleStepped():
@@ -53,38 +328,64 @@ def toggleStepped():
         pm.error('Default in Tangents are not both autoease or clamped/stepped')
 
 
-def deleteDecimals():
+def _getSelectedCurveKeys():
     """
-    Credit to Alex Tavener: www.alextavener.co.uk
-    Deletes any keys that are not on a whole frame on selected curves.
+    Gets the key times of the anim curves with selected keys, or of the anim curves of the selected nodes.
+
+    Returns:
+        (dictionary): Anim curve name as key, list of selected key times, or all key times if none selected, as value.
+    """
+    keys = {}
+    for curve in cmds.keyframe(q=True, name=True) or []:
+        keys[curve] = cmds.keyframe(curve, q=True, selected=True) or cmds.keyframe(curve, q=True) or []
+
+    return keys
+
+
+def _getControlKeys(controls):
+    """
+    Gets the key times that are not on a whole frame of the given controls, from the key index.
+
+    Args:
+        controls (Iterable): Controls to get keys of.
+
+    Returns:
+        (dictionary): Plug name as key, list of key times not on a whole frame as value.
     """
-    curves = pm.keyframe(q=True, n=True, sl=1) or []
-    for curve in curves:
+    return {ctrl.name() + '.' + name: times
+            for ctrl, attributes in key_index.getNonInteger(controls).items() for name, times in attributes.items()}
 
-        keys = pm.keyframe(curve, q=True, tc=1, vc=True) or []
-        pm.selectKey(clear=1)
 
-        time = [keys[i][0] for i in range(0, len(keys))]
-        [pm.cutKey(time=(time[i], time[i])) for i in range(len(time)) if str(time[i])[-1] != '0']
+def deleteDecimals(controls=None):
+    """
+    Credit to Alex Tavener: www.alextavener.co.uk
+    Deletes any keys that are not on a whole frame on the given controls, or on selected curves if none given.
+
+    Args:
+        controls (Iterable): Controls to delete keys of, uses the key index. If None given, uses selected curves.
+    """
+    if controls:
+        keys = _getControlKeys(controls)
+    else:
+        curves = cmds.keyframe(q=True, name=True, selected=True) or []
+        keys = {curve: [time for time in cmds.keyframe(curve, q=True) or [] if time % 1] for curve in curves}
+
+    # each curve cuts all its decimal keys at once
+    [cmds.cutKey(curve, time=[(time, time) for time in times], clear=True) for curve, times in keys.items() if times]
 
 
-def roundAll():
+def roundAll(controls=None):
     """
-    Rounds all keyframes not in whole number frames to their nearest whole frame number value.
+    Moves all keyframes not in whole number frames to the whole frame before them.
+
+    Args:
+        controls (Iterable): Controls to move keys of, uses the key index. If None given, uses the selected keys, or
+        all the keys of the curves of the selected nodes.
     """
-    # don't feel like converting this to python right now, so leaving as is.
-    command = """// get all selected anim curves or anim curves attached to the selection
-string $animCurves[] = `keyframe -q -name`;
-for ($animCurve in $animCurves) // browse them
-    {
-    // get all selected keys at this curve
-    float $thisKeys[] = `keyframe -q -sl $animCurve`;
-    if (!size($thisKeys)) // if no keys selected get all keys
-        $thisKeys = `keyframe -q $animCurve`;
-    for ($keys in $thisKeys) // browse the keys
-        {
-        if (`fmod $keys 1` != 0) // if the keys have decimal places move them to the rounded keytime
-            keyframe -e -t $keys -iub true -a -o over -timeChange (floor($keys)) $animCurve;
-        }
-        }"""
-    pm.mel.eval(command)
+    keys = _getControlKeys(controls) if controls else _getSelectedCurveKeys()
+
+    for curve, times in keys.items():
+        for time in times:
+            if time % 1:
+                cmds.keyframe(curve, e=True, time=(time, time), includeUpperBound=True, absolute=True,
+                              option='over', timeChange=math.floor(time))
@@ -4,9 +4,14 @@ import os
 import abc
 import sys
 import json
+import time
+import inspect
 import shutil
+import tempfile
+import traceback
 
 import pymel.core as pm
+import maya.cmds as cmds
 
 import piper.config as pcfg
 import piper.config.maya as mcfg
@@ -15,6 +20,11 @@ import piper.core.filer as filer
 import piper.core.pather as pather
 import piper.core.pythoner as python
 import piper.core.fbx_sdk as fbx_sdk
+import piper.core.fbx_file as fbx_file
+import piper.core.export_cache as export_cache
+import piper.core.export_profiler as export_profiler
+import piper.core.perforce as perforce
+import piper.core.scheduler as scheduler
 from piper.core.dcc.template.export import ExportDCC
 
 import piper.mayapy.rig as rig
@@ -26,12 +36,51 @@ import piper.mayapy.plugin as plugin
 import piper.mayapy.selection as selection
 import piper.mayapy.pipe.fbxpreset as fbxpreset
 from piper.mayapy.pipe.paths import maya_paths
+from piper.mayapy.pipe.skeleton import ExportSkeleton
 from piper.mayapy.settings import setStartupWorkspace
 from piper.mayapy.pipe.store import maya_store
 
 
 # Assign ABC based on version
 ABC = abc.ABC if sys.version_info >= (3, 4) else abc.ABCMeta('ABC', (), {})
+batch_source_hashes = {}  # scene path as key, hash of scene as value, for scenes only opened to batch export
+profiler = export_profiler.export_profiler
+
+
+def hashScene(scene_path):
+    """
+    Hashes the given scene file along with every file it references, such as rigs and skeletons, so that changing a
+    referenced file changes the hash of the scene that references it.
+
+    Args:
+        scene_path (string): Path to the open scene.
+
+    Returns:
+        (string): Hash of the scene and all its references.
+    """
+    references = sorted({str(reference.path) for reference in pm.listReferences(recursive=True)})
+    hashes = [[path, export_cache.hashFile(path) if os.path.isfile(path) else None] for path in references]
+    return export_cache.hashData(export_cache.hashFile(scene_path), hashes)
+
+
+def hashMethod(method):
+    """
+    Hashes the code of the module the given method is in, such as an FBX preset, since the values presets set, or that
+    the functions they call set, can't be read back without running them. Editing any option of a preset changes the
+    hash, so the files exported with the old options are not skipped.
+
+    Args:
+        method (method): Function to hash, such as fbxpreset.mesh.
+
+    Returns:
+        (string): Hash of the module's source file, or of the method's code if module has no source file.
+    """
+    path = getattr(inspect.getmodule(method), '__file__', None)
+    if path and os.path.isfile(path):
+        return export_cache.hashFile(path)
+
+    code = getattr(method, '__code__', None)
+    return export_cache.hashData(code.co_code, code.co_consts) if code else None
 
 
 class Export(ABC):
@@ -43,7 +92,12 @@ class Export(ABC):
         self.animation_settings = None
         self.animation_errors = {}
         self.export_method = self._write
+        self.export_path_method = None  # gets the path export method writes the given file name to. Needed to split.
         self.source_method = None  # method that instantiates this class and calls export method. Needed for metadata.
+        self.split_clips = False  # if True, clips are cut out of one export of all their frames, when class can
+        self.use_cache = mcfg.use_export_cache
+        self.source_hash = None  # hash of the saved scene, None if scene was not saved or had unsaved changes
+        self.is_source_hashed = False
 
     @abc.abstractmethod
     def write(self, export_path, settings):
@@ -60,6 +114,8 @@ class Export(ABC):
     def _write(self, export_path, settings, *_, **__):
         """
         Called to write file after verifying directory exists, and posts results after export.
+        If the export cache is used, exports whose inputs did not change are skipped, and files written with the same
+        content as before are not checked out.
 
         Args:
             export_path (string): Path to export to.
@@ -69,11 +125,210 @@ class Export(ABC):
         Returns:
             (string): Path where file wrote to.
         """
+        if not self.use_cache:
+            self.onStart(export_path)
+            with profiler.phase('write', export_path):
+                self.write(export_path, settings)  # this is where the export actually happens
+            self.onFinished(export_path)
+            return export_path
+
+        with profiler.phase('cache_check', export_path):
+            inputs_hash = self.getInputsHash(export_path, settings)
+            is_current = export_cache.export_cache.isCurrent(export_path, inputs_hash)
+            previous_hash = None if is_current else export_cache.export_cache.getContentHash(export_path,
+                                                                                              self.hashContent)
+
+        if is_current:
+            pm.displayInfo(f'{export_path} is up to date, skipping export.')
+            return export_path
+
         self.onStart(export_path)
-        self.write(export_path, settings)  # this is where the export actually happens
+        with profiler.phase('write', export_path):
+            self.write(export_path, settings)  # this is where the export actually happens
         self.onFinished(export_path)
+        self.cacheExport(export_path, inputs_hash, previous_hash)
         return export_path
 
+    def cacheExport(self, export_path, inputs_hash, previous_hash):
+        """
+        Stores the hashes of the given written file in the export cache, and un-stages it if its content did not change.
+
+        Args:
+            export_path (string): Path of file written.
+
+            inputs_hash (string or None): Hash of everything that went into the export.
+
+            previous_hash (string or None): Content hash of the file before it was written.
+        """
+        with profiler.phase('cache_update', export_path):
+            content_hash = self.hashContent(export_path)
+
+            # same content as before, so there is nothing to check out
+            if content_hash == previous_hash and perforce.unstage(export_path):
+                pm.displayInfo(f'{export_path} did not change, it will not be checked out.')
+
+            export_cache.export_cache.set(export_path, inputs_hash, content_hash, str(pm.sceneName()) or None)
+            export_cache.export_cache.save()
+
+    def canSplitClips(self):
+        """
+        Gets whether animation clips can be cut out of one export of all their frames. Meant to be overridden by child
+        classes that can trim their files.
+
+        Returns:
+            (boolean): True if clips can be split.
+        """
+        return False
+
+    def trimClips(self, source_path, clips):
+        """
+        Writes every given clip out of the given file that has the frames of all of them. Meant to be overridden by
+        child classes that can split clips.
+
+        Args:
+            source_path (string): Path to file with the frames of all the clips.
+
+            clips (list): Tuples of path to write clip to, first frame, and last frame of each clip.
+        """
+        pass
+
+    def splitClips(self, clips, settings):
+        """
+        Exports the frames of all the given clips once, and cuts each clip out of that export at the same time, instead
+        of exporting each clip on its own. Clips that are up to date in the export cache are skipped.
+
+        Args:
+            clips (list): Tuples of file name, first frame, and last frame of each clip.
+
+            settings (any): Extra argument to pass to self.write.
+
+        Returns:
+            (list): Paths where clips wrote to.
+        """
+        export_paths = []
+        pending = []  # tuples of path, start, end, inputs hash, and previous content hash of clips to write
+
+        for name, start, end in clips:
+            export_path = self.export_path_method(name + self.extension)
+            export_paths.append(export_path)
+            inputs_hash = None
+            previous_hash = None
+
+            if self.use_cache:
+                with profiler.phase('cache_check', export_path):
+                    pm.playbackOptions(min=start, max=end)
+                    inputs_hash = self.getInputsHash(export_path, settings)
+                    is_current = export_cache.export_cache.isCurrent(export_path, inputs_hash)
+                    previous_hash = None if is_current else export_cache.export_cache.getContentHash(
+                        export_path, self.hashContent)
+
+                if is_current:
+                    pm.displayInfo(f'{export_path} is up to date, skipping export.')
+                    continue
+
+            pending.append((export_path, start, end, inputs_hash, previous_hash))
+
+        if not pending:
+            return export_paths
+
+        handle, source_path = tempfile.mkstemp(suffix=self.extension)
+        source_path = source_path.replace('\\', '/')
+        os.close(handle)
+
+        try:
+            pm.playbackOptions(min=min(clip[1] for clip in pending), max=max(clip[2] for clip in pending))
+            with profiler.phase('write', source_path):
+                self.write(source_path, settings)  # the only export, every clip is cut out of it
+
+            [self.onStart(export_path) for export_path, _, _, _, _ in pending]
+            with profiler.phase('trim_clips', f'{len(pending)} clips'):
+                self.trimClips(source_path, [(export_path, start, end) for export_path, start, end, _, _ in pending])
+        finally:
+            os.remove(source_path) if os.path.exists(source_path) else None
+
+        for export_path, _, _, inputs_hash, previous_hash in pending:
+            self.onFinished(export_path)
+            self.cacheExport(export_path, inputs_hash, previous_hash) if self.use_cache else None
+
+        return export_paths
+
+    def cacheSourceHash(self):
+        """
+        Hashes the scene file and the files it references once, before exporting changes the scene. Scenes that are not
+        saved, or that have unsaved changes, don't get a hash, so their exports are never skipped.
+
+        Returns:
+            (string or None): Hash of the scene file and its references.
+        """
+        if self.is_source_hashed:
+            return self.source_hash
+
+        scene_path = str(pm.sceneName())
+        self.is_source_hashed = True
+
+        # batch exports only change the scene by exporting, so the hash from when it was opened is still valid
+        if scene_path in batch_source_hashes:
+            self.source_hash = batch_source_hashes[scene_path]
+        elif scene_path and not pm.cmds.file(q=True, modified=True):
+            with profiler.phase('source_hash', scene_path):
+                self.source_hash = hashScene(scene_path)
+
+        return self.source_hash
+
+    def getSettingsData(self, settings):
+        """
+        Gets the data that identifies the given settings, used to know whether settings changed between exports.
+        Callable settings, such as FBX presets, are identified by their name and the code of the module they are in.
+
+        Args:
+            settings (any): Settings passed to self.write.
+
+        Returns:
+            (list): Data that identifies the settings.
+        """
+        if callable(settings):
+            return [python.methodToStringCommand(settings), hashMethod(settings), self.extension]
+
+        return [settings, self.extension]
+
+    def getInputsHash(self, export_path, settings):
+        """
+        Hashes everything that goes into exporting the current selection to the given path: the saved scene and the
+        files it references, the settings, the selected nodes, the frame range, and the export attributes written on the
+        piper node.
+
+        Args:
+            export_path (string): Path to export to.
+
+            settings (any): Settings passed to self.write.
+
+        Returns:
+            (string or None): Hash of the inputs, None if scene has no hash so inputs can't be known.
+        """
+        source_hash = self.cacheSourceHash()
+        if not source_hash:
+            return None
+
+        selected = sorted(node.longName() for node in pm.selected())
+        frame_range = [pm.playbackOptions(q=True, min=True), pm.playbackOptions(q=True, max=True)]
+        piper_node_data = [dcc.get(), maya_paths.getRelativeArt(), maya_store.get(mcfg.current_project),
+                           python.methodToStringCommand(self.source_method) if self.source_method else None]
+
+        return export_cache.hashData(pcfg.export_cache_version, export_path, source_hash,
+                                     self.getSettingsData(settings), selected, frame_range, piper_node_data)
+
+    def hashContent(self, export_path):
+        """
+        Hashes the contents of the given exported file.
+
+        Args:
+            export_path (string): Path to exported file.
+
+        Returns:
+            (string): Hash of the file's contents.
+        """
+        return export_cache.hashFile(export_path)
+
     def toSelf(self, name, settings, *_, **__):
         """
         Exports .fbx of selected nodes to the folder that the current scene is in.
@@ -113,6 +368,7 @@ class Export(ABC):
         return export_path
 
     @staticmethod
+    @export_profiler.profile('textures')
     def textures():
         shader = graphics.PiperShader()
         textures = shader.getTextures()
@@ -123,7 +379,13 @@ class Export(ABC):
         for texture in textures:
             export_path = maya_paths.getGameTextureExport(texture)
             pather.validateDirectory(os.path.dirname(export_path))
-            shutil.copyfile(texture, export_path)
+
+            with profiler.phase('stage', export_path):
+                perforce.stage(export_path)
+
+            with profiler.phase('copy', texture):
+                shutil.copyfile(texture, export_path)
+
             print('Copying ' + texture + ' to ' + export_path)
 
         print('Finished copying ' + str(len(textures)) + ' textures ' + '=' * 40)
@@ -173,20 +435,29 @@ class Export(ABC):
         Returns:
             (string): Path where file wrote to.
         """
+        name = piper_node.name(stripNamespace=True)
         children = piper_node.getChildren()
-        if attribute_all:
-            [self.writeExportAttributes(child, piper_node=piper_node) for child in children]
-        else:
-            attribute_mesh = mesh.getAttributed(piper_node)
-            self.writeExportAttributes(attribute_mesh, piper_node=piper_node)
 
-        pm.parent(children, w=True)
-        pm.select(children)
-        name = piper_node.name(stripNamespace=True)
+        with profiler.phase('attributes', name):
+            if attribute_all:
+                [self.writeExportAttributes(child, piper_node=piper_node) for child in children]
+            else:
+                attribute_mesh = mesh.getAttributed(piper_node)
+                self.writeExportAttributes(attribute_mesh, piper_node=piper_node)
+
+        with profiler.phase('unparent', name):
+            pm.parent(children, w=True)
+            pm.select(children)
+
         export_path = self.export_method(name, settings, textures=textures)
-        pm.parent(children, piper_node)
+
+        with profiler.phase('reparent', name):
+            pm.parent(children, piper_node)
+
         return export_path
 
+    @export_profiler.profile('mesh', session=True)
+    @export_cache.batched
     def mesh(self, piper_meshes=None, textures=True, ignore=None, warn=True):
         """
         Exports all or selected piper mesh groups.
@@ -203,6 +474,7 @@ class Export(ABC):
         Returns:
             (list): All export paths.
         """
+        self.cacheSourceHash()
         if not piper_meshes:
             piper_meshes = selection.get('piperMesh', ignore=ignore)
 
@@ -217,6 +489,8 @@ class Export(ABC):
 
         return export_paths
 
+    @export_profiler.profile('skinnedMesh', session=True)
+    @export_cache.batched
     def skinnedMesh(self, skinned_meshes, textures=True, ignore=None, warn=True):
         """
         Exports all or selected piper skinned mesh groups.
@@ -234,6 +508,7 @@ class Export(ABC):
             (list): All export paths.
         """
         export_paths = []
+        self.cacheSourceHash()
         if not skinned_meshes:
             skinned_meshes = selection.get('piperSkinnedMesh', ignore=ignore)
 
@@ -250,6 +525,8 @@ class Export(ABC):
 
         return export_paths
 
+    @export_profiler.profile('animation', session=True)
+    @export_cache.batched
     def animation(self, animations, ignore=None, warn=True):
         """
         Exports all or given piper animation groups.
@@ -265,6 +542,7 @@ class Export(ABC):
             (list): All export paths.
         """
         export_paths = []
+        self.cacheSourceHash()
         pm.refresh(suspend=True)
         self.animation_errors.clear()
         start = pm.playbackOptions(q=True, min=True)
@@ -276,7 +554,11 @@ class Export(ABC):
         # check to make sure animation is healthy
         if mcfg.check_anim_health_on_export:
             namespaces = {pig.namespace() for anim in animations for pig in anim.getChildren(ad=True, type='piperRig')}
-            self.animation_errors = animation.health(namespaces, resume=False)
+            with profiler.phase('health', ', '.join(namespaces)):
+                self.animation_errors = animation.health(namespaces, resume=False)
+
+        skeletons = []  # tuples of piper animation node, its export skeleton, and its clip data
+        root_controls = []
 
         for anim in animations:
 
@@ -289,76 +571,67 @@ class Export(ABC):
                 pm.warning('{} has no piper rig!'.format(anim.name())) if warn else None
                 continue
 
-            # get joints from rig
-            self.writeExportAttributes(transform=root, piper_node=anim)
-            joints = root.getChildren(ad=True, type='joint')
-            joints.append(root)
-
-            # duplicate rig joints
-            root_duplicate = pm.duplicate(root)[0]
-            pm.parent(root_duplicate, w=True)
-            duplicates = root_duplicate.getChildren(ad=True, type='joint')
-            duplicates.append(root_duplicate)
-
             # get root control to turn off squash stretch attribute temporarily for proper export scale values
             piper_rig = piper_rig[0]
             root_control = rig.getRootControl(piper_rig)
+            root_controls.append(root_control)
 
             # only exporting sides curve since up can be re-created by taking inverse of side curve value
-            pm.deleteAttr(root_duplicate.attr(mcfg.root_scale_up))
+            attributes = []
             if mcfg.export_root_scale_curves:
                 root_control.attr(mcfg.squash_stretch_weight_attribute).set(0)
-                root.attr(mcfg.root_scale_sides) >> root_duplicate.attr(mcfg.root_scale_sides)
-            else:
-                pm.deleteAttr(root_duplicate.attr(mcfg.root_scale_sides))
-
-            # delete unwanted attributes
-            for joint, duplicate in zip(joints, duplicates):
-                attributes = duplicate.listAttr()
-                for attr in attributes:
-                    attribute_name = attr.name().split('.')[-1]
-
-                    if attribute_name.startswith(mcfg.use_attributes) or attribute_name.endswith(mcfg.space_suffix):
-                        pm.setAttr(attr, lock=False)
-                        pm.deleteAttr(attr)
+                attributes.append(mcfg.root_scale_sides)
 
-                # connect channels from original to duplicate
-                [joint.attr(attr) >> duplicate.attr(attr) for attr in ['t', 'r', 's']]
+            # clean copy of the skeleton, without any of the rig's attributes, re-used by every clip
+            with profiler.phase('skeleton_build', anim.name()):
+                skeleton = ExportSkeleton(root.longName(), mcfg.export_namespace + str(len(skeletons)))
+                joints = skeleton.build(attributes)
+                self.writeExportAttributes(transform=pm.PyNode(joints[0]), piper_node=anim)
 
             # get clip data
-            starts = []
-            ends = []
             data = anim.clipData.get()  # could be empty string, empty dictionary, or dictionary with data
             data = json.loads(data) if data else {}  # json.loads fails with empty string
 
             if not data:
                 data = {'': {'export': True, 'start': start, 'end': end}}
 
-            for clip_name, clip_data in data.items():
-                starts.append(clip_data['start'])
-                ends.append(clip_data['end'])
+            skeletons.append((anim, skeleton, data))
 
-            # bake animation keys onto duplicate joints and export
-            pm.select(duplicates)
-            pm.bakeResults(sm=True, time=(min(starts), max(ends)))
+        # bake animation keys onto every export skeleton at once, so the scene is only evaluated once per frame
+        if skeletons:
+            starts = [clip_data['start'] for _, _, data in skeletons for clip_data in data.values()]
+            ends = [clip_data['end'] for _, _, data in skeletons for clip_data in data.values()]
+            joints = [joint for _, skeleton, _ in skeletons for joint in skeleton.getJoints()]
 
-            # export each clip
-            for clip_name, clip_data in data.items():
+            with profiler.phase('bake', f'{len(joints)} joints'):
+                cmds.bakeResults(joints, simulation=True, time=(min(starts), max(ends)))
 
-                # if export is not checked, then continue with other clips
-                if not clip_data.get('export'):
-                    continue
+        for anim, skeleton, data in skeletons:
+
+            # joints get the same names as the skeleton they were copied from, then export each clip
+            skeleton.removeNamespace()
+            pm.select(skeleton.getJoints())
+            anim_name = anim.name(stripNamespace=True)
+
+            # if export is not checked, then continue with other clips
+            clips = [(anim_name + '_' + clip_name if clip_name else anim_name, clip_data['start'], clip_data['end'])
+                     for clip_name, clip_data in data.items() if clip_data.get('export')]
+
+            if len(clips) > 1 and self.canSplitClips():
+                clip_paths = self.splitClips(clips, self.animation_settings)  # export happens here
+            else:
+                clip_paths = []
+                for export_name, clip_start, clip_end in clips:
+                    pm.playbackOptions(min=clip_start, max=clip_end)
+                    clip_paths.append(self.export_method(export_name, self.animation_settings))  # export happens here
 
-                pm.playbackOptions(min=clip_data['start'], max=clip_data['end'])
-                anim_name = anim.name(stripNamespace=True)
-                export_name = anim_name + '_' + clip_name if clip_name else anim_name
-                export_path = self.export_method(export_name, self.animation_settings)  # export happens here
-                self.onExportAnimation(export_path)
-                export_paths.append(export_path)
+            [self.onExportAnimation(export_path) for export_path in clip_paths]
+            export_paths.extend(clip_paths)
 
-            pm.delete(root_duplicate)
-            root_control.attr(mcfg.squash_stretch_weight_attribute).set(1)
+            with profiler.phase('skeleton_delete', anim_name):
+                skeleton.delete()
 
+        [root_control.attr(mcfg.squash_stretch_weight_attribute).set(1) for root_control in root_controls]
         pm.playbackOptions(min=start, max=end)
         pm.refresh(suspend=False)
 
@@ -367,6 +640,8 @@ class Export(ABC):
 
         return export_paths
 
+    @export_profiler.profile('piperNodes', session=True)
+    @export_cache.batched
     def piperNodes(self, warn=False):
         """
         Exports all piper nodes from scene.
@@ -377,6 +652,7 @@ class Export(ABC):
         mesh_export = []
         skin_export = []
         anim_export = []
+        self.cacheSourceHash()
         selected = pm.selected()  # store selection
         piper_meshes = selection.get('piperMesh', ignore='piperSkinnedMesh')
         piper_skinned_meshes = selection.get('piperSkinnedMesh', ignore='piperRig')
@@ -434,6 +710,10 @@ class Export(ABC):
         export_directory = os.path.dirname(export_path)
         pather.validateDirectory(export_directory)
 
+        # if batching in a P4 transaction, file is made writable now and checked out or added once the batch finishes
+        with profiler.phase('stage', export_path):
+            perforce.stage(export_path)
+
     @staticmethod
     def onFinished(export_path):
         """
@@ -459,6 +739,7 @@ class FBX(Export):
         self.skinned_mesh_settings = fbxpreset.skinnedMesh
         self.animation_settings = fbxpreset.animation
         self.delete_fbx_attributes = mcfg.delete_fbx_attributes
+        self.split_clips = mcfg.split_animation_clips
 
     def cleanUpFBX(self, export_path):
         """
@@ -473,20 +754,79 @@ class FBX(Export):
         if not self.delete_fbx_attributes:
             return False
 
-        fbx_file = fbx_sdk.PiperFBX(export_path)
-        nodes = fbx_file.getSceneNodes()
-        removed = [fbx_file.removeNodeProperty(node, attr) for node in nodes for attr in mcfg.fbx_attributes_to_delete]
-        deleted = fbx_file.deleteNodesWithPropertyValue(mcfg.delete_node_attribute, True)
+        # binary files only re-write the records that change instead of loading and saving the whole scene
+        if fbx_file.isBinary(export_path):
+            with fbx_file.FBXRewriter(export_path) as rewriter:
+                rewriter.removeProperties(mcfg.fbx_attributes_to_delete)
+                rewriter.deleteNodesWithPropertyValue(mcfg.delete_node_attribute, True)
+                return rewriter.save()
+
+        sdk_file = fbx_sdk.PiperFBX(export_path)
+        removed = [sdk_file.removeNodeProperty(node, attr) for attr in mcfg.fbx_attributes_to_delete
+                   for node in sdk_file.getNodesWithProperty(attr)]
+        deleted = sdk_file.deleteNodesWithPropertyValue(mcfg.delete_node_attribute, True)
         result = any(removed + deleted)
 
-        fbx_file.save() if result else fbx_file.close()
+        sdk_file.save() if result else sdk_file.close()
         return result
 
+    def canSplitClips(self):
+        """
+        Gets whether animation clips can be cut out of one export of all their frames. Only binary files can be trimmed.
+
+        Returns:
+            (boolean): True if clips can be split.
+        """
+        return bool(self.split_clips and self.export_path_method and not maya_store.get(mcfg.export_ascii))
+
+    def trimClips(self, source_path, clips):
+        """
+        Writes every given clip out of the given FBX file at the same time.
+
+        Args:
+            source_path (string): Path to FBX file with the frames of all the clips.
+
+            clips (list): Tuples of path to write clip to, first frame, and last frame of each clip.
+        """
+        fbx_file.trimClips(source_path, clips, pm.mel.currentTimeUnitToFPS())
+
+    def getSettingsData(self, settings):
+        """
+        Gets the data that identifies the given FBX preset, including the stored ASCII setting, FBX version, the
+        attributes cleaned up after writing, and whether clips are split.
+
+        Args:
+            settings (method): FBX preset from piper.mayapy.pipe.fbxpreset.
+
+        Returns:
+            (list): Data that identifies the settings.
+        """
+        data = super(FBX, self).getSettingsData(settings)
+        cleanup = mcfg.fbx_attributes_to_delete if self.delete_fbx_attributes else []
+        return data + [maya_store.get(mcfg.export_ascii), mcfg.fbx_default_version, cleanup, self.split_clips]
+
+    def hashContent(self, export_path):
+        """
+        Hashes the contents of the given FBX file, leaving out the creation time and file ID that change every time.
+
+        Args:
+            export_path (string): Path to exported FBX file.
+
+        Returns:
+            (string): Hash of the file's contents.
+        """
+        return fbx_file.hashContent(export_path)
+
     def write(self, export_path, preset):
         # set the given preset and export
-        preset()
-        pm.FBXExport('-s', '-f', export_path)
-        self.cleanUpFBX(export_path)
+        with profiler.phase('fbx_preset', export_path):
+            preset()
+
+        with profiler.phase('fbx_write', export_path):
+            pm.FBXExport('-s', '-f', export_path)
+
+        with profiler.phase('cleanup', export_path):
+            self.cleanUpFBX(export_path)
 
 
 class FBXtoSelf(FBX):
@@ -494,6 +834,7 @@ class FBXtoSelf(FBX):
     def __init__(self):
         super(FBXtoSelf, self).__init__()
         self.export_method = self.toSelf
+        self.export_path_method = maya_paths.getSelfExport
 
 
 class FBXtoGame(FBX):
@@ -501,6 +842,7 @@ class FBXtoGame(FBX):
     def __init__(self):
         super(FBXtoGame, self).__init__()
         self.export_method = self.toGame
+        self.export_path_method = maya_paths.getGameExport
 
 
 class OBJ(Export):
@@ -520,6 +862,7 @@ class OBJtoSelf(OBJ):
     def __init__(self):
         super(OBJtoSelf, self).__init__()
         self.export_method = self.toSelf
+        self.export_path_method = maya_paths.getSelfExport
 
 
 class OBJtoGame(OBJ):
@@ -527,6 +870,7 @@ class OBJtoGame(OBJ):
     def __init__(self):
         super(OBJtoGame, self).__init__()
         self.export_method = self.toGame
+        self.export_path_method = maya_paths.getGameExport
 
 
 def piperNodesToSelfAsFBX():
@@ -554,27 +898,80 @@ def piperMeshToSelfAsOBJ():
     OBJtoSelf().mesh()
 
 
-def fromJSON(json_file):
+@export_profiler.profile('fromJSON', session=True)
+def fromJSON(json_file, report_file=None):
     """
     Reads a json file with appropriate data used to export the files in the json file.
+    Entries are grouped by project and source file, so each source file is opened once and all of its piper nodes are
+    exported one after the other. Entries that fail to export are reported, and do not stop the rest from exporting.
 
     Args:
         json_file (string): Full path to the json file with data to export.
+
+        report_file (string): If given, will write the results of each entry and each file to this path as json.
+
+    Returns:
+        (list): Dictionary for each entry with name, success, error, and time it took to export.
     """
     dcc_names = python.readJson(json_file)
     app = dcc.get()
-
-    for data in dcc_names[app]:
-        project = data[pcfg.project_attribute]
-        source_path = data[pcfg.relative_attribute]
-        piper_node = data[pcfg.pipernode_attribute]
-        export_method = data[pcfg.method_attribute]
-
-        maya_paths.setCurrentProject(project)
-        setStartupWorkspace()
-        pm.openFile(source_path, force=True)
-        pm.select(piper_node)
-        exec(export_method)
+    results = []
+    files = []
+    current_project = maya_paths.getCurrentProject()
+
+    for (project, source_path), entries in scheduler.groupBySource(dcc_names[app]).items():
+        start_time = time.perf_counter()
+        open_error = ''
+
+        try:
+            # setting the project and workspace re-writes the store, so only do it when project changes
+            if project != current_project:
+                maya_paths.setCurrentProject(project)
+                setStartupWorkspace()
+                current_project = project
+
+            with profiler.phase('open', source_path):
+                pm.openFile(source_path, force=True)
+
+            with profiler.phase('source_hash', source_path):
+                batch_source_hashes.clear()
+                batch_source_hashes[str(pm.sceneName())] = hashScene(source_path)
+        except Exception:
+            open_error = traceback.format_exc()
+            pm.warning(f'Failed to open {source_path}!\n{open_error}')
+
+        open_time = time.perf_counter() - start_time
+        export_start_time = time.perf_counter()
+
+        # cache of exports is written once per source file instead of after every file exported
+        with export_cache.export_cache.batch():
+            for data in entries:
+                piper_node = data[pcfg.pipernode_attribute]
+                export_method = data[pcfg.method_attribute]
+                result = {'name': scheduler.getEntryName(data), 'success': not open_error, 'error': open_error}
+                entry_start_time = time.perf_counter()
+
+                if not open_error:
+                    try:
+                        pm.select(piper_node)
+                        exec(export_method)
+                    except Exception:
+                        result['success'] = False
+                        result['error'] = traceback.format_exc()
+                        pm.warning(f'Failed to export {piper_node} from {source_path}!\n{result["error"]}')
+
+                result['time'] = time.perf_counter() - entry_start_time
+                results.append(result)
+
+        export_time = time.perf_counter() - export_start_time
+        files.append({'path': source_path, 'entries': len(entries), 'open_time': open_time, 'export_time': export_time})
+        print(f'{source_path} took {round(open_time, 3)} seconds to open and {round(export_time, 3)} seconds to '
+              f'export {len(entries)} piper node(s).')
+
+    if report_file:
+        python.writeJson(report_file, {'results': results, 'files': files})
+
+    return results
 
 
 class MayaExport(ExportDCC):
@@ -2,7 +2,7 @@
 
 import pymel.core as pm
 
-from piper.core.perforce import Perforce
+from piper.core.perforce import Perforce, getConnection
 from piper.ui.widget import getUserInput
 from piper.mayapy.ui.widget import getMainWindow
 import piper.mayapy.ui.window as window
@@ -52,6 +52,16 @@ class PerforceMaya(Perforce):
         pm.displayInfo('P4: ' + text)
 
 
+def getMayaConnection():
+    """
+    Gets the long-lived Maya Perforce connection, so that callbacks re-use the connection and cached file info.
+
+    Returns:
+        (PerforceMaya): Connected instance.
+    """
+    return getConnection(PerforceMaya)
+
+
 def makeAvailable(write_method=None, path=None, add=True, *args, **kwargs):
     """
     Convenience method for making a file available.
@@ -66,11 +76,8 @@ def makeAvailable(write_method=None, path=None, add=True, *args, **kwargs):
     Returns:
         (dictionary): Results of all the actions done for each file.
     """
-    p4 = PerforceMaya()
-    with p4.connect():
-        results = p4.makeAvailable(write_method=write_method, path=path, add=add, *args, **kwargs)
-
-    return results
+    p4 = getMayaConnection()
+    return p4.makeAvailable(write_method=write_method, path=path, add=add, *args, **kwargs)
 
 
 def _save():
@@ -0,0 +1,183 @@
+#  Copyright (c) Christian Corsica. All Rights Reserved.
+
+import maya.cmds as cmds
+import maya.api.OpenMaya as om2
+
+import piper.config.maya as mcfg
+
+
+def copyPlugValue(modifier, source, target):
+    """
+    Adds setting the given target plug to the value of the given source plug to the given modifier.
+
+    Args:
+        modifier (om2.MDGModifier): Modifier to add value change to.
+
+        source (om2.MPlug): Plug to get value from.
+
+        target (om2.MPlug): Plug to set value of. Must be of the same type as source.
+    """
+    if source.isCompound:
+        [copyPlugValue(modifier, source.child(i), target.child(i)) for i in range(source.numChildren())]
+        return
+
+    attribute = source.attribute()
+
+    if attribute.hasFn(om2.MFn.kUnitAttribute):
+        unit_type = om2.MFnUnitAttribute(attribute).unitType()
+
+        if unit_type == om2.MFnUnitAttribute.kAngle:
+            modifier.newPlugValueMAngle(target, source.asMAngle())
+        elif unit_type == om2.MFnUnitAttribute.kDistance:
+            modifier.newPlugValueMDistance(target, source.asMDistance())
+        else:
+            modifier.newPlugValueDouble(target, source.asDouble())
+
+    elif attribute.hasFn(om2.MFn.kNumericAttribute):
+        numeric_type = om2.MFnNumericAttribute(attribute).numericType()
+
+        if numeric_type == om2.MFnNumericData.kBoolean:
+            modifier.newPlugValueBool(target, source.asBool())
+        elif numeric_type in (om2.MFnNumericData.kFloat, om2.MFnNumericData.kDouble):
+            modifier.newPlugValueDouble(target, source.asDouble())
+        else:
+            modifier.newPlugValueInt(target, source.asInt())
+
+    else:
+        modifier.newPlugValueInt(target, source.asInt())
+
+
+class ExportSkeleton(object):
+    """
+    Clean copy of a skeleton used to bake and export animation. Only joints are made, without any of the rig's custom
+    attributes, all in one DAG modifier, and their transforms are connected to the source skeleton in one DG modifier.
+    Each skeleton lives in its own namespace, so that many skeletons with the same joint names can be baked together.
+
+    Example:
+        skeleton = ExportSkeleton('|character:SKL:root', 'EXPORT0')
+        skeleton.build(attributes=['scaleSides'])
+        cmds.bakeResults(skeleton.getJoints(), simulation=True, time=(0, 100))
+        skeleton.removeNamespace()  # joints now have the same names as the source skeleton, without namespaces
+        cmds.select(skeleton.getJoints())
+        skeleton.delete()
+    """
+    def __init__(self, root, namespace):
+        """
+        Args:
+            root (string): Long name of the root joint of the skeleton to copy.
+
+            namespace (string): Namespace to build the copy in, must not be used by anything else.
+        """
+        self.root = root
+        self.namespace = namespace
+        self.handles = []  # MObjectHandle of each joint made, parents before children
+
+    def getSourceJoints(self):
+        """
+        Gets the root joint and all the joints below it, parents before children.
+
+        Returns:
+            (list): Long names of joints in the source skeleton.
+        """
+        joints = cmds.listRelatives(self.root, allDescendents=True, type='joint', fullPath=True) or []
+        return [self.root] + sorted(joints, key=lambda joint: joint.count('|'))
+
+    def build(self, attributes=None):
+        """
+        Makes the joints, copies their orientations, and connects their transforms to the source skeleton.
+
+        Args:
+            attributes (list): Names of extra attributes of the root joint to copy and connect, such as scaleSides.
+
+        Returns:
+            (list): Long names of the joints made.
+        """
+        sources = self.getSourceJoints()
+        selection_list = om2.MSelectionList()
+        [selection_list.add(source) for source in sources]
+
+        if not cmds.namespace(exists=self.namespace):
+            cmds.namespace(add=self.namespace)
+
+        # make every joint in one DAG modifier
+        dag_modifier = om2.MDagModifier()
+        made = {}  # source long name as key, MObject made as value
+        for source in sources:
+            parent = made.get(source.rpartition('|')[0], om2.MObject.kNullObj)
+            joint = dag_modifier.createNode('joint', parent)
+            dag_modifier.renameNode(joint, self.namespace + ':' + source.rpartition('|')[2].rpartition(':')[2])
+            made[source] = joint
+
+        dag_modifier.doIt()
+        self.handles = [om2.MObjectHandle(made[source]) for source in sources]
+
+        # copy orientations and connect transforms in one DG modifier
+        dg_modifier = om2.MDGModifier()
+        for i, source in enumerate(sources):
+            source_node = om2.MFnDependencyNode(selection_list.getDependNode(i))
+            joint_node = om2.MFnDependencyNode(made[source])
+
+            for attribute in mcfg.export_skeleton_copy_attributes:
+                source_plug = source_node.findPlug(attribute, False)
+                copyPlugValue(dg_modifier, source_plug, joint_node.findPlug(attribute, False))
+
+            for attribute in mcfg.export_skeleton_connect_attributes:
+                dg_modifier.connect(source_node.findPlug(attribute, False), joint_node.findPlug(attribute, False))
+
+            parent = source.rpartition('|')[0]
+            if parent in made:
+                parent_node = om2.MFnDependencyNode(made[parent])
+                dg_modifier.connect(parent_node.findPlug('scale', False), joint_node.findPlug('inverseScale', False))
+
+        dg_modifier.doIt()
+        joints = self.getJoints()
+        self.copyFlags(sources, joints)
+
+        for attribute in attributes or []:
+            cmds.addAttr(joints[0], longName=attribute, keyable=True, defaultValue=1)
+            cmds.connectAttr(self.root + '.' + attribute, joints[0] + '.' + attribute)
+
+        return joints
+
+    @staticmethod
+    def copyFlags(sources, joints):
+        """
+        Adds the attribute that marks joints to be deleted on export to the given joints whose source has it turned on.
+
+        Args:
+            sources (list): Long names of source joints.
+
+            joints (list): Long names of joints made, in the same order as sources.
+        """
+        existing = set(cmds.ls([source + '.' + mcfg.delete_node_attribute for source in sources], long=True) or [])
+        for source, joint in zip(sources, joints):
+            plug = source + '.' + mcfg.delete_node_attribute
+            if plug in existing and cmds.getAttr(plug):
+                cmds.addAttr(joint, longName=mcfg.delete_node_attribute, attributeType='bool', defaultValue=1)
+
+    def getJoints(self):
+        """
+        Gets the current long names of the joints made, which change when namespace is removed.
+
+        Returns:
+            (list): Long names of joints, root first.
+        """
+        return [om2.MFnDagNode(handle.object()).fullPathName() for handle in self.handles if handle.isValid()]
+
+    def removeNamespace(self):
+        """
+        Moves the joints to the root namespace so that they have the same names as the source skeleton.
+        """
+        if cmds.namespace(exists=self.namespace):
+            cmds.namespace(removeNamespace=self.namespace, mergeNamespaceWithRoot=True)
+
+    def delete(self):
+        """
+        Deletes the joints made and their namespace, if it still exists.
+        """
+        joints = self.getJoints()
+        if joints:
+            cmds.delete(joints[0])
+
+        self.handles = []
+        self.removeNamespace()
@@ -1,5 +1,6 @@
 #  Copyright (c) Christian Corsica. All Rights Reserved.
 
+import maya.utils
 import maya.api.OpenMaya as om2
 import pymel.core as pm
 
@@ -8,6 +9,7 @@ import piper.config.maya as mcfg
 import piper.ui
 import piper.core
 import piper.core.filer as filer
+import piper.core.connection as connection
 import piper.core.pather as pather
 
 import piper.mayapy.plugin as plugin
@@ -21,6 +23,7 @@ from piper.mayapy.pipe.store import maya_store
 
 
 callbacks = []
+port_server = None
 
 
 def welcome():
@@ -156,19 +159,15 @@ def onBeforeOpen(*args):
     if not path:
         return True
 
-    p4 = perforce.PerforceMaya()
-    with p4.connect():
-        is_latest = p4.isLatest(path=path)
-
-    if is_latest:
+    p4 = perforce.getMayaConnection()
+    if p4.isLatest(path=path):
         return True
 
     answer = window.beforeOpen()
     if answer != 'Get Latest':
         return True
 
-    with p4.connect():
-        p4.getLatest(path=path)
+    p4.getLatest(path=path)
 
     return True
 
@@ -187,9 +186,8 @@ def onSceneOpened(*args):
         return
 
     is_checked_out_by_other = False
-    p4 = perforce.PerforceMaya()
-    with p4.connect():
-        result = p4.isCheckedOutByOther()
+    p4 = perforce.getMayaConnection()
+    result = p4.isCheckedOutByOther()
 
     if is_checked_out_by_other:
         pm.warning(f'Scene is checked out by {result["other_open"][0]}!')
@@ -239,28 +237,60 @@ def registerCallbacks():
     callbacks.append(callback)
 
 
+def runPortCommand(command):
+    """
+    Runs the given python command received through the port in Maya's main thread.
+
+    Args:
+        command (string): Python code to run.
+
+    Returns:
+        (string): Result of command.
+    """
+    return maya.utils.executeInMainThreadWithResult(connection.execute, command)
+
+
 def openPort():
     """
-    Opens a port to listen for commands.
+    Opens a port to listen for commands. Messages are length framed, so clients can keep their connection open and
+    get results of any size back. See piper.core.connection. Re-uses the port if it is already open. Piper closes the
+    port before it reloads, see piper.mayapy.ui.menu.removeCallbacks.
     """
-    port = ':' + str(mcfg.port)
-    if pm.commandPort(port, query=True):
+    global port_server
+
+    if port_server and port_server.is_running:
+        return
+
+    # server that stopped listening can't be started again on the same socket, so make a new one
+    closePort()
+    server = connection.Server(mcfg.address, runPortCommand)
+
+    try:
+        server.start()
+    except OSError as error:
+        pm.warning(f'Could not open port {mcfg.host}:{mcfg.port} for Piper! {error}')
         return
 
-    pm.commandPort(name=port, sourceType='python')
-    pm.displayInfo('Port ' + mcfg.host + port + ' has been opened for Piper.')
+    port_server = server
+    pm.displayInfo('Port ' + mcfg.host + ':' + str(mcfg.port) + ' has been opened for Piper.')
 
 
 def closePort():
     """
     Closes port if is opened.
     """
-    port = ':' + str(mcfg.port)
-    if not pm.commandPort(port, query=True):
+    global port_server
+
+    if not port_server:
         return
 
-    pm.commandPort(name=port, close=True)
-    pm.displayInfo('Port ' + mcfg.host + port + ' has been closed.')
+    was_running = port_server.is_running
+    port_server.close()
+    port_server = None
+
+    if was_running:
+        pm.displayInfo('Port ' + mcfg.host + ':' + str(mcfg.port) + ' has been closed.')
+
 
 def startup():
     """
@@ -11,6 +11,7 @@ from piper.ui.widget import manager
 from piper.mayapy.ui.widget import Controller
 from piper.mayapy.pipe.export import maya_export
 from piper.mayapy.pipe.paths import maya_paths
+from piper.mayapy.pipe.perforce import PerforceMaya
 from piper.mayapy.pipe.store import maya_store
 
 
@@ -46,6 +47,18 @@ class MayaBrowser(Browser):
     def expanded_directories_config(self):
         return mcfg.browser_expanded_directories
 
+    @property
+    def lazy_config(self):
+        return mcfg.browser_lazy_load
+
+    @property
+    def p4_status_config(self):
+        return mcfg.browser_p4_status
+
+    @property
+    def perforce_config(self):
+        return mcfg.use_perforce
+
     def __init__(self, *args, **kwargs):
         super(MayaBrowser, self).__init__(*args, **kwargs)
         manager.register(self, self.create_command)
@@ -60,6 +73,7 @@ class MayaBrowser(Browser):
         self.dcc_paths = maya_paths
         self.dcc_export = maya_export
         self.store = maya_store
+        self.perforce_class = PerforceMaya
         super(MayaBrowser, self).build()
 
     def onBeforeSave(self, *_):
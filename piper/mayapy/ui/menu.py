@@ -285,6 +285,8 @@ class MayaSettingsMenu(MayaPiperMenu):
         self.addCheckbox(maya_store.get(mcfg.export_ascii), self.onExportInAsciiPressed, 'Export In Ascii')
         self.addCheckbox(maya_store.get(mcfg.unload_unwanted), self.onUnloadUnwantedPressed, 'Unload Unwanted Plug-ins')
         self.addCheckbox(maya_store.get(mcfg.open_port), self.onPortPressed, 'Open Port')
+        self.addCheckbox(maya_store.get(mcfg.browser_lazy_load), self.onLazyBrowserPressed, 'Lazy Load Browser')
+        self.addCheckbox(maya_store.get(mcfg.browser_p4_status), self.onBrowserP4StatusPressed, 'Browser P4 Status')
         self.add(self.onSetHdrImagePressed, 'Set HDR Image')
         self.addSeparator()
         self.add(settings.hotkeys, 'Assign Hotkeys')
@@ -360,6 +362,34 @@ class MayaSettingsMenu(MayaPiperMenu):
         maya_store.set(mcfg.open_port, state)
         settings.openPort() if state else settings.closePort()
 
+    @staticmethod
+    def onLazyBrowserPressed(state):
+        """
+        Sets whether the Browser creates the children of a directory only once the directory is expanded.
+        Useful for projects with huge art directories.
+
+        Args:
+            state (boolean): If True, Browser directories create their children when expanded.
+        """
+        maya_store.set(mcfg.browser_lazy_load, state)
+
+        if mybrowser.MayaBrowser.instance:
+            mybrowser.MayaBrowser.instance.setLazy(state)
+
+    @staticmethod
+    def onBrowserP4StatusPressed(state):
+        """
+        Sets whether the Browser shows the P4 status of the files in expanded directories, such as out of date or
+        checked out by others. Statuses are fetched in the background and refreshed periodically.
+
+        Args:
+            state (boolean): If True, Browser shows the P4 status of files next to their names.
+        """
+        maya_store.set(mcfg.browser_p4_status, state)
+
+        if mybrowser.MayaBrowser.instance:
+            mybrowser.MayaBrowser.instance.setP4Status(state)
+
     def onSetHdrImagePressed(self):
         """
         Opens a file dialog for user to pick HDR image to use as the default image for shader backgrounds
@@ -381,12 +411,22 @@ class MayaSettingsMenu(MayaPiperMenu):
         pm.warning('Uninstall currently not implemented')
 
 
+def removeCallbacks():
+    """
+    Removes all the callbacks piper registered, including the key index's, and closes piper's port before piper's
+    modules are reloaded, so that the reloaded modules can open the port again.
+    """
+    settings.removeCallbacks()
+    settings.closePort()
+    key.key_index.close()
+
+
 def create():
     """
     Creates the menu set for Piper and adds it to maya's main Menu Bar.
     """
     piper_menu = getPiperMainMenu()
-    piper_menu.on_before_reload = settings.removeCallbacks
+    piper_menu.on_before_reload = removeCallbacks
     piper_menu.scene_menu = MayaSceneMenu()
     piper_menu.perforce_menu = MayaPerforceMenu()
     piper_menu.nodes_menu = MayaNodesMenu()
@@ -0,0 +1,60 @@
+#  Copyright (c) Christian Corsica. All Rights Reserved.
+
+import time
+from pathlib import Path
+
+from piper.ui.browser import DirectoryItem
+
+
+def benchmarkFilterToggles(browser, item_counts=(10000, 100000), files_per_directory=50, repeat=3):
+    """
+    Times how long toggling each type filter takes in the given browser when it holds the given amount of items.
+    Items are made up in a generated tree with two levels of directories, browser is reloaded once timing finishes.
+
+    Args:
+        browser (Browser): Browser to fill with generated items and toggle filters of.
+
+        item_counts (Iterable): Amount of file items to time filter toggles with.
+
+        files_per_directory (int): Amount of file items each generated directory holds.
+
+        repeat (int): Amount of times each filter is toggled off and on again.
+
+    Returns:
+        (dictionary): Amount of items as key, average seconds each filter toggle took as value.
+    """
+    results = {}
+    file_types = list(browser.types)
+    is_lazy = browser.is_lazy
+    browser.is_lazy = False
+
+    try:
+        for item_count in item_counts:
+            browser.removeItems()
+            browser.top_item = DirectoryItem(browser.tree, ['benchmark', '', '', ''])
+            browser.top_item.path = Path('benchmark')
+            browser.top_item.is_top_item = True
+            browser.directory_items = {'': browser.top_item}
+            browser.is_tree_complete = True
+
+            for i in range(item_count):
+                directory_index = i // files_per_directory
+                parent_item = browser.getDirectoryItem(f'{directory_index // 10}/{directory_index}')
+                browser.createFileItem(parent_item, parent_item.path / f'file_{i}', file_types[i % len(file_types)])
+
+            timings = []
+            for _ in range(repeat * 2):
+                for file_type in file_types:
+                    button = browser.types[file_type]['button']
+                    button.setChecked(not button.isChecked())
+                    start_time = time.perf_counter()
+                    browser.onFilterPressed(file_type)
+                    timings.append(time.perf_counter() - start_time)
+
+            results[item_count] = sum(timings) / len(timings)
+
+    finally:
+        browser.is_lazy = is_lazy
+        browser.reload(select_current=False)
+
+    return results
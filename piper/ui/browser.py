@@ -1,6 +1,9 @@
 #  Copyright (c) Christian Corsica. All Rights Reserved.
 
 import os
+import re
+import time
+import contextlib
 from functools import partial
 from pathlib import Path
 
@@ -10,14 +13,33 @@ import piper.config as pcfg
 import piper.core
 import piper.core.dcc as dcc
 import piper.core.filer as filer
+import piper.core.export_cache as export_cache
+import piper.core.indexer as indexer
 import piper.core.pythoner as python
+import piper.core.searcher as searcher
 from piper.core.events import dispatcher
-from piper.core.perforce import Perforce, makeAvailable
+from piper.core.store import ExpandedDirectories
+from piper.core.perforce import Perforce, InfoCache, Transaction, getConnection
 from piper.core.dcc.template.paths import dcc_paths, FileType
 from piper.core.dcc.template.export import dcc_export
 from piper.ui.widget import setTips
 
 
+def buildSearchIndex(file_index):
+    """
+    Builds a search index of the names of all the files in the given file index, with each file's relative directory
+    and file type as its location, so that matches can be counted per directory.
+
+    Args:
+        file_index (indexer.FileIndex): Index of files to search.
+
+    Returns:
+        (searcher.SearchIndex): Index of file names.
+    """
+    return searcher.SearchIndex((os.path.splitext(file_data[0])[0], (relative_directory, file_data[1]))
+                                for relative_directory, file_data in file_index.iterFiles())
+
+
 class ModifierAwareMenu(QtWidgets.QMenu):
 
     def __init__(self, *args, **kwargs):
@@ -111,8 +133,11 @@ class DirectoryItem(BrowserItem):
         super(DirectoryItem, self).__init__(*args, **kwargs)
         self.is_directory = True
         self.children_directories = []
+        self.children_files = []
         self.child_file_count = 0
         self.current_hidden_count = 0
+        self.relative_directory = ''  # relative to art directory, used to look up directory in file index
+        self.is_populated = True  # False when children will be created once item is expanded
         self.is_top_item = False
         self.setForeground(0, QtGui.QBrush(QtGui.QColor('#e3c674')))
 
@@ -139,9 +164,26 @@ class FileItem(BrowserItem):
         """
         super(FileItem, self).__init__(*args, **kwargs)
         self.file_type = FileType.none
+        self.search_name = ''  # lower case name the search index matches against
         self.type_visibility = False
         self.search_visibility = False
-        self.addChildFileCount()
+        self.p4_status = None
+
+    def setStatus(self, status, description):
+        """
+        Shows the given P4 status of the item's file in the status column.
+
+        Args:
+            status (string): One of the pcfg.p4_status names, or None to clear the status.
+
+            description (string): More information about the status, shown as the status tooltip.
+        """
+        self.p4_status = status
+        self.setText(1, status or '')
+        self.setToolTip(1, description or '')
+
+        if status:
+            self.setForeground(1, QtGui.QBrush(QtGui.QColor(pcfg.p4_status_colors[status])))
 
     def addChildFileCount(self):
         """
@@ -166,6 +208,23 @@ class FileItem(BrowserItem):
         self.updateHiddenParentCount(update_count=1)
         self.setHidden(is_hidden)
 
+    def setHiddenStates(self, type_hidden, search_hidden):
+        """
+        Sets the hidden states without updating any parent counts. Useful when parent counts come from the file index.
+
+        Args:
+            type_hidden (boolean): If True, item is hidden by its type filter.
+
+            search_hidden (boolean): If True, item is hidden because it does not match the search.
+        """
+        was_hidden = self.type_visibility or self.search_visibility
+        self.type_visibility = type_hidden
+        self.search_visibility = search_hidden
+
+        # only update if changed, since setHidden is expensive when called on many items
+        if was_hidden != (type_hidden or search_hidden):
+            self.setHidden(type_hidden or search_hidden)
+
     def updateVisibility(self, is_hidden):
         """
         Forces update of item visibility, this should not be called directly.
@@ -229,8 +288,155 @@ class FileItem(BrowserItem):
             parent_item = parent_item.parent()
 
 
+class ScanWorker(QtCore.QObject):
+
+    # scan id, list of (relative directory, files) tuples
+    batch_ready = QtCore.Signal(int, object)
+
+    # scan id, whether scan completed, error message if scan failed
+    scan_finished = QtCore.Signal(int, bool, str)
+
+    def __init__(self, file_index, scan_id, batch_interval=0.1, *args, **kwargs):
+        """
+        Scans the given file index, meant to be moved to a QThread. Streams batches of directories that have files
+        back through the batch_ready signal so that the tree can be populated while the scan is still happening.
+        Once the scan completes, builds the search index of all the files found.
+
+        Args:
+            file_index (indexer.FileIndex): Index to load (if not loaded already) and scan.
+
+            scan_id (int): Identifier sent with every signal so receivers can ignore signals of cancelled scans.
+
+            batch_interval (float): Seconds to wait between each batch that is sent.
+        """
+        super(ScanWorker, self).__init__(*args, **kwargs)
+        self.file_index = file_index
+        self.scan_id = scan_id
+        self.batch_interval = batch_interval
+        self.search_index = None
+        self.is_cancelled = False
+
+    def cancel(self):
+        """
+        Stops the scan as soon as the directory currently being read finishes. File index is left untouched.
+        """
+        self.is_cancelled = True
+
+    @QtCore.Slot()
+    def run(self):
+        """
+        Loads and scans the file index, emitting batches of directories that have files in them.
+        """
+        batch = []
+        last_emit_time = time.perf_counter()
+
+        try:
+            if not self.file_index.is_loaded:
+                self.file_index.load()
+
+            scanner = self.file_index.iterScan()
+            try:
+                for relative_directory, entry in scanner:
+
+                    if self.is_cancelled:
+                        break
+
+                    if entry['files']:
+                        batch.append((relative_directory, entry['files']))
+
+                    current_time = time.perf_counter()
+                    if batch and current_time - last_emit_time >= self.batch_interval:
+                        self.batch_ready.emit(self.scan_id, batch)
+                        batch = []
+                        last_emit_time = current_time
+            finally:
+                scanner.close()
+
+            if self.is_cancelled:
+                self.scan_finished.emit(self.scan_id, False, '')
+                return
+
+            if batch:
+                self.batch_ready.emit(self.scan_id, batch)
+
+            self.file_index.write()
+            self.search_index = buildSearchIndex(self.file_index)
+
+        except Exception as error:
+            self.scan_finished.emit(self.scan_id, False, str(error))
+            return
+
+        self.scan_finished.emit(self.scan_id, True, '')
+
+
+class StatusWorker(QtCore.QObject):
+
+    # request id, dictionary of normalized path as key and tuple of status and description as value
+    statuses_ready = QtCore.Signal(int, object)
+
+    # request id, error message
+    status_failed = QtCore.Signal(int, str)
+
+    def __init__(self, perforce_class=Perforce, *args, **kwargs):
+        """
+        Gets the P4 status of files, meant to be moved to a long-lived QThread so that asking the P4 server never
+        blocks the UI. Keeps its own connection open between requests, and sends statuses back one chunk at a time.
+
+        Args:
+            perforce_class (type): Perforce class to connect with.
+        """
+        super(StatusWorker, self).__init__(*args, **kwargs)
+        self.perforce_class = perforce_class
+        self.p4 = None
+        self.latest_id = 0  # requests older than this are skipped, set by the thread that makes requests
+
+    @QtCore.Slot(int, object)
+    def fetch(self, request_id, paths):
+        """
+        Gets the status of the given paths with "fstat", in chunks of pcfg.p4_paths_per_command paths.
+
+        Args:
+            request_id (int): Identifier sent with every signal so receivers can ignore statuses of old requests.
+
+            paths (list): Full paths of files to get status of.
+        """
+        chunk_size = pcfg.p4_paths_per_command
+
+        try:
+            if not self.p4:
+                self.p4 = self.perforce_class()
+
+            if not self.p4.connected():
+                self.p4.connect()
+
+            for i in range(0, len(paths), chunk_size):
+
+                if request_id < self.latest_id:
+                    return
+
+                info = self.p4.getInfo(path=paths[i:i + chunk_size])
+                statuses = {InfoCache.normalize(file_info['clientFile']): self.p4.getStatus(file_info)
+                            for file_info in info if 'clientFile' in file_info}
+                self.statuses_ready.emit(request_id, statuses)
+
+        except Exception as error:
+            self.status_failed.emit(request_id, str(error))
+
+    def close(self):
+        """
+        Disconnects from the P4 server. Should only be called once the thread the worker lives in has finished.
+        """
+        if self.p4 and self.p4.connected():
+            self.p4.disconnect()
+
+        self.p4 = None
+
+
 class Browser(QtWidgets.QDialog):
 
+    # request id, list of full paths of files to get the P4 status of
+    status_requested = QtCore.Signal(int, object)
+
     @property
     def mesh_config(self):
         raise NotImplementedError
@@ -255,6 +461,18 @@ class Browser(QtWidgets.QDialog):
     def expanded_directories_config(self):
         raise NotImplementedError
 
+    @property
+    def lazy_config(self):
+        raise NotImplementedError
+
+    @property
+    def p4_status_config(self):
+        raise NotImplementedError
+
+    @property
+    def perforce_config(self):
+        raise NotImplementedError
+
     def __init__(self, app=None, *args, **kwargs):
         """
         Window to handle batching operations of files.
@@ -279,7 +497,10 @@ class Browser(QtWidgets.QDialog):
         # useful data
         self.names = []
         self.directories = []
-        self.expanded_directories = set()
+        self.expanded_directories = {}  # relative directory as key, ordered from least to most recently expanded
+        self.expanded_store = None
+        self.directory_items = {}
+        self.file_index = None
         self.types = self.defineTypes()
         self.search_icon = QtGui.QIcon(f'{self.icons_directory}/piper_search.png')
         self.x_icon = QtGui.QIcon(f'{self.icons_directory}/piper_x.png')
@@ -291,6 +512,30 @@ class Browser(QtWidgets.QDialog):
         self.is_changing_projects = False
         self.searched = False
 
+        # search data, matches are the lower case names that match the current search, None if not searching
+        self.search_index = None
+        self.search_matches = None
+
+        # scan data
+        self.scan_id = 0
+        self.scan_thread = None
+        self.scan_worker = None
+        self.is_threaded_scan = True  # if False, directories are scanned on the main thread, blocking the UI
+        self.select_current_after_scan = False
+        self.is_tree_complete = False
+
+        # lazy data, when lazy, directory children are only created once directory is expanded
+        self.is_lazy = False
+        self.hidden_counts = {}
+
+        # P4 status data, statuses are fetched in a separate thread and shown in the status column of file items
+        self.is_showing_p4_status = False
+        self.status_id = 0
+        self.status_thread = None
+        self.status_worker = None
+        self.status_timer = None
+        self.path_items = {}  # normalized path as key, file item as value
+
         if not self.app:
             self.app = dcc.get(error=False)
 
@@ -302,13 +547,14 @@ class Browser(QtWidgets.QDialog):
         self.store = None
         self.dcc_paths = dcc_paths
         self.dcc_export = dcc_export
+        self.perforce_class = Perforce
 
-        # build / binding events
+        # build / binding events, reloading after changes is deferred so that the change finishes first
         self.build()
         dispatcher.listen(pcfg.before_project_change_event, self.onBeforeProjectChange)
-        dispatcher.listen(pcfg.after_project_change_event, self.onAfterProjectChange)
+        dispatcher.listen(pcfg.after_project_change_event, self.onAfterProjectChange, deferred=True)
         dispatcher.listen(pcfg.before_art_directory_change_event, self.onBeforeArtDirectoryChange)
-        dispatcher.listen(pcfg.after_art_directory_change_event, self.onAfterArtDirectoryChange)
+        dispatcher.listen(pcfg.after_art_directory_change_event, self.onAfterArtDirectoryChange, deferred=True)
 
     def keyPressEvent(self, event):
         """
@@ -451,6 +697,9 @@ class Browser(QtWidgets.QDialog):
         # search bar
         self.search_bar = QtWidgets.QLineEdit()
         self.search_bar.setPlaceholderText('Search...')
+        self.search_bar.setToolTip(f'Searches names that contain the given text. Use * ? [] for globs, start with '
+                                   f'"{pcfg.search_fuzzy_prefix}" for fuzzy search, or "{pcfg.search_regex_prefix}" '
+                                   f'for regular expressions.')
         self.search_bar.textChanged.connect(self.onSearchTextChanged)
         self.search_bar.returnPressed.connect(self.onSearch)
         search_layout.addWidget(self.search_bar)
@@ -491,6 +740,12 @@ class Browser(QtWidgets.QDialog):
         self.total_label.setLineWidth(1)
         label_layout.addWidget(self.total_label)
 
+        if self.store:
+            self.is_lazy = self.store.get(self.lazy_config)
+
+            if self.store.get(self.p4_status_config):
+                self.startStatusService()
+
         # must call reload after all widgets have been created
         self.reload(select_current=True, save_expanded_directories=False)
 
@@ -500,9 +755,29 @@ class Browser(QtWidgets.QDialog):
         main_layout.addWidget(self.tree)
         main_layout.addLayout(label_layout)
 
+    def getFileIndex(self, directory):
+        """
+        Gets the file index of the given directory for the current project. Index is only loaded and scanned by the
+        ScanWorker to avoid blocking the UI.
+
+        Args:
+            directory (string): Full path to directory to get index of, usually the art directory.
+
+        Returns:
+            (indexer.FileIndex): Index of all the files with the browser's extensions in the given directory.
+        """
+        project = self.dcc_paths.getCurrentProject()
+        directory = directory.replace('\\', '/').rstrip('/')
+
+        if not self.file_index or self.file_index.directory != directory or self.file_index.project != project:
+            self.file_index = indexer.FileIndex(directory, self.extensions, self.dcc_paths.getFileType,
+                                                project=project, app=self.app)
+
+        return self.file_index
+
     def loadTree(self, starting_directory=None):
         """
-        Starts the directory read for the Tree Widget.
+        Starts the directory read for the Tree Widget. Tree is populated as the scan sends batches of directories.
         """
         if not starting_directory:
             starting_directory = self.dcc_paths.getArtDirectory(error=True)
@@ -511,41 +786,355 @@ class Browser(QtWidgets.QDialog):
         self.top_item.path = Path(starting_directory)
         self.top_item.is_top_item = True
         self.top_item.is_directory = True
+        self.top_item.is_populated = not self.is_lazy
         self.top_item.setExpanded(True)
-        self.readDirectory(self.top_item.path, self.top_item)
+        self.directory_items = {'': self.top_item}
+        self.is_tree_complete = False
+        self.getFileIndex(starting_directory)
+        self.startScan()
+
+    def startScan(self):
+        """
+        Starts scanning the file index in a separate thread, or on the main thread if is_threaded_scan is False.
+        """
+        self.scan_id += 1
+        self.scan_worker = ScanWorker(self.file_index, self.scan_id)
+        self.scan_worker.batch_ready.connect(self.onScanBatch)
+        self.scan_worker.scan_finished.connect(self.onScanFinished)
+
+        if not self.is_threaded_scan:
+            self.scan_worker.run()
+            return
+
+        self.scan_thread = QtCore.QThread(self)
+        self.scan_worker.moveToThread(self.scan_thread)
+        self.scan_thread.started.connect(self.scan_worker.run)
+        self.scan_thread.start()
+
+    def stopScan(self):
+        """
+        Stops the scan thread and releases the worker.
+        """
+        if self.scan_thread:
+            self.scan_thread.quit()
+            self.scan_thread.wait()
+
+        self.scan_thread = None
+        self.scan_worker = None
+
+    def cancelScan(self):
+        """
+        Cancels the scan that is currently happening, if any. Batches already sent by the cancelled scan are ignored.
+
+        Returns:
+            (boolean): True if a scan was cancelled.
+        """
+        if not self.scan_worker:
+            return False
+
+        self.scan_worker.cancel()
+        self.scan_id += 1
+        self.stopScan()
+        return True
+
+    def isScanning(self):
+        """
+        Gets whether a scan is currently populating the tree.
+
+        Returns:
+            (boolean): True if scan has not finished yet.
+        """
+        return self.scan_worker is not None
+
+    def onScanBatch(self, scan_id, batch):
+        """
+        Called when the scan worker sends a batch of directories to populate the tree with.
+
+        Args:
+            scan_id (int): Identifier of scan that sent batch. Ignored if it is not the current scan.
+
+            batch (list): Tuples of relative directory as first index, and list of files as second index.
+        """
+        # lazy browser only creates items once scan is finished and directories are expanded
+        if scan_id != self.scan_id or self.is_lazy:
+            return
+
+        [self.readDirectory(relative_directory, files) for relative_directory, files in batch]
+        self.updateTotalLabel()
+
+    def onScanFinished(self, scan_id, is_complete, error):
+        """
+        Called when scan worker finishes. Updates completer, directory visibility, search, and selection.
+
+        Args:
+            scan_id (int): Identifier of scan that finished. Ignored if it is not the current scan.
+
+            is_complete (boolean): True if scan walked the whole directory.
+
+            error (string): Error message if scan failed.
+        """
+        if scan_id != self.scan_id:
+            return
+
+        self.search_index = self.scan_worker.search_index
+        self.stopScan()
+
+        if error:
+            self.dcc_paths.warn(f'Browser could not read {self.top_item.path.as_posix()}! {error}')
+
+        if not is_complete:
+            return
+
+        self.is_tree_complete = True
+
+        if self.is_lazy:
+            self.names = self.file_index.getNames()
+            self.updateHiddenCounts()
+            self.populateDirectoryItem(self.top_item)
+
+        self.completer_model.setStringList(self.names)
+        self.refreshStatuses()
+
+        # items may have been added after the user searched, so they need to be filtered too
+        if self.searched and self.search_bar.text():
+            self.onSearch()
+        else:
+            self.onItemsHiddenUpdate()
+
+        if self.select_current_after_scan:
+            self.select_current_after_scan = False
+            self.selectScene(display_not_found=False)
+
+    def getDirectoryItem(self, relative_directory):
+        """
+        Gets the directory item that represents the given relative directory, creating it and its parents if needed.
+
+        Args:
+            relative_directory (string): Directory relative to the art directory.
+
+        Returns:
+            (DirectoryItem or None): Item that represents given directory. None if lazy and directory is not indexed.
+        """
+        item = self.directory_items.get(relative_directory)
+        if item:
+            return item
+
+        parent_directory, _, name = relative_directory.rpartition('/')
+        parent_item = self.getDirectoryItem(parent_directory)
+
+        if not parent_item:
+            return None
+
+        # lazy directories create all their children at once, given directory may not be in the index though
+        if self.is_lazy:
+            self.populateDirectoryItem(parent_item)
+            return self.directory_items.get(relative_directory)
+
+        item = self.createDirectoryItem(parent_item, parent_item.path / name)
+        self.directory_items[relative_directory] = item
+        return item
+
+    def readDirectory(self, relative_directory, files):
+        """
+        Populates the tree with the given files. Only directories that hold files are created, so there are no empty
+        directories in the tree.
+
+        Args:
+            relative_directory (string): Directory relative to the art directory that the files are in.
+
+            files (list): Files from the file index as lists of name and file type.
+        """
+        parent_item = self.getDirectoryItem(relative_directory)
+        for file_name, file_type in files:
+            self.createFileItem(parent_item, parent_item.path / file_name, file_type)
+
+    def populateDirectoryItem(self, item):
+        """
+        Creates the child directories and files of the given lazy directory item from the file index.
+        Counts come from the file index, so creating the items does not update any parent counts.
+
+        Args:
+            item (DirectoryItem): Item to create children of if they have not been created yet.
+        """
+        if item.is_populated or not self.is_tree_complete:
+            return
+
+        item.is_populated = True
+        file_counts = self.file_index.getFileCounts()
+        matches = self.search_matches
+
+        for name in self.file_index.getDirectories(item.relative_directory):
+            relative_directory = self.file_index.join(item.relative_directory, name)
+            file_count = file_counts.get(relative_directory, 0)
+
+            if not file_count:
+                continue
+
+            child_item = self.createDirectoryItem(item, item.path / name)
+            self.directory_items[relative_directory] = child_item
+            child_item.child_file_count = file_count
+            child_item.current_hidden_count = self.hidden_counts.get(relative_directory, 0)
+            child_item.setHidden(child_item.current_hidden_count >= child_item.child_file_count)
+
+        for file_name, file_type in self.file_index.getFiles(item.relative_directory):
+            file_item = self.createFileItem(item, item.path / file_name, file_type)
+            search_hidden = matches is not None and file_item.search_name not in matches
+            file_item.setHiddenStates(self.types[file_type]['hidden'], search_hidden)
+
+    def createDirectoryItem(self, parent_item, path):
+        """
+        Creates a directory item and keeps track of it.
+
+        Args:
+            parent_item (DirectoryItem): Item to parent new item to.
+
+            path (pathlib.Path): Full path to directory.
+
+        Returns:
+            (DirectoryItem): Item created.
+        """
+        item = DirectoryItem(parent_item, [path.name, '', '', ''])
+        item.path = path
+        item.relative_directory = indexer.FileIndex.join(parent_item.relative_directory, path.name)
+        item.setToolTip(0, path.as_posix())
+        parent_item.children_directories.append(item)
+        self.directories.append(item)
+
+        if self.is_lazy:
+            item.is_populated = False
+            item.setChildIndicatorPolicy(QtWidgets.QTreeWidgetItem.ShowIndicator)
 
-    def readDirectory(self, path, parent_item):
+        # if lazy, expanding populates the item through onItemExpanded, so item must be set up before this
+        item.setExpanded(item.relative_directory in self.expanded_directories)
+        return item
+
+    def createFileItem(self, parent_item, path, file_type):
         """
-        Recursive read of directory that populates tree widget.
+        Creates a file item and keeps track of it in its type's items.
+        If browser is lazy, parent counts and names come from the file index instead.
 
         Args:
-            path (pathlib.Path): Full path to file or directory. If directory, will call this function again.
-
-            parent_item (BrowserItem): Item to parent new item to.
-        """
-        directory = os.listdir(path)
-
-        for file_name in directory:
-            file_path = path / file_name
-
-            if file_name.endswith(self.extensions):
-                item = FileItem(parent_item, [file_path.stem, '', '', ''])
-                item.path = file_path
-                item.file_type = self.dcc_paths.getFileType(path, file_name)
-                item.setIcon(0, self.types[item.file_type]['icon'])
-                item.setToolTip(0, file_path.as_posix())
-                item.setInitialHidden(self.types[item.file_type]['hidden'])
-                self.types[item.file_type]['items'].append(item)
-                self.names.append(file_path.stem)
-
-            elif os.path.isdir(file_path):
-                item = DirectoryItem(parent_item, [file_name, '', '', ''])
-                item.path = file_path
-                item.setToolTip(0, file_path.as_posix())
-                parent_item.children_directories.append(item)
-                item.setExpanded(item.path in self.expanded_directories)
-                self.directories.append(item)
-                self.readDirectory(file_path, item)
+            parent_item (DirectoryItem): Item to parent new item to.
+
+            path (pathlib.Path): Full path to file.
+
+            file_type (FileType): Type of file the path is.
+
+        Returns:
+            (FileItem): Item created.
+        """
+        item = FileItem(parent_item, [path.stem, '', '', ''])
+        item.path = path
+        item.file_type = file_type
+        item.search_name = path.stem.lower()
+        item.setIcon(0, self.types[file_type]['icon'])
+        item.setToolTip(0, path.as_posix())
+        parent_item.children_files.append(item)
+        self.types[file_type]['items'].append(item)
+        self.path_items[InfoCache.normalize(str(path))] = item
+
+        if not self.is_lazy:
+            item.addChildFileCount()
+            item.setInitialHidden(self.types[file_type]['hidden'])
+            self.names.append(path.stem)
+
+        return item
+
+    def findMatches(self, text):
+        """
+        Finds the names that match the given search text with the search index. Index is built from the file index, or
+        the current names if there is no file index, if the scan did not build one, such as when the scan was cancelled.
+
+        Args:
+            text (string): Text to search for. See searcher.SearchIndex.find for the types of queries supported.
+
+        Returns:
+            (set): Lower case names that match the given text.
+        """
+        if self.search_index is None and self.file_index is not None:
+            self.search_index = buildSearchIndex(self.file_index)
+        elif self.search_index is None:
+            self.search_index = searcher.SearchIndex(self.names)
+
+        try:
+            return self.search_index.find(text)
+        except re.error as error:
+            self.dcc_paths.warn(f'{text} is not a valid search! {error}')
+            return set()
+
+    def updateHiddenCounts(self):
+        """
+        Counts how many files each directory in the file index hides due to type filters and search.
+        Used by lazy browsers, since most of their files do not have items.
+
+        Returns:
+            (dictionary): Relative directory as key, hidden file count as value.
+        """
+        hidden_types = {file_type for file_type in self.types if self.types[file_type]['hidden']}
+
+        if self.search_matches is None:
+            self.hidden_counts = self.file_index.countFiles(lambda _, file_data: file_data[1] in hidden_types)
+            return self.hidden_counts
+
+        # only the files that match the search are visible, so count those and their parents instead of every file
+        visible_counts = {}
+        for name in self.search_matches:
+            for relative_directory, file_type in self.search_index.getLocations(name):
+
+                if file_type in hidden_types:
+                    continue
+
+                while True:
+                    visible_counts[relative_directory] = visible_counts.get(relative_directory, 0) + 1
+
+                    if not relative_directory:
+                        break
+
+                    relative_directory = relative_directory.rpartition('/')[0]
+
+        file_counts = self.file_index.getFileCounts()
+        self.hidden_counts = {directory: count - visible_counts.get(directory, 0)
+                              for directory, count in file_counts.items()}
+        return self.hidden_counts
+
+    def recountHiddenDirectories(self):
+        """
+        Recounts how many files each directory item hides in one bottom-up pass, instead of walking up the parents of
+        every file item that changed visibility.
+        """
+        # directories are created after their parents, so reversed guarantees children are counted before parents
+        for item in reversed(self.directories):
+            hidden_count = len([f for f in item.children_files if f.type_visibility or f.search_visibility])
+            hidden_count += sum([child.current_hidden_count for child in item.children_directories])
+            item.current_hidden_count = hidden_count
+
+    def updateItemsVisibility(self, file_types=None):
+        """
+        Bulk version of FileItem.setTypeHidden and FileItem.setSearchHidden. Sets the visibility of all the items of the
+        given types based on their type filter and the current search matches, recounts every directory's hidden count
+        in one bottom-up pass, then updates the directories' visibility. Qt updates are blocked while items change.
+
+        Args:
+            file_types (list): Types of items to update. If None, will update items of all types.
+        """
+        matches = self.search_matches
+        self.tree.setUpdatesEnabled(False)
+
+        try:
+            for file_type in file_types or self.types:
+                type_hidden = self.types[file_type]['hidden']
+
+                for item in self.types[file_type]['items']:
+                    item.setHiddenStates(type_hidden, matches is not None and item.search_name not in matches)
+
+            # lazy browsers get their counts from the file index in onItemsHiddenUpdate
+            if not self.is_lazy:
+                self.recountHiddenDirectories()
+
+            self.onItemsHiddenUpdate()
+
+        finally:
+            self.tree.setUpdatesEnabled(True)
 
     def updateSelectedLabel(self):
         """
@@ -573,6 +1162,11 @@ class Browser(QtWidgets.QDialog):
         """
         Updates the directories visibility after items have been shown/hidden.
         """
+        if self.is_lazy and self.is_tree_complete:
+            self.updateHiddenCounts()
+            for item in self.directories:
+                item.current_hidden_count = self.hidden_counts.get(item.relative_directory, 0)
+
         [item.setHidden(item.current_hidden_count >= item.child_file_count) for item in self.directories]
         self.updateTotalLabel()
 
@@ -580,6 +1174,8 @@ class Browser(QtWidgets.QDialog):
         """
         Removes all the items from the QWidgetTree.
         """
+        self.cancelScan()
+
         if not self.top_item:
             return
 
@@ -591,42 +1187,81 @@ class Browser(QtWidgets.QDialog):
 
         self.directories.clear()
         self.directories = []
+        self.directory_items = {}
+        self.path_items = {}
+        self.status_id += 1
+
+        if self.status_worker:
+            self.status_worker.latest_id = self.status_id
         self.names.clear()
         self.names = []
+        self.search_index = None
         self.search_bar.setText("")
         # self.setSearchState(False)
         self.top_item = None
 
-    def removeEmptyDirectories(self):
+    def getExpandedStore(self):
         """
-        Removes all empty directories from the item tree widget.
+        Gets the sidecar store that holds the expanded directories of every project, next to the DCC's store.
+
+        Returns:
+            (ExpandedDirectories): Store of expanded directories relative to the art directory.
         """
-        to_keep = []
-        for item in reversed(self.directories):
-            if item.childCount():
-                to_keep.append(item)
-            else:
-                item.parent().children_directories.remove(item)
-                QtCompat.delete(item)
+        if not self.expanded_store:
+            self.expanded_store = ExpandedDirectories(self.store.getSidecarPath(pcfg.expanded_directories_suffix))
+
+        return self.expanded_store
+
+    def migrateExpandedDirectories(self, project):
+        """
+        Moves the given project's expanded directories from the DCC's store, where they used to be stored as full
+        paths, to the sidecar store as paths relative to the art directory.
+
+        Args:
+            project (string): Name of project to migrate.
+        """
+        stored_directories = dict(self.store.get(self.expanded_directories_config))  # store may be writing the original
+        paths = stored_directories.pop(project, None)
+        art_directory = self.dcc_paths.getArtDirectory()
+
+        if paths is None or not art_directory:
+            return
+
+        art_directory = Path(art_directory)
+        expanded_directories = [Path(path).relative_to(art_directory).as_posix() for path in paths
+                                if art_directory in Path(path).parents]
 
-        self.directories = to_keep
+        self.getExpandedStore().set(project, expanded_directories)
+        self.store.set(self.expanded_directories_config, stored_directories)
 
     def saveExpandedDirectories(self):
         """
-        Saves/stores the expanded directories in the DCC's store.
+        Saves/stores the expanded directories in the expanded directories sidecar store. Directories that were already
+        stored keep their order, and newly expanded directories are added as the most recent.
 
         Returns:
             (boolean): True if save was successful.
         """
         # if there is no current project set, then there are no directories to save
         current_project = self.dcc_paths.getCurrentProject()
-        if not current_project:
+        if not current_project or not self.store:
             return False
 
-        expanded_directories = [item.path.as_posix() for item in self.directories if item.isExpanded()]
-        stored_directories = self.store.get(self.expanded_directories_config)
-        stored_directories[current_project] = expanded_directories
-        self.store.set(self.expanded_directories_config, stored_directories, write=True)
+        created = {item.relative_directory: item for item in self.directories}
+
+        # directories that the scan or lazy expansion has not created yet must keep their previously stored state
+        keep_missing = not self.is_tree_complete or self.is_lazy
+        expanded_directories = []
+        for directory in self.expanded_directories:
+            item = created.get(directory)
+
+            if (item and item.isExpanded()) or (not item and keep_missing):
+                expanded_directories.append(directory)
+
+        expanded_directories += [directory for directory, item in created.items()
+                                 if item.isExpanded() and directory not in self.expanded_directories]
+
+        self.getExpandedStore().set(current_project, expanded_directories)
         return True
 
     def loadExpandedDirectories(self):
@@ -636,20 +1271,22 @@ class Browser(QtWidgets.QDialog):
         Returns:
             (boolean): True if load was successful.
         """
-        self.expanded_directories = set()
+        self.expanded_directories = {}
         current_project = self.dcc_paths.getCurrentProject()
-        if not current_project:
+        if not current_project or not self.store:
             return False
 
-        project_expanded_directories = self.store.get(self.expanded_directories_config)
-        previously_expanded_directories = project_expanded_directories.setdefault(current_project, [])
-        self.expanded_directories = {Path(path) for path in previously_expanded_directories}
+        if not self.getExpandedStore().has(current_project):
+            self.migrateExpandedDirectories(current_project)
+
+        # dictionary keeps the order directories were expanded in, from least to most recent
+        self.expanded_directories = dict.fromkeys(self.getExpandedStore().get(current_project))
         return True
 
     def reload(self, select_current=True, save_expanded_directories=False):
         """
-        Reloads the tree widget by removing all the items and reading all the directories recursively.
-        Useful for when new files are saved or added in directories.
+        Reloads the tree widget by removing all the items and rebuilding them from the file index, which only re-reads
+        the directories that changed on disk. Useful for when new files are saved or added in directories.
 
         Args:
             select_current (boolean): If True, will select the item that is associated with the current scene.
@@ -668,13 +1305,8 @@ class Browser(QtWidgets.QDialog):
                                 'Please set art directory in Projects before opening Browser window.')
             return
 
+        self.select_current_after_scan = select_current
         self.loadTree()
-        self.removeEmptyDirectories()
-        self.completer_model.setStringList(self.names)
-        self.onItemsHiddenUpdate()
-
-        if select_current:
-            self.selectScene(display_not_found=False)
 
     def selectScene(self, scene=None, display_not_found=True):
         """
@@ -700,6 +1332,15 @@ class Browser(QtWidgets.QDialog):
 
         path = Path(scene)
         file_type = self.dcc_paths.getFileType(str(path.parent), path.name)
+
+        # lazy browser may not have created the scene's item yet
+        if self.is_lazy and self.top_item and self.top_item.path in path.parents:
+            relative_directory = path.parent.relative_to(self.top_item.path).as_posix()
+            directory_item = self.getDirectoryItem('' if relative_directory == '.' else relative_directory)
+
+            if directory_item:
+                self.populateDirectoryItem(directory_item)
+
         for item in self.types[file_type]['items']:
 
             if item.path == path:
@@ -727,15 +1368,16 @@ class Browser(QtWidgets.QDialog):
         dispatcher.unlisten(pcfg.after_project_change_event, self.onAfterProjectChange)
         dispatcher.unlisten(pcfg.before_art_directory_change_event, self.onBeforeArtDirectoryChange)
         dispatcher.unlisten(pcfg.after_art_directory_change_event, self.onAfterArtDirectoryChange)
+        self.cancelScan()
+        self.stopStatusService()
 
         if not self.store:
             return
 
         [self.store.set(self.types[t]['config'], self.types[t]['button'].isChecked(), write=False) for t in self.types]
 
-        # if save of store didn't happen in expanded directories function, then we must manually call write settings
-        if not self.saveExpandedDirectories():
-            self.store.writeSettings()
+        self.saveExpandedDirectories()
+        self.store.writeSettings()
 
     def onFilterPressed(self, file_type, *_):
         """
@@ -743,18 +1385,170 @@ class Browser(QtWidgets.QDialog):
         """
         state = not self.types[file_type]['button'].isChecked()
         self.types[file_type]['hidden'] = state
-        text = self.search_bar.text().lower()
+        text = self.search_bar.text()
 
+        # pressing a filter with text in the search bar also searches, which can change the visibility of every type
         if text:
             self.setSearchState(True)
-            for item in self.types[file_type]['items']:
-                item.setTypeHidden(state)
-                item.setSearchHidden(text not in item.path.stem.lower())
+            self.search_matches = self.findMatches(text)
+            self.updateItemsVisibility()
+        else:
+            self.updateItemsVisibility([file_type])
+
+    def setLazy(self, state):
+        """
+        Sets whether directories should only create their children when expanded, and reloads the tree.
+
+        Args:
+            state (boolean): If True, directory children are created when directory is expanded.
+        """
+        if self.is_lazy == state:
+            return
+
+        self.is_lazy = state
+        self.reload(select_current=True, save_expanded_directories=True)
 
+    def startStatusService(self):
+        """
+        Starts the thread that gets the P4 status of files, and the timer that refreshes the statuses of the files in
+        expanded directories. Shows the status column.
+        """
+        if self.is_showing_p4_status:
+            return
+
+        self.is_showing_p4_status = True
+        self.tree.setColumnCount(2)
+
+        self.status_worker = StatusWorker(self.perforce_class)
+        self.status_thread = QtCore.QThread(self)
+        self.status_worker.moveToThread(self.status_thread)
+        self.status_requested.connect(self.status_worker.fetch)
+        self.status_worker.statuses_ready.connect(self.onStatusesReady)
+        self.status_worker.status_failed.connect(self.onStatusFailed)
+        self.status_thread.start()
+
+        self.status_timer = QtCore.QTimer(self)
+        self.status_timer.setInterval(pcfg.p4_status_refresh_seconds * 1000)
+        self.status_timer.timeout.connect(self.refreshStatuses)
+        self.status_timer.start()
+
+    def stopStatusService(self):
+        """
+        Stops the P4 status thread and timer, disconnects the worker from P4, and clears the status column.
+        """
+        if not self.is_showing_p4_status:
+            return
+
+        self.is_showing_p4_status = False
+        self.status_id += 1
+        self.status_worker.latest_id = self.status_id
+        self.status_timer.stop()
+        self.status_requested.disconnect(self.status_worker.fetch)
+        self.status_thread.quit()
+        self.status_thread.wait()
+        self.status_worker.close()
+
+        self.status_timer = None
+        self.status_thread = None
+        self.status_worker = None
+
+        [item.setStatus(None, None) for item in self.path_items.values() if item.p4_status]
+        self.tree.setColumnCount(1)
+
+    def setP4Status(self, state):
+        """
+        Sets whether the P4 status of the files in expanded directories should be shown.
+
+        Args:
+            state (boolean): If True, shows the P4 status of files next to their names.
+        """
+        if state:
+            self.startStatusService()
+            self.refreshStatuses()
         else:
-            [item.setTypeHidden(state) for item in self.types[file_type]['items']]
+            self.stopStatusService()
+
+    def getExpandedFileItems(self):
+        """
+        Gets the file items that are not hidden and are in expanded directories whose parent directories are all
+        expanded too, these are the ones users can see.
+
+        Returns:
+            (list): File items in expanded directories.
+        """
+        if not self.top_item:
+            return []
+
+        # walking down from the top item only reaches directories whose parents are all expanded and shown
+        items = []
+        to_visit = [self.top_item]
+
+        while to_visit:
+            directory = to_visit.pop()
+            if not directory.isExpanded() or directory.isHidden():
+                continue
+
+            items += [item for item in directory.children_files if not item.isHidden()]
+            to_visit.extend(directory.children_directories)
+
+        return items
+
+    def requestStatuses(self, items):
+        """
+        Asks the status worker for the P4 status of the given items. Statuses arrive in onStatusesReady.
+
+        Args:
+            items (list): File items to get the P4 status of.
+        """
+        if not self.is_showing_p4_status:
+            return
+
+        paths = [str(item.path) for item in items if not item.is_directory]
+        if not paths:
+            return
+
+        self.status_worker.latest_id = self.status_id
+        self.status_requested.emit(self.status_id, paths)
+
+    def refreshStatuses(self):
+        """
+        Gets the P4 status of all the files in expanded directories.
+        """
+        self.requestStatuses(self.getExpandedFileItems())
+
+    def onStatusesReady(self, request_id, statuses):
+        """
+        Called when the status worker sends a chunk of statuses to show.
+
+        Args:
+            request_id (int): Identifier of request. Ignored if items have been re-created since the request was made.
 
-        self.onItemsHiddenUpdate()
+            statuses (dictionary): Normalized path as key, tuple of status and description as value.
+        """
+        if request_id != self.status_id or not self.is_showing_p4_status:
+            return
+
+        for path, (status, description) in statuses.items():
+            item = self.path_items.get(path)
+
+            if item and (item.p4_status != status or item.toolTip(1) != description):
+                item.setStatus(status, description)
+
+    def onStatusFailed(self, request_id, error):
+        """
+        Called when the status worker could not get the status of files. Stops the status service to avoid asking a
+        server that is not there every refresh. Reloading the browser or toggling the P4 status starts it again.
+
+        Args:
+            request_id (int): Identifier of request that failed.
+
+            error (string): Error message of failure.
+        """
+        if request_id != self.status_id or not self.is_showing_p4_status:
+            return
+
+        self.dcc_paths.warn(f'Browser could not get P4 status! {error}')
+        self.stopStatusService()
 
     def onReloadButtonPressed(self):
         """
@@ -781,28 +1575,22 @@ class Browser(QtWidgets.QDialog):
         if not self.searched or self.search_bar.text():
             return
 
-        [i.setSearchHidden(False) for t in self.types if not self.types[t]['hidden'] for i in self.types[t]['items']]
-        self.onItemsHiddenUpdate()
+        self.search_matches = None
+        self.updateItemsVisibility()
         self.setSearchState(False)
 
     def onSearch(self):
         """
         Filters the items in the QTreeWidget by hiding any items that don't match the search bar text.
-        Only runs through items not already hidden by filter.
+        Matches come from the search index, and visibility is applied to all items in one batched pass.
         """
-        text = self.search_bar.text().lower()
+        text = self.search_bar.text()
         if not text:
             return
 
         self.setSearchState(True)
-        for file_type in self.types:
-            if self.types[file_type]['hidden']:
-                continue
-
-            for item in self.types[file_type]['items']:
-                item.setSearchHidden(text not in item.path.stem.lower())
-
-        self.onItemsHiddenUpdate()
+        self.search_matches = self.findMatches(text)
+        self.updateItemsVisibility()
 
     def onSearchButtonPressed(self):
         """
@@ -818,9 +1606,10 @@ class Browser(QtWidgets.QDialog):
 
     def onBeforeProjectChange(self):
         """
-        Called right before project changes to save which directories were expanded.
+        Called right before project changes to save which directories were expanded and stop any scan happening.
         """
         self.saveExpandedDirectories()
+        self.cancelScan()
         self.is_changing_projects = True
 
     def onAfterProjectChange(self):
@@ -839,6 +1628,7 @@ class Browser(QtWidgets.QDialog):
             return
 
         self.saveExpandedDirectories()
+        self.cancelScan()
 
     def onAfterArtDirectoryChange(self):
         """
@@ -895,9 +1685,7 @@ class Browser(QtWidgets.QDialog):
             formatted_paths = python.listToStrings(paths)
             filer.copyToClipboard(formatted_paths)
 
-        p4 = Perforce()
-        with p4.connect():
-            info = p4.getInfo(path=paths)
+        info = getConnection(self.perforce_class).getInfo(path=paths)
 
         if not info:
             self.dcc_paths.warn('Could not get depot info from selected items!')
@@ -959,11 +1747,15 @@ class Browser(QtWidgets.QDialog):
 
     def onItemExpanded(self, item):
         """
-        Called when item is expanded to be able to expand all its children if shift held.
+        Called when item is expanded to create its children if browser is lazy, and to be able to expand all its
+        children if shift held.
 
         Args:
             item (BrowserItem): Item that was expanded.
         """
+        self.populateDirectoryItem(item)
+        self.requestStatuses(item.children_files)
+
         if self.is_updating_items:
             return
 
@@ -1021,7 +1813,7 @@ class Browser(QtWidgets.QDialog):
             items (list): Items to make available to the user in P4.
         """
         paths = self.getItemsPaths(items)
-        makeAvailable(path=paths)
+        getConnection(self.perforce_class).makeAvailable(path=paths)
 
     @staticmethod
     def unavailableTip(widget, insert_text):
@@ -1171,6 +1963,8 @@ class Browser(QtWidgets.QDialog):
 
             filtered_set (set): Set to add file items to.
         """
+        self.populateDirectoryItem(directory)
+
         for i in range(directory.childCount()):
             child_item = directory.child(i)
 
@@ -1183,6 +1977,72 @@ class Browser(QtWidgets.QDialog):
             elif self.dcc_paths.is_exportable[child_item.file_type]:
                 filtered_set.add(child_item)
 
+    def prepareExportItems(self, file_items):
+        """
+        Uses the P4 status of the given items, if shown, to skip the files other users have checked out and to get the
+        latest revision of all the files that are out of date in one sync, before any file is opened.
+
+        Args:
+            file_items (Iterable): Items that are about to be exported.
+
+        Returns:
+            (list): Items that can be exported.
+        """
+        file_items = list(file_items)
+        if not self.is_showing_p4_status:
+            return file_items
+
+        locked = [item for item in file_items if item.p4_status == pcfg.p4_status_checked_out_by_other]
+        out_of_date = [item for item in file_items if item.p4_status == pcfg.p4_status_out_of_date]
+
+        if locked:
+            self.dcc_paths.warn('Skipping files checked out by others: ' + ', '.join(self.getFilesNames(locked)))
+
+        if out_of_date:
+            getConnection(self.perforce_class).getLatest(path=self.getItemsPaths(out_of_date))
+            self.requestStatuses(out_of_date)
+
+        return [item for item in file_items if item.p4_status != pcfg.p4_status_checked_out_by_other]
+
+    def prepareExportPaths(self, transaction, file_items):
+        """
+        Syncs and checks out, in one pass before any file is written, all the files the given items exported last time.
+        Skips the items that exported files other users have checked out.
+
+        Args:
+            transaction (Transaction): Transaction the items are exported in.
+
+            file_items (list): Items that are about to be exported.
+
+        Returns:
+            (list): Items that can be exported.
+        """
+        cache = export_cache.export_cache
+        exports = cache.getExports(self.getItemsPaths(file_items))
+
+        # files that were exported but are gone since have nothing to check out
+        exports = {source: [path for path in source_exports if os.path.exists(path)]
+                   for source, source_exports in exports.items()}
+        paths = [path for source_exports in exports.values() for path in source_exports]
+
+        if not paths:
+            return file_items
+
+        p4 = transaction.p4
+        failed = {InfoCache.normalize(path) for path in p4.getActions(p4.getInfo(path=paths), add=False)['failed']}
+        locked = {source for source, source_exports in exports.items()
+                  if any(InfoCache.normalize(path) in failed for path in source_exports)}
+        locked_items = [item for item in file_items if cache.normalize(item.path) in locked]
+
+        if locked_items:
+            self.dcc_paths.warn('Skipping files that export files checked out by others: ' +
+                                ', '.join(self.getFilesNames(locked_items)))
+
+        # info of paths was just cached, so preparing them only asks the server to sync and check out
+        paths = [path for source, source_exports in exports.items() if source not in locked for path in source_exports]
+        transaction.prepare(paths) if paths else None
+        return [item for item in file_items if item not in locked_items]
+
     def export(self, export_method, file_items=None):
         """
         Exports the given items with the given export_method.
@@ -1195,12 +2055,22 @@ class Browser(QtWidgets.QDialog):
         if not file_items:
             file_items = self.getDirectoryFilteredFileItems()
 
+        file_items = self.prepareExportItems(file_items)
+
+        # exported files are staged in the transaction, then checked out or added all at once after the batch
+        use_perforce = self.store and self.store.get(self.perforce_config)
+        transaction = Transaction(getConnection(self.perforce_class)) if use_perforce else contextlib.nullcontext()
+
         # adding try/finally to make sure to turn off batching state even if batch export fails.
         try:
             self.is_batching = True
-            for item in file_items:
-                self.dcc_paths.open(item.path.as_posix())
-                export_method()
+            with transaction, export_cache.export_cache.batch():
+                if use_perforce:
+                    file_items = self.prepareExportPaths(transaction, file_items)
+
+                for item in file_items:
+                    self.dcc_paths.open(item.path.as_posix())
+                    export_method()
         finally:
             self.is_batching = False
 
@@ -6,6 +6,7 @@ from Qt import QtWidgets, QtCore, QtGui
 
 import piper.config as pcfg
 import piper.core.namer as namer
+from piper.core.events import dispatcher
 from piper.core.store import piper_store
 
 
@@ -421,3 +422,6 @@ class TreeWidget(QtWidgets.QTreeWidget):
 
 
 manager = getManager()
+
+# deferred event listeners run once Qt's event loop is idle
+dispatcher.setScheduler(lambda method: QtCore.QTimer.singleShot(0, method))
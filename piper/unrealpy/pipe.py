@@ -1,11 +1,7 @@
 #  Copyright (c) Christian Corsica. All Rights Reserved.
 
-import os
-
 import piper.config as pcfg
-import piper.core
-import piper.core.dcc as dcc
-import piper.core.pythoner as python
+import piper.core.scheduler as scheduler
 from piper.core.store import piper_store
 
 import piper.unrealpy.metadata as metadata
@@ -27,6 +23,7 @@ def openInDCC():
 def reexport(single=False):
     """
     Re-exports the selected assets by looking up its source file and DCC in the metadata.
+    Many assets are split across headless DCC processes that export at the same time, see piper.core.scheduler.
 
     Returns:
         (dictionary): Data that was used to reexport files.
@@ -37,22 +34,15 @@ def reexport(single=False):
 
         return app, source_path, piper_node, export_method
 
-    i = 0
     dcc_names = metadata.getByDCC(absolute_path=True)
-    directory = piper.core.getTempDirectory()
-    json_file = directory + '/' + pcfg.export_file_name
-    python.writeJson(json_file, dcc_names)
     dcc_versions = piper_store.get(pcfg.preferred_dcc_versions)
+    report = scheduler.run(dcc_names, versions=dcc_versions)
+    report_path = scheduler.writeReport(report)
 
-    for dcc_name, data in dcc_names.items():
-        app = dcc.mapping[dcc_name]()
-        version = dcc_versions.get(dcc_name)
-        app.exportFromJSON(json_file, version=version)
-        i += len(data)
+    print(f'Finished exporting {report["succeeded"]} files from {len(dcc_names)} DCCs with {report["workers"]} '
+          f'workers in {round(report["time"], 3)} seconds. Report written to {report_path}')
 
-    # clean up temp files
-    os.remove(json_file)
-    piper.core.deleteTempDirectory()
+    if report['failed']:
+        print(f'Failed to export {len(report["failed"])} files:\n' + '\n'.join(report['failed']))
 
-    print(f'Finished Exporting {str(i)} files from {len(list(dcc_names.keys()))} DCCs')
     return dcc_names
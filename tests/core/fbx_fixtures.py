@@ -0,0 +1,373 @@
+#  Copyright (c) Christian Corsica. All Rights Reserved.
+
+import os
+
+import piper.core.fbx_file as fbx_file
+
+
+frame_rate = 30
+frame_time = fbx_file.ticks_per_second // frame_rate  # FBX ticks in one frame
+footer_id = bytes(range(16))
+footer_magic = b'\xf8\x5a\x8c\x6a\xde\xf5\xd9\x7e\xec\xe9\x0c\xe3\x75\x8f\x29\x0b'
+
+
+def record(name, properties=(), children=()):
+    """
+    Makes a record to write to a fixture file.
+
+    Args:
+        name (string): Name of record, such as "Model" or "P".
+
+        properties (Iterable): Tuples of FBX type code and value, such as ("L", 1) or ("f", [0.0, 1.0]).
+
+        children (Iterable): Nested records.
+
+    Returns:
+        (tuple): Name, list of properties, and list of nested records.
+    """
+    return name, list(properties), list(children)
+
+
+def prop(name, type_name, *values):
+    """
+    Makes a "P" record of a "Properties70" record.
+
+    Args:
+        name (string): Name of property, such as "TimeSpanStart".
+
+        type_name (string): FBX type of property, such as "KTime" or "KString".
+
+        values (tuple): Tuples of FBX type code and value.
+
+    Returns:
+        (tuple): P record.
+    """
+    return record('P', [('S', name), ('S', type_name), ('S', ''), ('S', 'A+U')] + list(values))
+
+
+def objectName(name, class_name):
+    """
+    Gets the given name as binary FBX files store object names.
+
+    Args:
+        name (string): Name of object, such as "SM_Chair".
+
+        class_name (string): Class of object, such as "Model".
+
+    Returns:
+        (string): Name as "Name\x00\x01Class".
+    """
+    return name + fbx_file.binary_name_separator + class_name
+
+
+def _encodeRecord(node, position, header):
+    """
+    Encodes the given record and all its nested records as binary.
+
+    Args:
+        node (tuple): Record made with record().
+
+        position (int): Offset in file the record starts at.
+
+        header (struct.Struct): Header of records for the version being written.
+
+    Returns:
+        (bytes): Encoded record.
+    """
+    name, properties, children = node
+    encoded_properties = b''.join(fbx_file.encodeProperty(*value) for value in properties)
+    encoded_name = name.encode()
+    encoded_children = b''
+    child_position = position + header.size + len(encoded_name) + len(encoded_properties)
+
+    for child in children:
+        encoded_child = _encodeRecord(child, child_position, header)
+        encoded_children += encoded_child
+        child_position += len(encoded_child)
+
+    if children:
+        encoded_children += bytes(header.size)
+
+    end = child_position + (header.size if children else 0)
+    encoded_header = header.pack(end, len(properties), len(encoded_properties), len(encoded_name))
+    return encoded_header + encoded_name + encoded_properties + encoded_children
+
+
+def writeBinary(path, records, version=7400):
+    """
+    Writes the given records as a binary FBX file, with the same footer the FBX SDK writes.
+
+    Args:
+        path (string): Path to write to.
+
+        records (list): Top level records made with record().
+
+        version (int): FBX version to write, 7500 and up use 64-bit record headers.
+
+    Returns:
+        (string): Path written to.
+    """
+    header = fbx_file.record_headers[version >= fbx_file.large_header_version]
+    data = bytearray(fbx_file.binary_magic + b'\x1a\x00' + fbx_file.length_header.pack(version))
+
+    for node in records:
+        data += _encodeRecord(node, len(data), header)
+
+    data += bytes(header.size) + footer_id + bytes(4)
+    data += bytes(16 - len(data) % 16)
+    data += fbx_file.length_header.pack(version) + bytes(120) + footer_magic
+
+    with open(path, 'wb') as open_file:
+        open_file.write(data)
+
+    return path
+
+
+def _formatValue(type_code, value):
+    """
+    Formats the given property value as ASCII FBX files write it.
+
+    Args:
+        type_code (string): FBX type code of value.
+
+        value (Any): Value to format.
+
+    Returns:
+        (string): Value as written in ASCII file.
+    """
+    if type_code in ('S', 'R'):
+        text = value.decode() if isinstance(value, bytes) else value
+        return '"' + fbx_file.convertName(text).replace('"', '&quot;') + '"'
+
+    if type_code in fbx_file.array_types:
+        return f'*{len(value)} {{\n a: ' + ','.join(str(item) for item in value) + '\n}'
+
+    return str(int(value) if type_code == 'C' else value)
+
+
+def _formatRecord(node, depth):
+    """
+    Formats the given record and all its nested records as ASCII.
+
+    Args:
+        node (tuple): Record made with record().
+
+        depth (int): How many records the given record is nested in.
+
+    Returns:
+        (list): Lines of record.
+    """
+    name, properties, children = node
+    indent = '\t' * depth
+    line = indent + name + ': ' + ', '.join(_formatValue(*value) for value in properties)
+
+    if not children:
+        return [line]
+
+    lines = [line + ' {']
+    for child in children:
+        lines += _formatRecord(child, depth + 1)
+
+    return lines + [indent + '}']
+
+
+def writeAscii(path, records):
+    """
+    Writes the given records as an ASCII FBX file.
+
+    Args:
+        path (string): Path to write to.
+
+        records (list): Top level records made with record().
+
+    Returns:
+        (string): Path written to.
+    """
+    lines = ['; FBX 7.4.0 project file', '']
+    for node in records:
+        lines += _formatRecord(node, 0)
+
+    with open(path, 'w') as open_file:
+        open_file.write('\n'.join(lines) + '\n')
+
+    return path
+
+
+def getMeshRecords(version=7400):
+    """
+    Gets the records of a scene with a mesh that has export attributes and a property to clean up, a helper to delete
+    with a child model and a node attribute only it uses, and a material shared by the mesh and the helper.
+
+    Args:
+        version (int): FBX version written in the header.
+
+    Returns:
+        (list): Top level records.
+    """
+    definitions = record('Definitions', children=[
+        record('Version', [('I', 100)]),
+        record('Count', [('I', 6)]),
+        record('ObjectType', [('S', 'GlobalSettings')], [record('Count', [('I', 1)])]),
+        record('ObjectType', [('S', 'Model')], [record('Count', [('I', 3)])]),
+        record('ObjectType', [('S', 'Geometry')], [record('Count', [('I', 1)])]),
+        record('ObjectType', [('S', 'NodeAttribute')], [record('Count', [('I', 1)])]),
+        record('ObjectType', [('S', 'Material')], [record('Count', [('I', 1)])])])
+
+    objects = record('Objects', children=[
+        record('Geometry', [('L', 10), ('S', objectName('SM_Chair', 'Geometry')), ('S', 'Mesh')],
+               [record('Vertices', [('d', [0.0, 1.0, 2.0, 3.0, 4.0, 5.0])]),
+                record('PolygonVertexIndex', [('i', [0, 1, -2])])]),
+        record('Model', [('L', 1), ('S', objectName('SM_Chair', 'Model')), ('S', 'Mesh')],
+               [record('Version', [('I', 232)]),
+                record('Properties70', children=[
+                    prop('relative_source', 'KString', ('S', 'Props/Chair.ma')),
+                    prop('currentUVSet', 'KString', ('S', 'map1')),
+                    prop('DCC', 'KString', ('S', 'Maya'))])]),
+        record('Model', [('L', 2), ('S', objectName('helper', 'Model')), ('S', 'Null')],
+               [record('Properties70', children=[prop('delete', 'bool', ('I', 1)),
+                                                 prop('currentUVSet', 'KString', ('S', 'map1'))])]),
+        record('Model', [('L', 3), ('S', objectName('child', 'Model')), ('S', 'Null')],
+               [record('Properties70')]),
+        record('NodeAttribute', [('L', 20), ('S', objectName('helper', 'NodeAttribute')), ('S', 'Null')],
+               [record('TypeFlags', [('S', 'Null')])]),
+        record('Material', [('L', 30), ('S', objectName('M_Wood', 'Material')), ('S', '')],
+               [record('ShadingModel', [('S', 'lambert')])])])
+
+    connections = record('Connections', children=[
+        record('C', [('S', 'OO'), ('L', 1), ('L', 0)]),
+        record('C', [('S', 'OO'), ('L', 10), ('L', 1)]),
+        record('C', [('S', 'OO'), ('L', 30), ('L', 1)]),
+        record('C', [('S', 'OO'), ('L', 2), ('L', 0)]),
+        record('C', [('S', 'OO'), ('L', 20), ('L', 2)]),
+        record('C', [('S', 'OO'), ('L', 30), ('L', 2)]),
+        record('C', [('S', 'OO'), ('L', 3), ('L', 2)])])
+
+    header = record('FBXHeaderExtension', children=[record('FBXHeaderVersion', [('I', 1003)]),
+                                                    record('FBXVersion', [('I', version)])])
+    return [header, getGlobalSettings(0, 0), definitions, objects, connections]
+
+
+def getGlobalSettings(start, end):
+    """
+    Gets the "GlobalSettings" record with the given time span.
+
+    Args:
+        start (int): Start of time span in FBX ticks.
+
+        end (int): End of time span in FBX ticks.
+
+    Returns:
+        (tuple): GlobalSettings record.
+    """
+    return record('GlobalSettings', children=[
+        record('Version', [('I', 1000)]),
+        record('Properties70', children=[prop('UpAxis', 'int', ('I', 1)),
+                                         prop('TimeMode', 'enum', ('I', 6)),
+                                         prop('TimeSpanStart', 'KTime', ('L', start)),
+                                         prop('TimeSpanStop', 'KTime', ('L', end)),
+                                         prop('CustomFrameRate', 'double', ('D', -1.0))])])
+
+
+def getAnimationCurve(object_id, frames, offset):
+    """
+    Gets an "AnimationCurve" record with a key on every frame. The first three keys share a key attribute, the last two
+    share another, and all the keys in between share a third one, the same way the FBX SDK groups them.
+
+    Args:
+        object_id (int): Unique ID of curve.
+
+        frames (int): Amount of frames to key, starting at frame 0.
+
+        offset (float): Added to the value of every key, so each curve has different values.
+
+    Returns:
+        (tuple): AnimationCurve record.
+    """
+    return record('AnimationCurve', [('L', object_id), ('S', objectName('', 'AnimCurve')), ('S', '')], [
+        record('Default', [('D', 0.0)]),
+        record('KeyVer', [('I', 4009)]),
+        record('KeyTime', [('l', [frame * frame_time for frame in range(frames)])]),
+        record('KeyValueFloat', [('f', [frame + offset for frame in range(frames)])]),
+        record('KeyAttrFlags', [('i', [264, 8456, 264])]),
+        record('KeyAttrDataFloat', [('f', [0.0, 0.0, 1.0, 0.0, 0.0, 0.0, 2.0, 0.0, 0.0, 0.0, 3.0, 0.0])]),
+        record('KeyAttrRefCount', [('i', [3, frames - 5, 2])])])
+
+
+def getAnimationRecords(frames=100, curves=3, version=7400):
+    """
+    Gets the records of a scene with an animation of all the clips, keyed on every frame, the way Maya exports it
+    before the clips are cut out of it.
+
+    Args:
+        frames (int): Amount of frames keyed, starting at frame 0.
+
+        curves (int): Amount of animation curves.
+
+        version (int): FBX version written in the header.
+
+    Returns:
+        (list): Top level records.
+    """
+    end = (frames - 1) * frame_time
+    stack = record('AnimationStack', [('L', 50), ('S', objectName('Take 001', 'AnimStack')), ('S', '')], [
+        record('Properties70', children=[prop('LocalStart', 'KTime', ('L', 0)),
+                                         prop('LocalStop', 'KTime', ('L', end)),
+                                         prop('ReferenceStart', 'KTime', ('L', 0)),
+                                         prop('ReferenceStop', 'KTime', ('L', end))])])
+
+    animation_curves = [getAnimationCurve(100 + i, frames, i * 1000.0) for i in range(curves)]
+    takes = record('Takes', children=[
+        record('Current', [('S', 'Take 001')]),
+        record('Take', [('S', 'Take 001')], [record('FileName', [('S', 'Take_001.tak')]),
+                                              record('LocalTime', [('L', 0), ('L', end)]),
+                                              record('ReferenceTime', [('L', 0), ('L', end)])])])
+
+    header = record('FBXHeaderExtension', children=[record('FBXHeaderVersion', [('I', 1003)]),
+                                                    record('FBXVersion', [('I', version)])])
+    return [header, getGlobalSettings(0, end), record('Objects', children=[stack] + animation_curves), takes]
+
+
+def writeMesh(directory, name='mesh', version=7400, binary=True):
+    """
+    Writes the mesh scene of getMeshRecords to the given directory.
+
+    Args:
+        directory (string): Directory to write file in.
+
+        name (string): Name of file without extension.
+
+        version (int): FBX version to write.
+
+        binary (boolean): If False, writes ASCII file.
+
+    Returns:
+        (string): Path written to.
+    """
+    path = os.path.join(directory, name + '.fbx')
+    records = getMeshRecords(version)
+    return writeBinary(path, records, version) if binary else writeAscii(path, records)
+
+
+def writeAnimation(directory, name='animation', frames=100, curves=3, version=7400, binary=True):
+    """
+    Writes the animation scene of getAnimationRecords to the given directory.
+
+    Args:
+        directory (string): Directory to write file in.
+
+        name (string): Name of file without extension.
+
+        frames (int): Amount of frames keyed, starting at frame 0.
+
+        curves (int): Amount of animation curves.
+
+        version (int): FBX version to write.
+
+        binary (boolean): If False, writes ASCII file.
+
+    Returns:
+        (string): Path written to.
+    """
+    path = os.path.join(directory, name + '.fbx')
+    records = getAnimationRecords(frames, curves, version)
+    return writeBinary(path, records, version) if binary else writeAscii(path, records)
@@ -0,0 +1,331 @@
+#  Copyright (c) Christian Corsica. All Rights Reserved.
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import piper.core.fbx_file as fbx_file
+from tests.core import fbx_fixtures
+from tests.core.fbx_fixtures import frame_rate, frame_time
+
+
+versions = (7400, 7500)  # 7500 and up use 64-bit record headers
+
+
+def getPropertyNames(fbx, name):
+    """
+    Gets the names of the properties of the model with the given name.
+
+    Args:
+        fbx (fbx_file.FBXFile): File to get model from.
+
+        name (string): Name of model.
+
+    Returns:
+        (list): Names of properties in the order they are written.
+    """
+    return [record.properties[0] for record in fbx.getNodeByName(name).find('Properties70').findAll('P')]
+
+
+def getDefinitionCounts(fbx):
+    """
+    Gets the amount of objects the "Definitions" record says the file has.
+
+    Args:
+        fbx (fbx_file.FBXFile): File to get definitions of.
+
+    Returns:
+        (tuple): Total count as first index, dictionary of object type as key and count as value as second index.
+    """
+    definitions = fbx.getTopNode('Definitions')
+    counts = {object_type.value: object_type.find('Count').value for object_type in definitions.findAll('ObjectType')}
+    return definitions.find('Count').value, counts
+
+
+def getTimeSpans(fbx):
+    """
+    Gets every time span written in the file, the scene's, each animation stack's, and each take's.
+
+    Args:
+        fbx (fbx_file.FBXFile): File to get time spans of.
+
+    Returns:
+        (list): Tuples of start and end time in FBX ticks.
+    """
+    settings = fbx.getProperties(fbx.getTopNode('GlobalSettings'))
+    spans = [(settings['TimeSpanStart'], settings['TimeSpanStop'])]
+
+    for stack in fbx.getTopNode('Objects').findAll('AnimationStack'):
+        properties = fbx.getProperties(stack)
+        spans.append((properties['LocalStart'], properties['LocalStop']))
+        spans.append((properties['ReferenceStart'], properties['ReferenceStop']))
+
+    for take in fbx.getTopNode('Takes').findAll('Take'):
+        spans.append(tuple(take.find('LocalTime').properties))
+        spans.append(tuple(take.find('ReferenceTime').properties))
+
+    return spans
+
+
+class FBXTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+
+    def getPath(self, name):
+        """
+        Gets the path to a file with the given name in the test's temporary directory.
+
+        Args:
+            name (string): Name of file without extension.
+
+        Returns:
+            (string): Full path to FBX file.
+        """
+        return os.path.join(self.directory, name + '.fbx')
+
+
+class TestFBXFile(FBXTestCase):
+
+    def test_binaryAndAsciiMatch(self):
+        ascii_path = fbx_fixtures.writeMesh(self.directory, 'ascii', binary=False)
+        self.assertFalse(fbx_file.isBinary(ascii_path))
+
+        for version in versions:
+            with self.subTest(version=version):
+                binary_path = fbx_fixtures.writeMesh(self.directory, f'binary_{version}', version=version)
+                self.assertTrue(fbx_file.isBinary(binary_path))
+
+                with fbx_file.FBXFile(binary_path) as binary, fbx_file.FBXFile(ascii_path) as ascii_file:
+                    self.assertEqual(binary.version, version)
+                    self.assertEqual(binary.getExportAttributes(), ascii_file.getExportAttributes())
+                    self.assertEqual(binary.getConnections(), ascii_file.getConnections())
+                    self.assertEqual([(node.name, node.properties) for node in binary.getObjects()],
+                                     [(node.name, node.properties) for node in ascii_file.getObjects()])
+                    self.assertEqual(list(binary.getNodeByName('SM_Chair', 'Geometry').find('Vertices').value),
+                                     list(ascii_file.getNodeByName('SM_Chair', 'Geometry').find('Vertices').value))
+
+
+class TestFBXRewriter(FBXTestCase):
+
+    def test_asciiIsRefused(self):
+        path = fbx_fixtures.writeMesh(self.directory, binary=False)
+        self.assertRaises(ValueError, fbx_file.FBXRewriter, path)
+
+    def test_removeProperties(self):
+        for version in versions:
+            with self.subTest(version=version):
+                path = fbx_fixtures.writeMesh(self.directory, version=version)
+
+                with fbx_file.FBXRewriter(path) as rewriter:
+                    removed = rewriter.removeProperties(['currentUVSet'])
+                    self.assertTrue(rewriter.save())
+
+                self.assertEqual(removed, [('SM_Chair', 'currentUVSet'), ('helper', 'currentUVSet')])
+
+                with fbx_file.FBXFile(path) as fbx:
+                    self.assertEqual(fbx.version, version)
+                    self.assertEqual(getPropertyNames(fbx, 'SM_Chair'), ['relative_source', 'DCC'])
+                    self.assertEqual(getPropertyNames(fbx, 'helper'), ['delete'])
+                    self.assertEqual(fbx.getExportAttributes()['SM_Chair']['relative_source'], 'Props/Chair.ma')
+                    self.assertEqual(len(fbx.getObjects()), 6)
+                    self.assertEqual(len(fbx.getConnections()), 7)
+                    self.assertEqual(list(fbx.getNodeByName('SM_Chair', 'Geometry').find('Vertices').value),
+                                     [0.0, 1.0, 2.0, 3.0, 4.0, 5.0])
+
+    def test_removePropertiesOfClass(self):
+        path = fbx_fixtures.writeMesh(self.directory)
+
+        with fbx_file.FBXRewriter(path) as rewriter:
+            self.assertEqual(rewriter.removeProperties(['currentUVSet'], class_name='Geometry'), [])
+            self.assertFalse(rewriter.hasChanges())
+
+    def test_saveWithoutChanges(self):
+        path = fbx_fixtures.writeMesh(self.directory)
+        copy_path = self.getPath('copy')
+
+        with open(path, 'rb') as open_file:
+            data = open_file.read()
+
+        with fbx_file.FBXRewriter(path) as rewriter:
+            rewriter.removeProperties(['not_a_property'])
+            self.assertFalse(rewriter.save())
+
+        with fbx_file.FBXRewriter(path) as rewriter:
+            self.assertTrue(rewriter.save(copy_path))
+
+        for written_path in (path, copy_path):
+            with open(written_path, 'rb') as open_file:
+                self.assertEqual(open_file.read(), data)
+
+    def test_deleteNodesWithPropertyValue(self):
+        for version in versions:
+            with self.subTest(version=version):
+                path = fbx_fixtures.writeMesh(self.directory, version=version)
+
+                with fbx_file.FBXRewriter(path) as rewriter:
+                    deleted = rewriter.deleteNodesWithPropertyValue('delete', True)
+                    self.assertTrue(rewriter.save())
+
+                # child model and node attribute only belong to the helper, the material is also used by the mesh
+                self.assertEqual(sorted(deleted), ['child', 'helper'])
+
+                with fbx_file.FBXFile(path) as fbx:
+                    names = [(node.name, fbx.getName(node)) for node in fbx.getObjects()]
+                    self.assertEqual(names, [('Geometry', 'SM_Chair'), ('Model', 'SM_Chair'), ('Material', 'M_Wood')])
+
+                    ids = set(fbx.getObjectsByID()) | {0}
+                    connections = fbx.getConnections()
+                    self.assertEqual([(child, parent) for _, child, parent, _ in connections],
+                                     [(1, 0), (10, 1), (30, 1)])
+                    self.assertTrue(all(child in ids and parent in ids for _, child, parent, _ in connections))
+
+                    total, counts = getDefinitionCounts(fbx)
+                    self.assertEqual(total, 3)
+                    self.assertEqual(counts, {'GlobalSettings': 1, 'Model': 1, 'Geometry': 1, 'NodeAttribute': 0,
+                                              'Material': 1})
+
+    def test_cleanUp(self):
+        for version in versions:
+            with self.subTest(version=version):
+                path = fbx_fixtures.writeMesh(self.directory, version=version)
+
+                # same clean up the FBX exporter runs after writing
+                with fbx_file.FBXRewriter(path) as rewriter:
+                    rewriter.removeProperties(['currentUVSet'])
+                    rewriter.deleteNodesWithPropertyValue('delete', True)
+                    self.assertTrue(rewriter.save())
+
+                with fbx_file.FBXFile(path) as fbx:
+                    self.assertEqual(getPropertyNames(fbx, 'SM_Chair'), ['relative_source', 'DCC'])
+                    self.assertIsNone(fbx.getNodeByName('helper'))
+                    self.assertEqual(getDefinitionCounts(fbx)[0], 3)
+
+                # file that was cleaned up can be re-written again
+                with fbx_file.FBXRewriter(path) as rewriter:
+                    self.assertEqual(rewriter.deleteNodesWithPropertyValue('delete', True), [])
+                    self.assertFalse(rewriter.save())
+
+    def test_deleteNothing(self):
+        path = fbx_fixtures.writeMesh(self.directory)
+
+        with fbx_file.FBXRewriter(path) as rewriter:
+            self.assertEqual(rewriter.deleteNodesWithPropertyValue('delete', False), [])
+            self.assertFalse(rewriter.hasChanges())
+
+    def test_setTimeSpan(self):
+        for version in versions:
+            with self.subTest(version=version):
+                path = fbx_fixtures.writeAnimation(self.directory, version=version)
+                start, end = 12 * frame_time, 48 * frame_time
+
+                with fbx_file.FBXRewriter(path) as rewriter:
+                    rewriter.setTimeSpan(start, end)
+                    self.assertTrue(rewriter.save())
+
+                with fbx_file.FBXFile(path) as fbx:
+                    self.assertEqual(getTimeSpans(fbx), [(start, end)] * 5)
+
+                    # only the times changed, everything else in the records is kept
+                    settings = fbx.getProperties(fbx.getTopNode('GlobalSettings'))
+                    self.assertEqual(settings['TimeMode'], 6)
+                    self.assertEqual(settings['CustomFrameRate'], -1.0)
+                    take = fbx.getTopNode('Takes').find('Take')
+                    self.assertEqual(take.value, 'Take 001')
+                    self.assertEqual(take.find('FileName').value, 'Take_001.tak')
+                    self.assertEqual(len(fbx.getTopNode('Objects').findAll('AnimationCurve')), 3)
+
+
+class TestTrimClips(FBXTestCase):
+
+    # clip name, first frame, and last frame, including clips at the start, the end, all of it, and overlapping clips
+    clips = [('A_Start', 0, 9), ('A_Loop', 10, 40), ('A_Overlap', 35, 60), ('A_End', 97, 99), ('A_All', 0, 99),
+             ('A_Single', 50, 50), ('A_Inner', 1, 3)]
+
+    def assertClip(self, path, start, end, curves=3):
+        """
+        Asserts that the given clip only has the keys of the given frames, with the same values, key attributes, and
+        time spans that exporting the clip with its frames as the playback range writes.
+
+        Args:
+            path (string): Path to clip.
+
+            start (int): First frame of clip.
+
+            end (int): Last frame of clip.
+
+            curves (int): Amount of animation curves clip should have.
+        """
+        frames = list(range(start, end + 1))
+
+        with fbx_file.FBXFile(path) as fbx:
+            animation_curves = fbx.getTopNode('Objects').findAll('AnimationCurve')
+            self.assertEqual(len(animation_curves), curves)
+
+            for i, curve in enumerate(animation_curves):
+                self.assertEqual(list(curve.find('KeyTime').value), [frame * frame_time for frame in frames])
+                self.assertEqual(list(curve.find('KeyValueFloat').value), [frame + i * 1000.0 for frame in frames])
+
+                # source shares attributes between keys 0-2, 3-97, and 98-99
+                groups = [(0, 2, 264, 1.0), (3, 97, 8456, 2.0), (98, 99, 264, 3.0)]
+                kept = [(min(last, end) - max(first, start) + 1, flag, data) for first, last, flag, data in groups
+                        if min(last, end) >= max(first, start)]
+                self.assertEqual(list(curve.find('KeyAttrRefCount').value), [count for count, _, _ in kept])
+                self.assertEqual(list(curve.find('KeyAttrFlags').value), [flag for _, flag, _ in kept])
+                self.assertEqual(list(curve.find('KeyAttrDataFloat').value),
+                                 [value for _, _, data in kept for value in (0.0, 0.0, data, 0.0)])
+
+            self.assertEqual(getTimeSpans(fbx), [(start * frame_time, end * frame_time)] * 5)
+
+    def test_trimClips(self):
+        for version in versions:
+            with self.subTest(version=version):
+                source_path = fbx_fixtures.writeAnimation(self.directory, f'A_Walk_{version}', version=version)
+                clips = [(self.getPath(f'{name}_{version}'), start, end) for name, start, end in self.clips]
+                written = fbx_file.trimClips(source_path, clips, frame_rate)
+
+                self.assertEqual(written, [clip[0] for clip in clips])
+                for clip_path, start, end in clips:
+                    with self.subTest(clip=os.path.basename(clip_path)):
+                        self.assertClip(clip_path, start, end)
+
+                        with fbx_file.FBXFile(clip_path) as fbx:
+                            self.assertEqual(fbx.version, version)
+
+    def test_trimAllFramesIsUnchanged(self):
+        source_path = fbx_fixtures.writeAnimation(self.directory)
+        clip_path = fbx_file.trimClip(source_path, self.getPath('A_All'), 0, 99, frame_rate)
+
+        with open(source_path, 'rb') as source, open(clip_path, 'rb') as clip:
+            self.assertEqual(source.read(), clip.read())
+
+    def test_trimSource(self):
+        source_path = fbx_fixtures.writeAnimation(self.directory)
+        fbx_file.trimClips(source_path, [(self.getPath('A_Loop'), 10, 40)], frame_rate, workers=1)
+        self.assertClip(source_path, 0, 99)
+
+    def test_trimClipOfClip(self):
+        source_path = fbx_fixtures.writeAnimation(self.directory)
+        clip_path = fbx_file.trimClip(source_path, self.getPath('A_Loop'), 10, 40, frame_rate)
+        inner_path = fbx_file.trimClip(clip_path, self.getPath('A_Inner'), 20, 25, frame_rate)
+        self.assertClip(inner_path, 20, 25)
+
+    def test_trimKeysWithinTolerance(self):
+        source_path = fbx_fixtures.writeAnimation(self.directory)
+
+        # keys are a tiny fraction of a frame off from the frame range, they still belong to the clip
+        clip_path = fbx_file.trimClip(source_path, self.getPath('A_Loop'), 10.0001, 39.9999, frame_rate)
+
+        with fbx_file.FBXFile(clip_path) as fbx:
+            curve = fbx.getTopNode('Objects').find('AnimationCurve')
+            self.assertEqual(list(curve.find('KeyTime').value), [frame * frame_time for frame in range(10, 41)])
+
+    def test_asciiIsRefused(self):
+        source_path = fbx_fixtures.writeAnimation(self.directory, binary=False)
+        self.assertRaises(ValueError, fbx_file.trimClips, source_path, [(self.getPath('A_Loop'), 10, 40)], frame_rate)
+
+
+if __name__ == '__main__':
+    unittest.main()